@@ -5,9 +5,10 @@ Spreadsheet Data Reader with Google OAuth Authentication
 
 from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 import os
+import asyncio
 from dotenv import load_dotenv
 import logging
 
@@ -15,8 +16,15 @@ import logging
 from routers.auth import router as auth_router
 from routers.sheets import router as sheets_router
 from routers.links import router as links_router
-from utils.session import SessionManager
-from utils.database import Database
+from utils.auth import session_manager
+from utils.database import AsyncDatabase
+from utils.http_client import close_http_client
+from utils.prefetch import prefetcher
+from utils.rate_limit import google_scheduler
+from utils.metrics import metrics, MetricsMiddleware
+from utils.responses import FastJSONResponse
+from utils.sheet_cache import sheet_cache
+from config.settings import settings
 
 # Load environment variables
 load_dotenv()
@@ -29,7 +37,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Spreadsheet Data Reader",
     description="Professional system untuk membaca dan memproses Google Sheets data",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -41,19 +50,68 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route latency and in-flight requests
+app.add_middleware(MetricsMiddleware)
+
 # Initialize services
-session_manager = SessionManager()
-database = Database()
+database = AsyncDatabase()
+
+def collect_service_metrics():
+    """Scrape-time gauges and counters from the cache, sessions, DB pool and quota scheduler"""
+    cache = sheet_cache.stats()
+    for tier in ("memory_hits", "db_hits", "revalidated", "misses"):
+        yield ("sheet_cache_lookups_total", "counter", "Sheet cache lookups by outcome",
+               {"outcome": tier}, cache[tier])
+    yield ("sheet_cache_evictions_total", "counter", "Sheet cache memory evictions", {}, cache["evictions"])
+    yield ("sheet_cache_bytes", "gauge", "Sheet cache memory tier size", {}, cache["bytes"])
+    
+    sessions = session_manager.stats()
+    yield ("sessions_cached", "gauge", "Sessions in this worker's read cache", {}, sessions["entries"])
+    yield ("session_pending_writes", "gauge", "Session writes waiting for the next flush", {},
+           sessions["pending_writes"])
+    
+    pool = database.pool_stats()
+    yield ("db_pool_connections", "gauge", "Pooled SQLite connections by state", {"state": "in_use"},
+           pool["in_use"])
+    yield ("db_pool_connections", "gauge", "Pooled SQLite connections by state", {"state": "idle"},
+           pool["idle"])
+    yield ("db_pool_waits_total", "counter", "Connection checkouts that had to wait", {}, pool["waits"])
+    
+    quota = google_scheduler.stats()
+    for priority, depth in quota["queue"].items():
+        yield ("google_queue_depth", "gauge", "Google calls waiting for quota by priority",
+               {"priority": priority}, depth)
+    yield ("google_rate_limit", "gauge", "Current global Google call rate (per second)", {},
+           quota["rate"])
+
+metrics.register_collector(collect_service_metrics)
 
 # Create database tables on startup
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on application startup"""
     try:
-        database.init_db()
+        await database.init_db()
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
+    
+    # Flush session writes and sweep expired sessions in the background
+    app.state.session_task = asyncio.create_task(session_manager.run_background())
+    
+    # Warm the sheet cache for active links before the morning peak
+    app.state.prefetch_task = None
+    if settings.PREFETCH_ENABLED:
+        app.state.prefetch_task = asyncio.create_task(prefetcher.run_background())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and close outbound HTTP connections"""
+    app.state.session_task.cancel()
+    if app.state.prefetch_task:
+        app.state.prefetch_task.cancel()
+    await session_manager.flush()
+    await close_http_client()
 
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
@@ -70,6 +128,16 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Prometheus metrics endpoint
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics in the Prometheus text format"""
+    live = await session_manager.count_live()
+    body = metrics.render(extra=[
+        ("sessions_live", "gauge", "Unexpired sessions across all workers", {}, live)
+    ])
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -81,6 +149,11 @@ async def root():
     }
 
 if __name__ == "__main__":
+    import sys
+    if "--profile-startup" in sys.argv:
+        from utils.startup_profile import main
+        sys.exit(main([arg for arg in sys.argv[1:] if arg != "--profile-startup"]))
+    
     import uvicorn
     uvicorn.run(
         "app:app",
@@ -0,0 +1,179 @@
+"""
+Microbenchmarks for the backend hot paths
+
+Run from the backend directory:
+
+    python -m benchmarks                      # run everything, print a table
+    python -m benchmarks -k session --quick   # filter by name, skip the 1M cases
+    python -m benchmarks --save before.json
+    python -m benchmarks --compare before.json --threshold 0.15
+
+Each bench_*.py module defines bench_* functions that take a `benchmark`
+callable, in the style of pytest-benchmark fixtures. Comparing against a
+saved run exits non-zero when any benchmark's median is slower than the
+baseline by more than the threshold.
+"""
+
+import gc
+import importlib
+import pkgutil
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Callable
+
+class Benchmark:
+    """Timing fixture handed to each bench_* function"""
+
+    def __init__(
+        self,
+        rounds: int = 5,
+        min_time: float = 0.05,
+        keyword: Optional[str] = None,
+        quick: bool = False
+    ):
+        """Initialize fixture"""
+        self.rounds = rounds
+        self.min_time = min_time
+        self.keyword = keyword
+        self.quick = quick
+        self.results: List[Dict[str, Any]] = []
+
+    def wants(self, name: str) -> bool:
+        """Check a benchmark name against the -k filter"""
+        return not self.keyword or self.keyword in name
+
+    def __call__(
+        self,
+        fn: Callable,
+        *args,
+        name: str,
+        ops: int = 1,
+        setup: Optional[Callable] = None,
+        rounds: Optional[int] = None,
+        **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Time fn(*args, **kwargs); ops is how many operations one call
+        performs, so results are reported per operation. setup runs
+        untimed before every call.
+        """
+        if not self.wants(name):
+            return None
+
+        # Calibrate calls per round so each round lasts at least min_time
+        iterations = 1
+        while True:
+            elapsed = self._time(fn, args, kwargs, setup, iterations)
+            if elapsed >= self.min_time or iterations >= 1 << 20:
+                break
+            iterations *= 2
+
+        samples = [
+            self._time(fn, args, kwargs, setup, iterations) / (iterations * ops)
+            for _ in range(rounds or self.rounds)
+        ]
+        result = {
+            "name": name,
+            "ops": ops,
+            "iterations": iterations,
+            "rounds": len(samples),
+            "min": min(samples),
+            "median": statistics.median(samples),
+            "mean": statistics.fmean(samples),
+            "stddev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        }
+        result["ops_per_sec"] = 1 / result["median"] if result["median"] else None
+        self.results.append(result)
+        print(format_result(result), flush=True)
+        return result
+
+    @staticmethod
+    def _time(fn, args, kwargs, setup, iterations) -> float:
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            total = 0.0
+            for _ in range(iterations):
+                if setup is not None:
+                    setup()
+                started = time.perf_counter()
+                fn(*args, **kwargs)
+                total += time.perf_counter() - started
+            return total
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+def format_seconds(value: float) -> str:
+    """Format a per-op duration with a readable unit"""
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value / 1e-9:.1f} ns"
+
+def format_result(result: Dict[str, Any]) -> str:
+    """One table line for a result"""
+    return (
+        f"{result['name']:<48} {format_seconds(result['median']):>10}/op"
+        f"  (min {format_seconds(result['min'])}, +/- {format_seconds(result['stddev'])},"
+        f" {result['rounds']}x{result['iterations']})"
+    )
+
+def discover() -> List[Callable]:
+    """Import every bench_* module in this package and collect its bench_* functions"""
+    functions = []
+    for module_info in sorted(pkgutil.iter_modules(__path__), key=lambda m: m.name):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        functions.extend(
+            getattr(module, attr) for attr in sorted(vars(module))
+            if attr.startswith("bench_") and callable(getattr(module, attr))
+        )
+    return functions
+
+def machine_info() -> Dict[str, Any]:
+    """Describe where and on which commit the run happened"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "datetime": datetime.now().isoformat(timespec="seconds"),
+    }
+
+def compare(
+    current: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    threshold: float
+) -> List[str]:
+    """Print current vs baseline medians; returns the names that regressed"""
+    previous = {result["name"]: result for result in baseline}
+    regressions = []
+    for result in current:
+        before = previous.get(result["name"])
+        if before is None or not before["median"]:
+            continue
+        ratio = result["median"] / before["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(result["name"])
+        elif ratio < 1 - threshold:
+            flag = "  improved"
+        print(
+            f"{result['name']:<48} {format_seconds(before['median']):>10}"
+            f" -> {format_seconds(result['median']):>10}  x{ratio:.2f}{flag}"
+        )
+    return regressions
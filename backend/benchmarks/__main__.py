@@ -0,0 +1,55 @@
+"""
+Command line entry point: python -m benchmarks
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Benchmarks import the app's modules the same way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import Benchmark, discover, machine_info, compare
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("-k", dest="keyword", help="only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per round")
+    parser.add_argument("--quick", action="store_true", help="skip the largest sizes")
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="compare against saved JSON results")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15,
+        help="fractional slowdown of the median that counts as a regression"
+    )
+    args = parser.parse_args()
+
+    benchmark = Benchmark(
+        rounds=args.rounds,
+        min_time=args.min_time,
+        keyword=args.keyword,
+        quick=args.quick
+    )
+    for function in discover():
+        function(benchmark)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"machine": machine_info(), "benchmarks": benchmark.results}, f, indent=2)
+        print(f"\nSaved {len(benchmark.results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline['machine'].get('commit')}):")
+        regressions = compare(benchmark.results, baseline["benchmarks"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            return 1
+        print(f"\nNo regressions over {args.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Database CRUD helpers against a temporary SQLite file
+"""
+
+import itertools
+import os
+import tempfile
+
+from utils.database import Database
+
+def bench_database_crud(benchmark):
+    if not benchmark.wants("database."):
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        db.init_db()
+        db.execute("INSERT INTO users (email, name) VALUES (?, ?)", ("bench@example.com", "Bench"))
+        user_id = db.fetch_one("SELECT id FROM users WHERE email = ?", ("bench@example.com",))["id"]
+        counter = itertools.count()
+
+        def insert():
+            n = next(counter)
+            db.execute(
+                """
+                INSERT INTO spreadsheet_links
+                (user_id, spreadsheet_id, spreadsheet_name, sheet_name, link)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (user_id, f"sheet{n}", "Bench", "Sheet1", f"https://example.com/{n}")
+            )
+
+        benchmark(insert, name="database.execute.insert")
+        benchmark(
+            db.fetch_one,
+            "SELECT * FROM spreadsheet_links WHERE id = ? AND user_id = ?",
+            (1, user_id),
+            name="database.fetch_one.by_id"
+        )
+        benchmark(
+            db.fetch_all,
+            """
+            SELECT * FROM spreadsheet_links
+            WHERE user_id = ? AND is_active = 1
+            ORDER BY updated_at DESC, id DESC
+            LIMIT 50
+            """,
+            (user_id,),
+            name="database.fetch_all.page_50"
+        )
+        benchmark(
+            db.execute,
+            "UPDATE spreadsheet_links SET spreadsheet_name = ? WHERE id = ?",
+            ("Renamed", 1),
+            name="database.execute.update"
+        )
+        batch = [
+            ("INSERT INTO link_history (link_id, action) VALUES (?, ?)", (1, "bench"))
+        ] * 100
+        benchmark(db.execute_batch, batch, name="database.execute_batch.100_inserts", ops=100)
+        db.pool.close_all()
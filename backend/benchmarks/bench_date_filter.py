@@ -0,0 +1,65 @@
+"""
+Date filtering of whole sheets, vectorized vs the per-row loop it replaced
+"""
+
+import random
+from datetime import date
+
+from utils.date_filter import date_mask, filter_rows, parse_date_column
+from utils.date_normalizer import DateNormalizer
+
+SIZES = (10_000, 100_000)
+TODAY = date(2025, 11, 17)
+
+def sheet_rows(size: int, seed: int = 3) -> list:
+    """A response log: one dd/mm/yyyy date per row over a year, a few blanks"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        cell = f"{rng.randint(1, 28)}/{rng.randint(1, 12)}/2025" if rng.random() < 0.98 else ""
+        rows.append([cell, f"siswa {i}", str(rng.randint(0, 100))])
+    return rows
+
+def loop_filter(rows, on):
+    """The original filter: parse and compare one row at a time"""
+    return [row for row in rows if row and DateNormalizer.parse_date(row[0]) == on]
+
+def bench_filter_rows(benchmark):
+    sizes = SIZES[:-1] if benchmark.quick else SIZES
+    for size in sizes:
+        rows = sheet_rows(size)
+        label = f"{size // 1000}k"
+        # Cold: the parse memo is empty, as for the first filter of a sheet
+        benchmark(
+            filter_rows, rows, 0, TODAY,
+            date_format="%d/%m/%Y",
+            name=f"date_filter.filter_rows.on.{label}",
+            ops=size,
+            setup=DateNormalizer._parse_cached.cache_clear
+        )
+        benchmark(
+            filter_rows, rows, 0,
+            start=date(2025, 3, 1), end=date(2025, 5, 31), date_format="%d/%m/%Y",
+            name=f"date_filter.filter_rows.range.{label}",
+            ops=size,
+            setup=DateNormalizer._parse_cached.cache_clear
+        )
+        benchmark(
+            loop_filter, rows, TODAY,
+            name=f"date_filter.loop_filter.on.{label}",
+            ops=size,
+            setup=DateNormalizer._parse_cached.cache_clear
+        )
+
+def bench_date_mask(benchmark):
+    sizes = SIZES[:-1] if benchmark.quick else SIZES
+    for size in sizes:
+        dates = parse_date_column([row[0] for row in sheet_rows(size)], "%d/%m/%Y")
+        label = f"{size // 1000}k"
+        benchmark(date_mask, dates, TODAY, name=f"date_filter.date_mask.on.{label}", ops=size)
+        benchmark(
+            date_mask, dates,
+            start=date(2025, 3, 1), end=date(2025, 5, 31),
+            name=f"date_filter.date_mask.range.{label}",
+            ops=size
+        )
@@ -0,0 +1,81 @@
+"""
+DateNormalizer.parse_date over a mixed corpus of sheet date cells
+"""
+
+import random
+
+from utils.date_normalizer import DateNormalizer
+
+def date_corpus(size: int = 5000, seed: int = 7) -> list:
+    """Realistic date cells: Indonesian, numeric and ISO formats plus misses"""
+    rng = random.Random(seed)
+    months = ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli",
+              "Agustus", "September", "Oktober", "November", "Desember"]
+    days = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+    misses = ["", "-", "n/a", "TBD", "Minggu ke-3", "libur", "32/13/2025", "??"]
+
+    corpus = []
+    for _ in range(size):
+        d, m, y = rng.randint(1, 28), rng.randint(1, 12), rng.choice([2024, 2025])
+        kind = rng.random()
+        if kind < 0.3:
+            corpus.append(f"{d}/{m}/{y}")
+        elif kind < 0.45:
+            corpus.append(f"{d:02d}-{m:02d}-{y}")
+        elif kind < 0.6:
+            corpus.append(f"{y}-{m:02d}-{d:02d}")
+        elif kind < 0.75:
+            corpus.append(f"{d} {months[m - 1]} {y}")
+        elif kind < 0.85:
+            corpus.append(f"{rng.choice(days)}, {d} {months[m - 1][:3]} {y}")
+        else:
+            corpus.append(rng.choice(misses))
+    return corpus
+
+def bench_parse_date(benchmark):
+    corpus = date_corpus()
+
+    def parse_all():
+        for value in corpus:
+            DateNormalizer.parse_date(value)
+
+    # Cold: every distinct string goes through the regex/dateutil path
+    benchmark(
+        parse_all,
+        name="date_normalizer.parse_date.cold",
+        ops=len(corpus),
+        setup=DateNormalizer._parse_cached.cache_clear
+    )
+    # Warm: the memo answers repeated cells, as in a real sheet column
+    DateNormalizer._parse_cached.cache_clear()
+    parse_all()
+    benchmark(parse_all, name="date_normalizer.parse_date.warm", ops=len(corpus))
+
+def bench_parse_date_misses(benchmark):
+    misses = ["", "-", "n/a", "TBD", "Minggu ke-3", "libur", "32/13/2025", "??"] * 50
+    benchmark(
+        lambda: [DateNormalizer.parse_date(value) for value in misses],
+        name="date_normalizer.parse_date.misses_cold",
+        ops=len(misses),
+        setup=DateNormalizer._parse_cached.cache_clear
+    )
+
+def bench_parse_many_with_format(benchmark):
+    # A single-format column with a few outliers, as detected per link
+    rng = random.Random(11)
+    months = ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli",
+              "Agustus", "September", "Oktober", "November", "Desember"]
+    column = [
+        f"{rng.randint(1, 28)} {months[rng.randint(0, 11)]} {rng.choice([2024, 2025])}"
+        if rng.random() < 0.95 else rng.choice(["-", "libur", "Senin, 3 Nov 2025"])
+        for _ in range(5000)
+    ]
+    for date_format in (None, "DD Bulan YYYY"):
+        benchmark(
+            DateNormalizer.parse_many,
+            column,
+            date_format,
+            name=f"date_normalizer.parse_many.{'with_format' if date_format else 'no_format'}_cold",
+            ops=len(column),
+            setup=DateNormalizer._parse_cached.cache_clear
+        )
@@ -0,0 +1,75 @@
+"""
+Spreadsheet link parsing and importing
+"""
+
+import asyncio
+import os
+import tempfile
+
+import httpx
+from fastapi import FastAPI
+
+from routers import links
+from routers.sheets import extract_spreadsheet_id
+from utils.auth import require_user_id
+from utils.database import AsyncDatabase, Database
+
+LINKS = [
+    "https://docs.google.com/spreadsheets/d/1BxiMVs0XRA5nFMdKvBdBZjgmUUqptlbs74OgvE2upms/edit#gid=0",
+    "https://docs.google.com/spreadsheets/d/1BxiMVs0XRA5nFMdKvBdBZjgmUUqptlbs74OgvE2upms/edit?usp=sharing",
+    "1BxiMVs0XRA5nFMdKvBdBZjgmUUqptlbs74OgvE2upms",
+] * 100
+
+def bench_extract_spreadsheet_id(benchmark):
+    benchmark(
+        lambda: [extract_spreadsheet_id(link) for link in LINKS],
+        name="links.extract_spreadsheet_id",
+        ops=len(LINKS)
+    )
+
+def bench_bulk_vs_loop(benchmark):
+    """Importing 100 links with one /bulk request vs 100 /add requests"""
+    if not benchmark.wants("links.import."):
+        return
+
+    count = 100
+    app = FastAPI()
+    app.include_router(links.router, prefix="/api/links")
+    app.dependency_overrides[require_user_id] = lambda: 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        db = Database(path)
+        db.init_db()
+        db.execute("INSERT INTO users (email, name) VALUES (?, ?)", ("bench@example.com", "Bench"))
+        database, links.database = links.database, AsyncDatabase(path)
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+        async def bulk():
+            items = [{"spreadsheet_link": f"sheet{i}", "sheet_name": "S"} for i in range(count)]
+            response = await client.post("/api/links/bulk", json=items)
+            assert response.json()["created"] == count
+
+        async def loop_add():
+            for i in range(count):
+                response = await client.post(
+                    "/api/links/add", params={"spreadsheet_link": f"sheet{i}", "sheet_name": "S"}
+                )
+                assert response.status_code == 200
+
+        def clear():
+            db.execute("DELETE FROM spreadsheet_links")
+
+        try:
+            for name, request in (("bulk", bulk), ("loop_add", loop_add)):
+                benchmark(
+                    lambda: loop.run_until_complete(request()),
+                    name=f"links.import.{name}.{count}",
+                    ops=count,
+                    setup=clear
+                )
+        finally:
+            loop.run_until_complete(client.aclose())
+            loop.close()
+            links.database = database
@@ -0,0 +1,45 @@
+"""
+JSON serialization of large sheet payloads
+"""
+
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from utils.responses import FastJSONResponse
+
+def sheet_payload(rows: int, columns: int = 12) -> dict:
+    """A /fetch response body with a realistic mix of cell values"""
+    headers = ["Tanggal"] + [f"Kolom {c}" for c in range(1, columns)]
+    data = [
+        [f"{r % 28 + 1}/11/2025"] + [f"nilai {r}-{c}" if c % 3 else str(r * c) for c in range(1, columns)]
+        for r in range(rows)
+    ]
+    return {
+        "success": True,
+        "spreadsheet_id": "1BxiMVs0XRA5nFMdKvBdBZjgmUUqptlbs74OgvE2upms",
+        "sheet_name": "Sheet1",
+        "today": "2025-11-03",
+        "headers": headers,
+        "data": data,
+        "count": len(data),
+    }
+
+def bench_json_serialization(benchmark):
+    for rows in (1_000, 50_000):
+        if not benchmark.wants(f"serialization.{rows}"):
+            continue
+        payload = sheet_payload(rows)
+        benchmark(json.dumps, payload, name=f"serialization.{rows}_rows.json_dumps", rounds=3)
+        # What FastAPI does for a plain dict return value before encoding
+        benchmark(
+            lambda: json.dumps(jsonable_encoder(payload)).encode(),
+            name=f"serialization.{rows}_rows.fastapi_default",
+            rounds=3
+        )
+        # Returned directly from the endpoint: no jsonable_encoder pass
+        benchmark(
+            FastJSONResponse, payload,
+            name=f"serialization.{rows}_rows.fast_json_response",
+            rounds=3
+        )
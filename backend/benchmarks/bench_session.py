@@ -0,0 +1,66 @@
+"""
+SessionManager create/get with large session populations
+"""
+
+import asyncio
+import random
+
+from config.settings import settings
+from utils.session import SessionManager
+from utils.ttl_store import TTLStore
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+def bench_session_manager(benchmark):
+    sizes = SIZES[:-1] if benchmark.quick else SIZES
+    # Filling the largest population takes longer than the default cache TTL
+    cache_ttl = settings.SESSION_CACHE_TTL_SECONDS
+    settings.SESSION_CACHE_TTL_SECONDS = 3600
+    try:
+        for size in sizes:
+            if benchmark.wants(f"session_manager.{size}."):
+                _bench_population(benchmark, size)
+    finally:
+        settings.SESSION_CACHE_TTL_SECONDS = cache_ttl
+
+def _bench_population(benchmark, size: int):
+    """Time create and cached get with `size` live sessions"""
+    # Each instance gets its own store and write queue sized for the test
+    manager = SessionManager()
+    manager._sessions = TTLStore(max_size=size * 2, default_ttl=3600)
+    manager._pending = []
+    session_ids = [
+        manager.create_session(n, f"user{n}@example.com", "token")
+        for n in range(size)
+    ]
+    manager._pending.clear()
+    created = []
+
+    def create():
+        for n in range(1000):
+            created.append(manager.create_session(n, "new@example.com", "token"))
+
+    def reset():
+        # Keep the population and the write queue at the benchmark size
+        for session_id in created:
+            manager._sessions.pop(session_id)
+        created.clear()
+        manager._pending.clear()
+
+    sample = random.Random(size).sample(session_ids, 1000)
+
+    async def get_all():
+        for session_id in sample:
+            await manager.get_session(session_id)
+
+    loop = asyncio.new_event_loop()
+    try:
+        benchmark(create, name=f"session_manager.{size}.create", ops=1000, setup=reset)
+        reset()
+        benchmark(
+            lambda: loop.run_until_complete(get_all()),
+            name=f"session_manager.{size}.get_cached",
+            ops=1000
+        )
+    finally:
+        loop.close()
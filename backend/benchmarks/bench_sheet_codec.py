@@ -0,0 +1,72 @@
+"""
+Cached sheet blobs: encoded size and encode/decode time, codec vs plain JSON
+"""
+
+import json
+import zlib
+
+from benchmarks.bench_serialization import sheet_payload
+from utils import sheet_codec
+
+SIZES = (10_000, 100_000)
+
+def sheet_values(rows: int) -> list:
+    """Sheet values, header row first, as the cache stores them"""
+    payload = sheet_payload(rows)
+    return [payload["headers"]] + payload["data"]
+
+def _record_size(result, blob: bytes, raw_bytes: int):
+    """Attach a blob's size to its result and print it next to the timing"""
+    if result is None:
+        return
+    result["bytes"] = len(blob)
+    print(f"{'':<48} {len(blob) / 1024:>10.1f} KiB  ({len(blob) / raw_bytes:.1%} of JSON)")
+
+def bench_sheet_codec(benchmark):
+    sizes = SIZES[:-1] if benchmark.quick else SIZES
+    codecs = ["zlib"] + (["zstd"] if sheet_codec.zstandard is not None else [])
+    for size in sizes:
+        label = f"sheet_codec.{size // 1000}k"
+        if not benchmark.wants(label):
+            continue
+        values = sheet_values(size)
+        text = json.dumps(values).encode()
+
+        # What the cache stored before the codec: JSON text, optionally deflated
+        result = benchmark(json.dumps, values, name=f"{label}.json.encode", rounds=3)
+        _record_size(result, text, len(text))
+        result = benchmark(json.loads, text, name=f"{label}.json.decode", rounds=3)
+        deflated = zlib.compress(text, 6)
+        result = benchmark(
+            lambda: json.loads(zlib.decompress(deflated)),
+            name=f"{label}.json_zlib.decode",
+            rounds=3
+        )
+        _record_size(result, deflated, len(text))
+
+        for codec in codecs:
+            blob = sheet_codec.encode(values, codec=codec)
+            result = benchmark(
+                sheet_codec.encode, values, codec=codec,
+                name=f"{label}.{codec}.encode",
+                rounds=3
+            )
+            _record_size(result, blob, len(text))
+            benchmark(sheet_codec.decode, blob, name=f"{label}.{codec}.decode", rounds=3)
+            # The date column alone, as schema detection and filtering read it
+            benchmark(
+                sheet_codec.decode, blob, columns=[0],
+                name=f"{label}.{codec}.decode_one_column",
+                rounds=3
+            )
+            # One page of rows from the middle of the sheet
+            benchmark(
+                sheet_codec.decode, blob, rows=(size // 2, size // 2 + 100),
+                name=f"{label}.{codec}.decode_100_rows",
+                rounds=3
+            )
+            benchmark(
+                lambda: sum(len(group) for group in sheet_codec.iter_row_groups(blob)),
+                name=f"{label}.{codec}.iter_row_groups",
+                rounds=3
+            )
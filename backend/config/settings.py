@@ -32,16 +32,76 @@ class Settings:
     GOOGLE_CLIENT_ID: str = os.getenv("GOOGLE_CLIENT_ID", "")
     GOOGLE_CLIENT_SECRET: str = os.getenv("GOOGLE_CLIENT_SECRET", "")
     GOOGLE_REDIRECT_URI: str = os.getenv("GOOGLE_REDIRECT_URI", "http://localhost:8000/api/auth/callback")
+    GOOGLE_TOKEN_URL: str = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+    GOOGLE_USERINFO_URL: str = os.getenv(
+        "GOOGLE_USERINFO_URL",
+        "https://www.googleapis.com/oauth2/v1/userinfo"
+    )
     
     # Allowed email domain
     ALLOWED_EMAIL_DOMAIN: str = "student.itera.ac.id"
     
     # Google Sheets API
     GOOGLE_SHEETS_API_KEY: str = os.getenv("GOOGLE_SHEETS_API_KEY", "")
+    GOOGLE_SHEETS_API_URL: str = os.getenv(
+        "GOOGLE_SHEETS_API_URL",
+        "https://sheets.googleapis.com/v4/spreadsheets"
+    )
+    
+    GOOGLE_DRIVE_API_URL: str = os.getenv(
+        "GOOGLE_DRIVE_API_URL",
+        "https://www.googleapis.com/drive/v3/files"
+    )
+    
+    # Sheet data cache
+    SHEET_CACHE_TTL_SECONDS: int = int(os.getenv("SHEET_CACHE_TTL_SECONDS", 300))
+    # Upper bound for a link's own cache_ttl_seconds
+    SHEET_CACHE_MAX_TTL_SECONDS: int = int(os.getenv("SHEET_CACHE_MAX_TTL_SECONDS", 86400))
+    SHEET_CACHE_MAX_BYTES: int = int(os.getenv("SHEET_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    SYNC_BLOCK_ROWS: int = int(os.getenv("SYNC_BLOCK_ROWS", 500))
+    SYNC_FULL_EVERY: int = int(os.getenv("SYNC_FULL_EVERY", 50))
+    
+    # Morning prefetch of active links (local time window, HH:MM)
+    PREFETCH_ENABLED: bool = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+    PREFETCH_WINDOW_START: str = os.getenv("PREFETCH_WINDOW_START", "06:30")
+    PREFETCH_WINDOW_END: str = os.getenv("PREFETCH_WINDOW_END", "09:00")
+    PREFETCH_INTERVAL_SECONDS: int = int(os.getenv("PREFETCH_INTERVAL_SECONDS", 240))
+    PREFETCH_CONCURRENCY: int = int(os.getenv("PREFETCH_CONCURRENCY", 4))
+    PREFETCH_JITTER_SECONDS: float = float(os.getenv("PREFETCH_JITTER_SECONDS", 20))
+    PREFETCH_BUDGET_SECONDS: int = int(os.getenv("PREFETCH_BUDGET_SECONDS", 180))
+    PREFETCH_MAX_LINKS: int = int(os.getenv("PREFETCH_MAX_LINKS", 500))
+    
+    # Link management
+    LINKS_BULK_MAX_ITEMS: int = int(os.getenv("LINKS_BULK_MAX_ITEMS", 1000))
+    LINKS_PAGE_SIZE: int = int(os.getenv("LINKS_PAGE_SIZE", 50))
+    LINKS_MAX_PAGE_SIZE: int = int(os.getenv("LINKS_MAX_PAGE_SIZE", 500))
+    
+    # Outbound HTTP
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", 10))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+    
+    # Google API quota (requests per second; bursts spend saved-up tokens)
+    GOOGLE_RATE_PER_SECOND: float = float(os.getenv("GOOGLE_RATE_PER_SECOND", 5))
+    GOOGLE_RATE_BURST: float = float(os.getenv("GOOGLE_RATE_BURST", 60))
+    GOOGLE_USER_RATE_PER_SECOND: float = float(os.getenv("GOOGLE_USER_RATE_PER_SECOND", 1))
+    GOOGLE_USER_RATE_BURST: float = float(os.getenv("GOOGLE_USER_RATE_BURST", 20))
+    GOOGLE_MAX_RETRIES: int = int(os.getenv("GOOGLE_MAX_RETRIES", 4))
+    GOOGLE_BACKOFF_BASE_SECONDS: float = float(os.getenv("GOOGLE_BACKOFF_BASE_SECONDS", 0.5))
+    GOOGLE_BACKOFF_MAX_SECONDS: float = float(os.getenv("GOOGLE_BACKOFF_MAX_SECONDS", 8))
+    GOOGLE_MAX_QUEUE_WAIT_SECONDS: float = float(os.getenv("GOOGLE_MAX_QUEUE_WAIT_SECONDS", 20))
     
     # Session
     SESSION_SECRET_KEY: str = os.getenv("SESSION_SECRET_KEY", "your-secret-key-change-in-production")
     SESSION_TIMEOUT_MINUTES: int = int(os.getenv("SESSION_TIMEOUT_MINUTES", 30))
+    SESSION_MAX_ENTRIES: int = int(os.getenv("SESSION_MAX_ENTRIES", 100000))
+    # Also how long a logged-out session can stay valid on other workers
+    SESSION_CACHE_TTL_SECONDS: int = int(os.getenv("SESSION_CACHE_TTL_SECONDS", 15))
+    SESSION_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", 0.5))
+    PROFILE_CACHE_MAX_ENTRIES: int = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", 10000))
+    PROFILE_CACHE_TTL_SECONDS: int = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", 60))
+    OAUTH_STATE_TTL_SECONDS: int = int(os.getenv("OAUTH_STATE_TTL_SECONDS", 600))
+    SWEEP_INTERVAL_SECONDS: int = int(os.getenv("SWEEP_INTERVAL_SECONDS", 60))
     
     # CORS
     CORS_ORIGINS: list = [
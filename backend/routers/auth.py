@@ -2,28 +2,25 @@
 Authentication routes
 """
 
-from fastapi import APIRouter, HTTPException, status, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.responses import RedirectResponse
-import secrets
-from typing import Optional
+from typing import Optional, Dict
 
 from utils.google_oauth import GoogleOAuthHandler
-from utils.session import SessionManager
-from utils.database import Database
+from utils import queries
+from utils.auth import session_manager, profile_cache, require_user
+from utils.database import AsyncDatabase
 from config.settings import settings
 
 router = APIRouter()
-session_manager = SessionManager()
-database = Database()
-
-# Store states for CSRF protection
-_states = {}
+database = AsyncDatabase()
 
 @router.get("/login")
 async def login():
     """Initiate Google OAuth login"""
-    state = secrets.token_urlsafe(32)
-    _states[state] = True
+    # Store state for CSRF protection (shared by all workers, expires unused)
+    state = session_manager.create_state()
+    await session_manager.flush()
     
     auth_url = GoogleOAuthHandler.get_authorization_url(state)
     return {"url": auth_url}
@@ -32,17 +29,15 @@ async def login():
 async def callback(code: str, state: str, response: Response):
     """Google OAuth callback"""
     
-    # Verify state
-    if state not in _states:
+    # Verify state (single use)
+    if not await session_manager.consume_state(state):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid state parameter"
         )
     
-    del _states[state]
-    
     # Exchange code for token
-    token_data = GoogleOAuthHandler.exchange_code_for_token(code)
+    token_data = await GoogleOAuthHandler.exchange_code_for_token(code)
     if not token_data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -50,7 +45,10 @@ async def callback(code: str, state: str, response: Response):
         )
     
     # Get user info
-    user_info = GoogleOAuthHandler.get_user_info(token_data.get("access_token"))
+    user_info = await GoogleOAuthHandler.get_user_info(
+        token_data.get("access_token"),
+        user=GoogleOAuthHandler.id_token_email(token_data)
+    )
     if not user_info:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -62,34 +60,18 @@ async def callback(code: str, state: str, response: Response):
     if not GoogleOAuthHandler.validate_email_domain(email):
         return RedirectResponse(url="/error?reason=invalid_domain", status_code=302)
     
-    # Get or create user
-    existing_user = database.fetch_one(
-        "SELECT id FROM users WHERE email = ?",
-        (email,)
-    )
-    
-    if existing_user:
-        user_id = existing_user["id"]
-    else:
-        # Create new user
-        database.execute(
-            """
-            INSERT INTO users (email, name, picture, google_id)
-            VALUES (?, ?, ?, ?)
-            """,
-            (
-                email,
-                user_info.get("name", ""),
-                user_info.get("picture", ""),
-                user_info.get("id", ""),
-            )
+    # Create the user, or refresh their profile from Google
+    (user,) = await database.execute(
+        queries.UPSERT_USER,
+        (
+            email,
+            user_info.get("name", ""),
+            user_info.get("picture", ""),
+            user_info.get("id", ""),
         )
-        
-        user = database.fetch_one(
-            "SELECT id FROM users WHERE email = ?",
-            (email,)
-        )
-        user_id = user["id"]
+    )
+    user_id = user["id"]
+    profile_cache.invalidate(user_id)
     
     # Create session
     session_id = session_manager.create_session(
@@ -99,6 +81,7 @@ async def callback(code: str, state: str, response: Response):
         refresh_token=token_data.get("refresh_token"),
         expires_in=token_data.get("expires_in", 3600)
     )
+    await session_manager.flush()
     
     # Set session cookie
     response = RedirectResponse(url="/dashboard", status_code=302)
@@ -118,7 +101,7 @@ async def logout(request: Request, response: Response):
     session_id = request.cookies.get("session_id")
     
     if session_id:
-        session_manager.delete_session(session_id)
+        await session_manager.delete_session(session_id)
     
     response = RedirectResponse(url="/", status_code=302)
     response.delete_cookie("session_id")
@@ -126,26 +109,14 @@ async def logout(request: Request, response: Response):
     return response
 
 @router.get("/me")
-async def get_current_user(request: Request):
+async def get_current_user(user: Optional[Dict] = Depends(require_user)):
     """Get current user information"""
-    session_id = request.cookies.get("session_id")
-    
-    if not session_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-    
-    session = session_manager.get_session(session_id)
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Session expired"
-        )
-    
-    user = database.fetch_one(
-        "SELECT id, email, name, picture FROM users WHERE id = ?",
-        (session["user_id"],)
-    )
-    
     return user
+
+@router.get("/stats")
+async def get_auth_stats():
+    """Get cached session/profile counts and queued session writes"""
+    return {
+        "sessions": session_manager.stats(),
+        "profiles": profile_cache.stats()
+    }
@@ -2,59 +2,70 @@
 Spreadsheet links management routes
 """
 
-from fastapi import APIRouter, HTTPException, Request, status
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
 
-from utils.session import SessionManager
-from utils.database import Database
+from utils import queries
+from utils.auth import require_user_id
+from utils.conditional import make_etag, etag_matches, http_date, validators, not_modified
+from utils.database import AsyncDatabase
+from utils.pagination import decode_cursor, select_columns, paginate, paginate_columnar
+from utils.responses import FastJSONResponse
+from utils.sheet_cache import sheet_cache
+from config.settings import settings
 
 router = APIRouter()
-session_manager = SessionManager()
-database = Database()
+database = AsyncDatabase()
 
-def get_current_user_id(request: Request) -> int:
-    """Get current user ID from session"""
-    session_id = request.cookies.get("session_id")
-    
-    if not session_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-    
-    session = session_manager.get_session(session_id)
-    if not session:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Session expired"
-        )
-    
-    return session["user_id"]
+class LinkItem(BaseModel):
+    """One link in a bulk import"""
+    spreadsheet_link: str
+    sheet_name: str = "Sheet1"
+    name: str = ""
+
+LINK_FIELDS = (
+    "id", "user_id", "spreadsheet_id", "spreadsheet_name", "sheet_name",
+    "link", "is_active", "created_at", "updated_at"
+)
+HISTORY_FIELDS = ("id", "link_id", "action", "old_value", "new_value", "timestamp")
+
+# Sort keys for keyset pagination (newest first)
+LINK_KEYS = ("updated_at", "id")
+HISTORY_KEYS = ("timestamp", "id")
+# Cursor value types of both: a timestamp string, then a row id
+KEY_TYPES = (str, int)
+
+# format=columnar sends column names once, then row arrays
+RESPONSE_FORMATS = ("objects", "columnar")
+
+# Rows per INSERT statement (5 parameters each, under SQLite's 999-variable limit)
+BULK_INSERT_CHUNK = 150
+
+def check_format(format: str):
+    """Validate a format= parameter"""
+    if format not in RESPONSE_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(RESPONSE_FORMATS)}")
 
 @router.post("/add")
 async def add_spreadsheet_link(
-    request: Request,
     spreadsheet_link: str,
     sheet_name: str = "Sheet1",
-    name: str = ""
+    name: str = "",
+    user_id: int = Depends(require_user_id)
 ):
     """Add new spreadsheet link"""
     
-    user_id = get_current_user_id(request)
-    
     try:
         # Extract spreadsheet ID
         from routers.sheets import extract_spreadsheet_id
         spreadsheet_id = extract_spreadsheet_id(spreadsheet_link)
         
         # Check if link already exists
-        existing = database.fetch_one(
-            """
-            SELECT id FROM spreadsheet_links
-            WHERE user_id = ? AND spreadsheet_id = ? AND sheet_name = ?
-            """,
+        existing = await database.fetch_one(
+            queries.LINK_ID_BY_SHEET,
             (user_id, spreadsheet_id, sheet_name)
         )
         
@@ -65,22 +76,14 @@ async def add_spreadsheet_link(
             )
         
         # Add link
-        database.execute(
-            """
-            INSERT INTO spreadsheet_links
-            (user_id, spreadsheet_id, spreadsheet_name, sheet_name, link)
-            VALUES (?, ?, ?, ?, ?)
-            """,
+        await database.execute(
+            queries.INSERT_LINK,
             (user_id, spreadsheet_id, name or sheet_name, sheet_name, spreadsheet_link)
         )
         
         # Get the newly created link
-        link = database.fetch_one(
-            """
-            SELECT * FROM spreadsheet_links
-            WHERE user_id = ? AND spreadsheet_id = ? AND sheet_name = ?
-            ORDER BY created_at DESC LIMIT 1
-            """,
+        link = await database.fetch_one(
+            queries.NEWEST_LINK,
             (user_id, spreadsheet_id, sheet_name)
         )
         
@@ -98,27 +101,140 @@ async def add_spreadsheet_link(
             detail=f"Error adding link: {str(e)}"
         )
 
+@router.post("/bulk")
+async def bulk_add_spreadsheet_links(
+    items: List[LinkItem],
+    user_id: int = Depends(require_user_id)
+):
+    """Add many spreadsheet links in one transaction"""
+    
+    if len(items) > settings.LINKS_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.LINKS_BULK_MAX_ITEMS} links per request"
+        )
+    
+    try:
+        from routers.sheets import extract_spreadsheet_id
+        
+        results: List[Dict[str, Any]] = []
+        pending: Dict[tuple, int] = {}
+        rows = []
+        for index, item in enumerate(items):
+            try:
+                spreadsheet_id = extract_spreadsheet_id(item.spreadsheet_link)
+            except ValueError as e:
+                results.append({"index": index, "status": "invalid", "error": str(e)})
+                continue
+            
+            key = (spreadsheet_id, item.sheet_name)
+            if key in pending:
+                results.append({"index": index, "status": "duplicate", "duplicate_of": pending[key]})
+                continue
+            
+            pending[key] = index
+            results.append({"index": index, "status": "pending"})
+            rows.append((
+                user_id, spreadsheet_id, item.name or item.sheet_name,
+                item.sheet_name, item.spreadsheet_link
+            ))
+        
+        # Existing links make ON CONFLICT skip the row, so RETURNING only yields new ones
+        statements = []
+        for start in range(0, len(rows), BULK_INSERT_CHUNK):
+            chunk = rows[start:start + BULK_INSERT_CHUNK]
+            statements.append((
+                queries.bulk_insert_links(len(chunk)),
+                tuple(value for row in chunk for value in row)
+            ))
+        
+        created = await database.execute_batch(statements) if statements else []
+        for link in (link for batch in created for link in batch):
+            result = results[pending.pop((link["spreadsheet_id"], link["sheet_name"]))]
+            result["status"] = "created"
+            result["link"] = link
+        
+        for index in pending.values():
+            results[index]["status"] = "duplicate"
+        
+        counts = {"created": 0, "duplicate": 0, "invalid": 0}
+        for result in results:
+            counts[result["status"]] += 1
+        
+        return {
+            "success": True,
+            "results": results,
+            **counts
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error adding links: {str(e)}"
+        )
+
 @router.get("/list")
-async def list_spreadsheet_links(request: Request):
-    """List all spreadsheet links for current user"""
+async def list_spreadsheet_links(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LINKS_PAGE_SIZE, ge=1, le=settings.LINKS_MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    format: str = "objects",
+    if_none_match: Optional[str] = Header(None),
+    user_id: int = Depends(require_user_id)
+):
+    """
+    List spreadsheet links for current user, newest first, one page at a time
+    Responses carry an ETag; a matching If-None-Match gets an empty 304.
+    """
     
-    user_id = get_current_user_id(request)
+    try:
+        check_format(format)
+        columns, output = select_columns(fields, LINK_FIELDS, LINK_KEYS)
+        after = decode_cursor(cursor, KEY_TYPES) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     try:
-        links = database.fetch_all(
-            """
-            SELECT * FROM spreadsheet_links
-            WHERE user_id = ? AND is_active = 1
-            ORDER BY updated_at DESC
-            """,
-            (user_id,)
+        # Every write bumps updated_at or adds a row, so this index-only
+        # aggregate changes whenever any page could
+        version = await database.fetch_one(queries.LINKS_VERSION, (user_id,))
+        etag = make_etag(
+            user_id, version["updated_at"], version["total"], version["max_id"],
+            version["active"], cursor, limit, ",".join(output), format
         )
+        last_modified = http_date(version["updated_at"])
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, last_modified)
         
-        return {
+        query = queries.links_page(columns, after is not None)
+        params = (user_id, *(after or ()), limit + 1)
+        
+        if format == "columnar":
+            names, rows = await database.fetch_rows(query, params)
+            rows, next_cursor = paginate_columnar(names, rows, limit, LINK_KEYS, output)
+            return FastJSONResponse({
+                "success": True,
+                "columns": output,
+                "rows": rows,
+                "count": len(rows),
+                "next_cursor": next_cursor
+            }, headers=validators(etag, last_modified))
+        
+        links, next_cursor = paginate(
+            await database.fetch_all(query, params), limit, LINK_KEYS, output
+        )
+        
+        return FastJSONResponse({
             "success": True,
             "links": links,
-            "count": len(links)
-        }
+            "count": len(links),
+            "next_cursor": next_cursor
+        }, headers=validators(etag, last_modified))
         
     except Exception as e:
         raise HTTPException(
@@ -127,15 +243,13 @@ async def list_spreadsheet_links(request: Request):
         )
 
 @router.delete("/delete/{link_id}")
-async def delete_spreadsheet_link(request: Request, link_id: int):
+async def delete_spreadsheet_link(link_id: int, user_id: int = Depends(require_user_id)):
     """Delete spreadsheet link"""
     
-    user_id = get_current_user_id(request)
-    
     try:
         # Verify ownership
-        link = database.fetch_one(
-            "SELECT * FROM spreadsheet_links WHERE id = ? AND user_id = ?",
+        link = await database.fetch_one(
+            queries.OWNED_LINK,
             (link_id, user_id)
         )
         
@@ -146,20 +260,19 @@ async def delete_spreadsheet_link(request: Request, link_id: int):
             )
         
         # Soft delete
-        database.execute(
-            "UPDATE spreadsheet_links SET is_active = 0 WHERE id = ?",
+        await database.execute(
+            queries.SOFT_DELETE_LINK,
             (link_id,)
         )
         
         # Record in history
-        database.execute(
-            """
-            INSERT INTO link_history (link_id, action, old_value, new_value)
-            VALUES (?, ?, ?, ?)
-            """,
+        await database.execute(
+            queries.INSERT_LINK_HISTORY,
             (link_id, "deleted", link["link"], None)
         )
         
+        await sheet_cache.invalidate(link_id)
+        
         return {
             "success": True,
             "message": "Link deleted successfully"
@@ -173,16 +286,80 @@ async def delete_spreadsheet_link(request: Request, link_id: int):
             detail=f"Error deleting link: {str(e)}"
         )
 
+@router.put("/ttl/{link_id}")
+async def set_link_cache_ttl(
+    link_id: int,
+    ttl_seconds: Optional[int] = Query(None, ge=0, le=settings.SHEET_CACHE_MAX_TTL_SECONDS),
+    user_id: int = Depends(require_user_id)
+):
+    """Set how long a link's cached values stay fresh (omit ttl_seconds for the default)"""
+    
+    try:
+        # Verify ownership
+        link = await database.fetch_one(
+            queries.OWNED_LINK,
+            (link_id, user_id)
+        )
+        
+        if not link:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Link not found"
+            )
+        
+        old_ttl = link["cache_ttl_seconds"]
+        await database.execute_batch([
+            (queries.SET_LINK_TTL, (ttl_seconds, link_id)),
+            (
+                queries.INSERT_LINK_HISTORY,
+                (
+                    link_id, "ttl_changed",
+                    None if old_ttl is None else str(old_ttl),
+                    None if ttl_seconds is None else str(ttl_seconds)
+                )
+            ),
+        ])
+        
+        return {
+            "success": True,
+            "link_id": link_id,
+            "cache_ttl_seconds": ttl_seconds,
+            "message": "Cache lifetime updated"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating cache lifetime: {str(e)}"
+        )
+
 @router.get("/history/{link_id}")
-async def get_link_history(request: Request, link_id: int):
-    """Get history of changes for a link"""
+async def get_link_history(
+    link_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.LINKS_PAGE_SIZE, ge=1, le=settings.LINKS_MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    format: str = "objects",
+    user_id: int = Depends(require_user_id)
+):
+    """Get history of changes for a link, newest first, one page at a time"""
     
-    user_id = get_current_user_id(request)
+    try:
+        check_format(format)
+        columns, output = select_columns(fields, HISTORY_FIELDS, HISTORY_KEYS)
+        after = decode_cursor(cursor, KEY_TYPES) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     try:
         # Verify ownership
-        link = database.fetch_one(
-            "SELECT * FROM spreadsheet_links WHERE id = ? AND user_id = ?",
+        link = await database.fetch_one(
+            queries.OWNED_LINK_ID,
             (link_id, user_id)
         )
         
@@ -192,20 +369,31 @@ async def get_link_history(request: Request, link_id: int):
                 detail="Link not found"
             )
         
-        history = database.fetch_all(
-            """
-            SELECT * FROM link_history
-            WHERE link_id = ?
-            ORDER BY timestamp DESC
-            """,
-            (link_id,)
+        query = queries.history_page(columns, after is not None)
+        params = (link_id, *(after or ()), limit + 1)
+        
+        if format == "columnar":
+            names, rows = await database.fetch_rows(query, params)
+            rows, next_cursor = paginate_columnar(names, rows, limit, HISTORY_KEYS, output)
+            return FastJSONResponse({
+                "success": True,
+                "link_id": link_id,
+                "columns": output,
+                "rows": rows,
+                "count": len(rows),
+                "next_cursor": next_cursor
+            })
+        
+        history, next_cursor = paginate(
+            await database.fetch_all(query, params), limit, HISTORY_KEYS, output
         )
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "link_id": link_id,
-            "history": history
-        }
+            "history": history,
+            "next_cursor": next_cursor
+        })
         
     except HTTPException:
         raise
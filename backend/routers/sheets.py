@@ -2,93 +2,36 @@
 Google Sheets data routes
 """
 
-from fastapi import APIRouter, HTTPException, Request, status
-from typing import List, Dict, Any
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Iterator
+import asyncio
+import csv
+import io
+import itertools
+import json
 import re
-from datetime import datetime
-from dateutil import parser as date_parser
-import locale
+from datetime import datetime, date
 
-from utils.session import SessionManager
-from utils.database import Database
+from utils import queries
+from utils.auth import require_session
+from utils.database import AsyncDatabase
+from utils.date_normalizer import DateNormalizer
+from utils.date_filter import filter_rows
+from utils.google_sheets import sheets_client, sheet_range, SheetsAPIError
+from utils.sheet_cache import sheet_cache, iter_chunks, content_tag
+from utils.conditional import make_etag, etag_matches, http_date, validators, not_modified
+from utils.sheet_codec import ROW_GROUP_SIZE
+from utils.prefetch import prefetcher
+from utils.responses import FastJSONResponse
+from utils.singleflight import SingleFlight
+from utils.sheet_schema import resolve_schema, save_link_schema
+from utils.rate_limit import google_scheduler
 from config.settings import settings
 
 router = APIRouter()
-session_manager = SessionManager()
-database = Database()
-
-class DateNormalizer:
-    """Normalize various date formats"""
-    
-    # Supported Indonesian month names
-    INDONESIAN_MONTHS = {
-        'januari': 1, 'februari': 2, 'maret': 3, 'april': 4,
-        'mei': 5, 'juni': 6, 'juli': 7, 'agustus': 8,
-        'september': 9, 'oktober': 10, 'november': 11, 'desember': 12,
-        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'mei': 5, 'jun': 6,
-        'jul': 7, 'ags': 8, 'sep': 9, 'okt': 10, 'nov': 11, 'des': 12,
-    }
-    
-    INDONESIAN_DAYS = {
-        'senin': 0, 'selasa': 1, 'rabu': 2, 'kamis': 3,
-        'jumat': 4, 'sabtu': 5, 'minggu': 6,
-        'sen': 0, 'sel': 1, 'rab': 2, 'kam': 3,
-        'jum': 4, 'sab': 5, 'min': 6,
-    }
-    
-    @staticmethod
-    def parse_date(date_str: str) -> datetime:
-        """
-        Parse various date formats robustly
-        Supports: 17/11/2025, 2025-11-17, 17 November 2025, Senin, 17 Nov 2025, etc.
-        """
-        if not date_str or not isinstance(date_str, str):
-            return None
-        
-        date_str = date_str.strip().lower()
-        
-        try:
-            # Try standard parsing first
-            return datetime.strptime(date_str, "%d/%m/%Y").date()
-        except ValueError:
-            pass
-        
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%d").date()
-        except ValueError:
-            pass
-        
-        # Handle Indonesian date formats
-        # Format: "17 November 2025" or "17 Nov 2025"
-        for month_name, month_num in DateNormalizer.INDONESIAN_MONTHS.items():
-            if month_name in date_str:
-                # Extract day and year
-                parts = date_str.split()
-                if len(parts) >= 3:
-                    try:
-                        day = int(parts[0])
-                        year = int(parts[-1])
-                        return datetime(year, month_num, day).date()
-                    except (ValueError, IndexError):
-                        pass
-        
-        # If string starts with day name, try to extract date part
-        for day_name in DateNormalizer.INDONESIAN_DAYS.keys():
-            if date_str.startswith(day_name):
-                parts = date_str.split(',')
-                if len(parts) > 1:
-                    try:
-                        return DateNormalizer.parse_date(parts[1].strip())
-                    except:
-                        pass
-        
-        # Last resort: use dateutil parser
-        try:
-            return date_parser.parse(date_str).date()
-        except:
-            return None
+database = AsyncDatabase()
+sheet_fetches = SingleFlight("sheets.fetch")
 
 def extract_spreadsheet_id(url: str) -> str:
     """Extract spreadsheet ID from Google Sheets URL"""
@@ -103,52 +46,341 @@ def extract_spreadsheet_id(url: str) -> str:
     
     raise ValueError("Invalid Google Sheets URL")
 
+def filter_sheet_rows(
+    rows: List[List[Any]],
+    date_column: int,
+    today: date,
+    on_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    date_format: Optional[str] = None
+):
+    """Split off the header row and filter the rest by date"""
+    if not rows:
+        return [], []
+    
+    headers, body = rows[0], rows[1:]
+    
+    # Filter rows by date in one vectorized pass
+    data = filter_rows(
+        body, date_column, date_format=date_format,
+        **date_filter(today, on_date, start_date, end_date)
+    )
+    
+    return headers, data
+
+def date_filter(
+    today: date,
+    on_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Dict[str, Optional[date]]:
+    """Resolve the request's date filter into filter_rows arguments"""
+    if start_date or end_date:
+        return {
+            "start": date.fromisoformat(start_date) if start_date else None,
+            "end": date.fromisoformat(end_date) if end_date else None
+        }
+    return {"on": date.fromisoformat(on_date) if on_date else today}
+
+def sheets_http_error(error: SheetsAPIError) -> HTTPException:
+    """Map a Sheets API error to an HTTP error for the client"""
+    if error.status_code in (401, 403, 404):
+        status_code = error.status_code
+    else:
+        status_code = status.HTTP_502_BAD_GATEWAY
+    return HTTPException(
+        status_code=status_code,
+        detail=f"Google Sheets error: {error.message}"
+    )
+
 @router.post("/fetch")
 async def fetch_sheet_data(
-    request: Request,
     spreadsheet_link: str,
-    sheet_name: str = "Sheet1"
+    sheet_name: str = "Sheet1",
+    date_column: Optional[int] = None,
+    on_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    refresh: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    session: Dict[str, Any] = Depends(require_session)
 ):
     """
     Fetch and filter spreadsheet data by today's date
+    Pass on_date, or start_date/end_date (YYYY-MM-DD), to filter other dates.
+    Without date_column the sheet's date column and format are detected
+    (and remembered for saved links).
+    Saved links are served through the sheet cache; refresh bypasses it.
+    Responses carry an ETag; a matching If-None-Match gets an empty 304.
+    Concurrent requests for the same sheet version share one upstream read.
     """
     
-    # Verify authentication
-    session_id = request.cookies.get("session_id")
-    if not session_id:
+    try:
+        # Extract spreadsheet ID
+        spreadsheet_id = extract_spreadsheet_id(spreadsheet_link)
+        
+        link = await database.fetch_one(
+            queries.ACTIVE_LINK,
+            (session["user_id"], spreadsheet_id, sheet_name)
+        )
+        
+        today = datetime.now().date()
+        
+        async def load() -> Dict[str, Any]:
+            if link:
+                entry = await sheet_cache.get_entry(
+                    link["id"],
+                    spreadsheet_id,
+                    sheet_range(sheet_name),
+                    session["access_token"],
+                    refresh=refresh,
+                    ttl=link["cache_ttl_seconds"],
+                    user=str(session["user_id"])
+                )
+                rows, tag, last_modified = entry.values, entry.tag, http_date(entry.version)
+            else:
+                rows = await sheet_cache.fetch_values(
+                    spreadsheet_id,
+                    sheet_range(sheet_name),
+                    session["access_token"],
+                    user=str(session["user_id"])
+                )
+                tag, last_modified = content_tag(rows), None
+            
+            column, date_format, changed = resolve_schema(
+                rows,
+                link["date_column"] if link else None,
+                link["date_format"] if link else None,
+                date_column
+            )
+            if changed and link:
+                await save_link_schema(database, link["id"], column, date_format)
+            
+            # The body depends on the values, the filter and (by default) today
+            etag = make_etag(
+                tag, spreadsheet_id, sheet_name, column, date_format,
+                on_date, start_date, end_date, today
+            )
+            return {
+                "rows": rows,
+                "etag": etag,
+                "last_modified": last_modified,
+                "date_column": column,
+                "date_format": date_format
+            }
+        
+        # A user's concurrent identical requests share one load and one
+        # filter pass. Different users' requests for the same sheet share
+        # the upstream read in the sheet cache, each after its own access
+        # check, so this key (and the link and schema in it) stays per user
+        key = (
+            session["user_id"], spreadsheet_id, sheet_name, date_column,
+            on_date, start_date, end_date, today, refresh
+        )
+        result, _ = await sheet_fetches.do(key, load)
+        
+        etag, last_modified = result["etag"], result["last_modified"]
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, last_modified)
+        
+        # The first caller to get here starts the filter pass in a worker
+        # thread; callers sharing the result await the same pass
+        filtered = result.get("filtered")
+        if filtered is None:
+            filtered = result["filtered"] = asyncio.ensure_future(asyncio.to_thread(
+                filter_sheet_rows,
+                result["rows"], result["date_column"], today,
+                on_date, start_date, end_date, result["date_format"]
+            ))
+        headers, data = await asyncio.shield(filtered)
+        
+        return FastJSONResponse({
+            "success": True,
+            "spreadsheet_id": spreadsheet_id,
+            "sheet_name": sheet_name,
+            "today": str(today),
+            "date_column": result["date_column"],
+            "date_format": result["date_format"],
+            "headers": headers,
+            "data": data,
+            "count": len(data)
+        }, headers=validators(etag, last_modified))
+        
+    except SheetsAPIError as e:
+        raise sheets_http_error(e)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
-    
-    session = session_manager.get_session(session_id)
-    if not session:
+    except Exception as e:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Session expired"
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching sheet data: {str(e)}"
         )
+
+@router.post("/fetch-batch")
+async def fetch_sheet_data_batch(
+    spreadsheet_link: str,
+    sheet_names: List[str] = Query(...),
+    date_column: Optional[int] = None,
+    on_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    session: Dict[str, Any] = Depends(require_session)
+):
+    """
+    Fetch and filter several sheets of one spreadsheet in a single
+    batchGet round trip
+    Without date_column each sheet's date column and format are detected.
+    """
     
     try:
-        # Extract spreadsheet ID
         spreadsheet_id = extract_spreadsheet_id(spreadsheet_link)
         
-        # Note: For production, you'd need to set up Google Sheets API credentials
-        # This is a simplified example showing the structure
-        
-        # TODO: Implement actual Google Sheets API call
-        # For now, returning mock data structure
+        ranges = {sheet_range(name): name for name in sheet_names}
+        values = await sheets_client.batch_get(
+            spreadsheet_id,
+            list(ranges),
+            session["access_token"],
+            user=str(session["user_id"])
+        )
         
         today = datetime.now().date()
+        sheets = {}
+        for range_, rows in values.items():
+            column, date_format, _ = resolve_schema(rows, date_column=date_column)
+            headers, data = await asyncio.to_thread(
+                filter_sheet_rows, rows, column, today, on_date, start_date, end_date, date_format
+            )
+            sheets[ranges[range_]] = {
+                "date_column": column,
+                "date_format": date_format,
+                "headers": headers,
+                "data": data,
+                "count": len(data)
+            }
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "spreadsheet_id": spreadsheet_id,
-            "sheet_name": sheet_name,
             "today": str(today),
-            "data": [],
-            "message": "Spreadsheet integration requires proper Google API credentials"
-        }
+            "sheets": sheets
+        })
+        
+    except SheetsAPIError as e:
+        raise sheets_http_error(e)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching sheet data: {str(e)}"
+        )
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def export_lines(
+    headers: List[Any],
+    chunks: Iterator[List[List[Any]]],
+    format: str,
+    date_column: int,
+    filters: Dict[str, Optional[date]],
+    date_format: Optional[str] = None
+) -> Iterator[str]:
+    """Filter and serialize rows chunk by chunk, header row first"""
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        
+        def serialize(rows):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            return buffer.getvalue()
+    else:
+        def serialize(rows):
+            return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+    
+    yield serialize([headers])
+    for chunk in chunks:
+        data = filter_rows(chunk, date_column, date_format=date_format, **filters)
+        if data:
+            yield serialize(data)
+
+@router.post("/export")
+async def export_sheet_data(
+    spreadsheet_link: str,
+    sheet_name: str = "Sheet1",
+    format: str = "ndjson",
+    date_column: Optional[int] = None,
+    on_date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    refresh: bool = False,
+    session: Dict[str, Any] = Depends(require_session)
+):
+    """
+    Stream filtered spreadsheet rows as NDJSON (one JSON array per line)
+    or CSV, header row first
+    Rows are filtered and written one chunk at a time. Without
+    date_column a saved link's remembered date column is used, or the
+    first chunk is sampled to detect one.
+    """
+    
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be ndjson or csv"
+        )
+    
+    try:
+        spreadsheet_id = extract_spreadsheet_id(spreadsheet_link)
+        filters = date_filter(datetime.now().date(), on_date, start_date, end_date)
         
+        link = await database.fetch_one(
+            queries.ACTIVE_LINK,
+            (session["user_id"], spreadsheet_id, sheet_name)
+        )
+        
+        if link:
+            headers, chunks = await sheet_cache.stream(
+                link["id"],
+                spreadsheet_id,
+                sheet_range(sheet_name),
+                session["access_token"],
+                refresh=refresh,
+                ttl=link["cache_ttl_seconds"],
+                user=str(session["user_id"])
+            )
+        else:
+            rows = await sheet_cache.fetch_values(
+                spreadsheet_id,
+                sheet_range(sheet_name),
+                session["access_token"],
+                user=str(session["user_id"])
+            )
+            headers, chunks = (rows[0] if rows else []), iter_chunks(rows, ROW_GROUP_SIZE, offset=1)
+        
+        # Detection samples the first chunk, which is then put back
+        first = await asyncio.to_thread(next, chunks, [])
+        chunks = itertools.chain([first], chunks)
+        column, date_format, _ = resolve_schema(
+            [headers] + first,
+            link["date_column"] if link else None,
+            link["date_format"] if link else None,
+            date_column
+        )
+        
+    except SheetsAPIError as e:
+        raise sheets_http_error(e)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -159,6 +391,35 @@ async def fetch_sheet_data(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching sheet data: {str(e)}"
         )
+    
+    # A sync iterator is run in the threadpool, keeping decoding off the event loop
+    return StreamingResponse(
+        export_lines(headers, chunks, format, column, filters, date_format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{spreadsheet_id}.{format}"'
+        }
+    )
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get sheet cache hit/miss/eviction counters"""
+    return sheet_cache.stats()
+
+@router.get("/fetch/stats")
+async def get_fetch_stats(session: Dict[str, Any] = Depends(require_session)):
+    """Get request coalescing counters and per-key waiters for sheet fetches and reads"""
+    return {**sheet_fetches.stats(), "upstream": sheet_cache.reads.stats()}
+
+@router.get("/quota/stats")
+async def get_quota_stats():
+    """Get Google API queue depth, wait times, retries and the current rate"""
+    return google_scheduler.stats()
+
+@router.get("/prefetch/stats")
+async def get_prefetch_stats():
+    """Get recent prefetch run timings"""
+    return prefetcher.stats()
 
 @router.get("/test-date-parser")
 async def test_date_parser(date_string: str):
@@ -0,0 +1,54 @@
+"""
+AsyncDatabase runs queries on its executor, not the event loop
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+
+from utils.database import AsyncDatabase, ConnectionPool
+
+SLEEP = 0.2
+CALLS = 6
+
+def test_concurrent_queries_overlap_and_loop_keeps_serving(tmp_path, monkeypatch):
+    open_connection = ConnectionPool._open
+
+    def open_with_sleep(pool) -> sqlite3.Connection:
+        conn = open_connection(pool)
+        conn.create_function("sleep", 1, lambda seconds: time.sleep(seconds) or seconds)
+        return conn
+
+    monkeypatch.setattr(ConnectionPool, "_open", open_with_sleep)
+    database = AsyncDatabase(os.path.join(tmp_path, "sleep.db"))
+
+    async def scenario():
+        # Warm the pool so connection setup is not timed
+        await asyncio.gather(*[database.fetch_one("SELECT 1") for _ in range(CALLS)])
+
+        ticks = 0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not done.is_set():
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        started = time.perf_counter()
+        rows = await asyncio.gather(*[
+            database.fetch_one("SELECT sleep(?) AS slept", (SLEEP,)) for _ in range(CALLS)
+        ])
+        elapsed = time.perf_counter() - started
+        done.set()
+        await ticking
+        return rows, elapsed, ticks
+
+    rows, elapsed, ticks = asyncio.run(scenario())
+    assert [row["slept"] for row in rows] == [SLEEP] * CALLS
+    # Run one after another the calls would take CALLS * SLEEP
+    assert elapsed < SLEEP * 2
+    # The loop ran the ticker throughout instead of blocking on SQLite
+    assert ticks >= SLEEP / 0.01 / 2
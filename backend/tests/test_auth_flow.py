@@ -0,0 +1,164 @@
+"""
+OAuth login and callback against a stubbed Google
+"""
+
+import asyncio
+import base64
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from config.settings import settings
+from routers.auth import router
+from utils import google_oauth
+from utils.database import AsyncDatabase
+from utils.rate_limit import GoogleScheduler
+
+EMAIL = "budi@student.itera.ac.id"
+
+def id_token(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    return f"header.{payload}.signature"
+
+class StubGoogle:
+    """Token and userinfo endpoints, recording what they were sent"""
+
+    def __init__(self, token_status=200, userinfo_status=200, email=EMAIL):
+        self.token_status = token_status
+        self.userinfo_status = userinfo_status
+        self.email = email
+        self.name = "Budi"
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        url = str(request.url)
+        if url == settings.GOOGLE_TOKEN_URL:
+            if self.token_status != 200:
+                return httpx.Response(self.token_status, json={"error": "invalid_grant"})
+            return httpx.Response(200, json={
+                "access_token": "google-access",
+                "refresh_token": "google-refresh",
+                "expires_in": 3599,
+                "id_token": id_token({"email": self.email}),
+            })
+        if url == settings.GOOGLE_USERINFO_URL:
+            if self.userinfo_status != 200:
+                return httpx.Response(self.userinfo_status, json={"error": "invalid_token"})
+            return httpx.Response(200, json={
+                "id": "1234", "email": self.email, "name": self.name, "picture": "https://pic",
+            })
+        return httpx.Response(404)
+
+@pytest.fixture
+def google(tmp_path, monkeypatch):
+    """A fresh database in tmp_path and a stubbed Google for the OAuth handler"""
+    monkeypatch.chdir(tmp_path)
+    asyncio.run(AsyncDatabase().init_db())
+    stub = StubGoogle()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(stub))
+    monkeypatch.setattr(google_oauth, "get_http_client", lambda: client)
+    monkeypatch.setattr(google_oauth, "google_scheduler", GoogleScheduler(max_retries=0))
+    return stub
+
+def run(*steps):
+    """GET each path (or step(responses) so far) in order, carrying cookies"""
+    app = FastAPI()
+    app.include_router(router, prefix="/api/auth")
+
+    async def send():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://app"
+        ) as client:
+            responses = []
+            for step in steps:
+                path = step(responses) if callable(step) else step
+                responses.append(await client.get(path))
+            return responses
+
+    return asyncio.run(send())
+
+def login_state(response):
+    return parse_qs(urlsplit(response.json()["url"]).query)["state"][0]
+
+def callback(code="auth-code"):
+    return lambda responses: f"/api/auth/callback?code={code}&state={login_state(responses[0])}"
+
+def test_login_and_callback_sign_the_user_in(google):
+    login, signed_in, me = run("/api/auth/login", callback(), "/api/auth/me")
+
+    query = parse_qs(urlsplit(login.json()["url"]).query)
+    assert query["response_type"] == ["code"]
+    assert query["redirect_uri"] == [settings.GOOGLE_REDIRECT_URI]
+
+    assert signed_in.status_code == 302
+    assert signed_in.headers["location"] == "/dashboard"
+    assert "session_id=" in signed_in.headers["set-cookie"]
+    assert me.status_code == 200
+    assert me.json()["email"] == EMAIL
+
+    token, userinfo = google.requests
+    form = parse_qs(token.content.decode())
+    assert form["code"] == ["auth-code"]
+    assert form["grant_type"] == ["authorization_code"]
+    assert form["redirect_uri"] == [settings.GOOGLE_REDIRECT_URI]
+    assert userinfo.headers["Authorization"] == "Bearer google-access"
+    # The userinfo call is charged to the id_token's email, not the token
+    assert list(google_oauth.google_scheduler._users) == [EMAIL]
+
+def test_signing_in_again_refreshes_the_profile(google):
+    def rename(responses):
+        google.name = "Budi Santoso"
+        return "/api/auth/login"
+
+    def callback_after(login_index):
+        return lambda responses: (
+            f"/api/auth/callback?code=auth-code&state={login_state(responses[login_index])}"
+        )
+
+    responses = run(
+        "/api/auth/login", callback(), "/api/auth/me",
+        rename, callback_after(3), "/api/auth/me"
+    )
+    first_me, second_me = responses[2].json(), responses[5].json()
+    assert first_me["name"] == "Budi"
+    # Same users row, and the cached profile was dropped
+    assert second_me["id"] == first_me["id"]
+    assert second_me["name"] == "Budi Santoso"
+
+def test_unknown_state_is_rejected_before_the_token_exchange(google):
+    (response,) = run("/api/auth/callback?code=auth-code&state=forged")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid state parameter"
+    assert google.requests == []
+
+def test_state_is_single_use(google):
+    _, first, replayed = run("/api/auth/login", callback(), callback())
+    assert first.status_code == 302
+    assert replayed.status_code == 400
+    assert len(google.requests) == 2
+
+def test_failed_token_exchange(google):
+    google.token_status = 400
+    _, response = run("/api/auth/login", callback())
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Failed to exchange code for token"
+    assert len(google.requests) == 1
+
+def test_failed_userinfo_creates_no_session(google):
+    google.userinfo_status = 401
+    _, response, me = run("/api/auth/login", callback(), "/api/auth/me")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Failed to get user information"
+    assert "set-cookie" not in response.headers
+    assert me.status_code == 401
+
+def test_other_domains_are_turned_away(google):
+    google.email = "budi@gmail.com"
+    _, response = run("/api/auth/login", callback())
+    assert response.status_code == 302
+    assert response.headers["location"] == "/error?reason=invalid_domain"
+    assert "set-cookie" not in response.headers
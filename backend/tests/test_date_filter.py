@@ -0,0 +1,73 @@
+"""
+Vectorized date filtering of sheet rows
+"""
+
+from datetime import date
+
+import numpy as np
+
+from routers.sheets import filter_sheet_rows
+from utils.date_filter import date_mask, filter_rows, parse_date_column
+
+ROWS = [
+    ["16/10/2026", "a"],
+    ["17/10/2026", "b"],
+    ["Sabtu, 17 Okt 2026", "c"],
+    ["18/10/2026", "d"],
+    ["-", "e"],
+    ["", "f"],
+    ["2026-10-19", "g"],
+    [],
+    ["bukan tanggal", "h"],
+]
+
+def names(rows):
+    return [row[1] for row in rows]
+
+def test_parse_date_column_marks_unparseable_cells_nat():
+    dates = parse_date_column([row[0] if row else None for row in ROWS])
+    assert dates.dtype == np.dtype("datetime64[D]")
+    assert np.isnat(dates).tolist() == [False, False, False, False, True, True, False, True, True]
+    assert dates[2] == np.datetime64("2026-10-17")
+
+def test_on_date_matches_that_day_only():
+    assert names(filter_rows(ROWS, 0, on=date(2026, 10, 17))) == ["b", "c"]
+
+def test_range_is_inclusive():
+    in_range = filter_rows(ROWS, 0, start=date(2026, 10, 17), end=date(2026, 10, 18))
+    assert names(in_range) == ["b", "c", "d"]
+
+def test_open_ended_ranges():
+    assert names(filter_rows(ROWS, 0, start=date(2026, 10, 18))) == ["d", "g"]
+    assert names(filter_rows(ROWS, 0, end=date(2026, 10, 16))) == ["a"]
+
+def test_on_date_wins_over_a_range():
+    dates = parse_date_column(["17/10/2026", "18/10/2026"])
+    mask = date_mask(dates, on=date(2026, 10, 18), start=date(2026, 10, 1), end=date(2026, 10, 31))
+    assert mask.tolist() == [False, True]
+
+def test_nat_never_matches():
+    dates = parse_date_column(["-", "", None])
+    assert not date_mask(dates).any()
+    assert not date_mask(dates, start=date(1900, 1, 1)).any()
+    assert not date_mask(dates, on=date(2026, 10, 17)).any()
+
+def test_rows_missing_the_date_column_are_skipped():
+    rows = [["x", "17/10/2026"], ["y"], ["z", "17/10/2026"]]
+    assert filter_rows(rows, 1, on=date(2026, 10, 17)) == [rows[0], rows[2]]
+    assert filter_rows(rows, 5, start=date(1900, 1, 1)) == []
+
+def test_empty_sheet():
+    assert filter_rows([], 0, on=date(2026, 10, 17)) == []
+    assert filter_sheet_rows([], 0, date(2026, 10, 17)) == ([], [])
+
+def test_no_filter_means_today():
+    rows = [["tanggal", "nama"]] + ROWS
+    headers, data = filter_sheet_rows(rows, 0, date(2026, 10, 18))
+    assert headers == ["tanggal", "nama"]
+    assert names(data) == ["d"]
+
+    _, data = filter_sheet_rows(rows, 0, date(2026, 10, 18), on_date="2026-10-16")
+    assert names(data) == ["a"]
+    _, data = filter_sheet_rows(rows, 0, date(2026, 10, 18), start_date="2026-10-19")
+    assert names(data) == ["g"]
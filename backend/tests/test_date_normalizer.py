@@ -0,0 +1,121 @@
+"""
+DateNormalizer against the parser it replaced
+
+Each expected date is what the original strptime/dateutil parse_date
+returned for the same cell, so the fast paths and the memo must not
+change any result.
+"""
+
+from datetime import date
+
+import pytest
+
+from utils.date_normalizer import DateNormalizer
+
+CORPUS = [
+    # Numeric day-first and ISO
+    ("17/11/2025", date(2025, 11, 17)),
+    ("1/1/2025", date(2025, 1, 1)),
+    ("01/01/2025", date(2025, 1, 1)),
+    (" 17/11/2025 ", date(2025, 11, 17)),
+    ("7/3/2026", date(2026, 3, 7)),
+    ("31/12/2025", date(2025, 12, 31)),
+    ("29/02/2024", date(2024, 2, 29)),
+    ("2025-11-17", date(2025, 11, 17)),
+    ("2025-1-7", date(2025, 1, 7)),
+    ("2024-02-29", date(2024, 2, 29)),
+    # Indonesian month names, full and short
+    ("17 November 2025", date(2025, 11, 17)),
+    ("17 november 2025", date(2025, 11, 17)),
+    ("17 Nov 2025", date(2025, 11, 17)),
+    ("1 Januari 2026", date(2026, 1, 1)),
+    ("1 jan 2026", date(2026, 1, 1)),
+    ("5 Februari 2025", date(2025, 2, 5)),
+    ("5 Feb 2025", date(2025, 2, 5)),
+    ("10 Maret 2025", date(2025, 3, 10)),
+    ("10 Mar 2025", date(2025, 3, 10)),
+    ("30 April 2025", date(2025, 4, 30)),
+    ("30 Apr 2025", date(2025, 4, 30)),
+    ("20 Mei 2025", date(2025, 5, 20)),
+    ("2 Juni 2025", date(2025, 6, 2)),
+    ("2 Jun 2025", date(2025, 6, 2)),
+    ("3 Juli 2025", date(2025, 7, 3)),
+    ("3 Jul 2025", date(2025, 7, 3)),
+    ("17 Agustus 2025", date(2025, 8, 17)),
+    ("17 Ags 2025", date(2025, 8, 17)),
+    ("9 September 2025", date(2025, 9, 9)),
+    ("9 Sep 2025", date(2025, 9, 9)),
+    ("28 Oktober 2025", date(2025, 10, 28)),
+    ("28 Okt 2025", date(2025, 10, 28)),
+    ("25 Desember 2025", date(2025, 12, 25)),
+    ("25 Des 2025", date(2025, 12, 25)),
+    ("17 NOVEMBER 2025", date(2025, 11, 17)),
+    ("17  November  2025", date(2025, 11, 17)),
+    ("17 November, 2025", date(2025, 11, 17)),
+    # Day-name prefixes
+    ("Senin, 17 November 2025", date(2025, 11, 17)),
+    ("senin, 17 nov 2025", date(2025, 11, 17)),
+    ("Selasa, 18 November 2025", date(2025, 11, 18)),
+    ("Rabu, 19 Nov 2025", date(2025, 11, 19)),
+    ("Kamis, 20 November 2025", date(2025, 11, 20)),
+    ("Jumat, 21 November 2025", date(2025, 11, 21)),
+    ("Sabtu, 22 Nov 2025", date(2025, 11, 22)),
+    ("Minggu, 23 November 2025", date(2025, 11, 23)),
+    ("Sen, 17 Nov 2025", date(2025, 11, 17)),
+    ("Sel, 18 Nov 2025", date(2025, 11, 18)),
+    ("Rab, 19 Nov 2025", date(2025, 11, 19)),
+    ("Kam, 20 Nov 2025", date(2025, 11, 20)),
+    ("Jum, 21 Nov 2025", date(2025, 11, 21)),
+    ("Sab, 22 Nov 2025", date(2025, 11, 22)),
+    ("Min, 23 Nov 2025", date(2025, 11, 23)),
+    ("Senin, 17/11/2025", date(2025, 11, 17)),
+    ("Senin, 2025-11-17", date(2025, 11, 17)),
+    # Two-digit years and other shapes dateutil reads
+    ("17/11/25", date(2025, 11, 17)),
+    ("17/11/98", date(1998, 11, 17)),
+    ("1/2/03", date(2003, 1, 2)),
+    ("17-11-25", date(2025, 11, 17)),
+    ("2025/11/17", date(2025, 11, 17)),
+    ("Nov 17, 2025", date(2025, 11, 17)),
+    ("November 17 2025", date(2025, 11, 17)),
+    ("17.11.2025", date(2025, 11, 17)),
+    # Invalid dates and non-dates
+    ("29/02/2025", None),
+    ("31/04/2025", None),
+    ("00/01/2025", None),
+    ("32/01/2025", None),
+    ("17/13/2025", None),
+    ("2025-02-29", None),
+    ("2025-13-01", None),
+    ("2025-11-31", None),
+    ("31 Februari 2025", None),
+    ("30 Februari 2024", None),
+    ("32 November 2025", None),
+    ("0 November 2025", None),
+    ("Senin, 31 Februari 2025", None),
+    ("Senin 17 November 2025", None),
+    ("17 Novembre 2025x", None),
+    ("Senin,", None),
+    ("", None),
+    ("   ", None),
+    ("bukan tanggal", None),
+    ("N/A", None),
+    ("-", None),
+    ("tanggal", None),
+    ("hari ini", None),
+]
+
+@pytest.mark.parametrize("cell, expected", CORPUS)
+def test_parse_date_matches_the_original_parser(cell, expected):
+    assert DateNormalizer.parse_date(cell) == expected
+
+@pytest.mark.parametrize("date_format", [None, *DateNormalizer.FORMATS])
+def test_parse_many_matches_parse_date(date_format):
+    # Every cell twice, so repeats come from the batch's own memo
+    cells = [cell for cell, _ in CORPUS] * 2
+    expected = [expected for _, expected in CORPUS] * 2
+    assert DateNormalizer.parse_many(cells, date_format) == expected
+
+def test_non_strings_parse_to_none():
+    assert DateNormalizer.parse_date(None) is None
+    assert DateNormalizer.parse_many([None, 45000, "17/11/2025"]) == [None, None, date(2025, 11, 17)]
@@ -0,0 +1,130 @@
+"""
+Sheets API client against a mock transport
+"""
+
+import asyncio
+from urllib.parse import unquote
+
+import httpx
+import pytest
+
+from utils import google_sheets
+from utils.google_sheets import GoogleSheetsClient, SheetsAPIError, sheet_range
+from utils.rate_limit import GoogleScheduler
+
+@pytest.fixture(autouse=True)
+def quota(monkeypatch):
+    """A scheduler of its own that retries quickly"""
+    scheduler = GoogleScheduler(
+        rate=1000, burst=1000, user_rate=1000, user_burst=1000,
+        max_retries=2, backoff_base=0.001, backoff_max=0.005
+    )
+    monkeypatch.setattr(google_sheets, "google_scheduler", scheduler)
+    return scheduler
+
+def client_for(handler):
+    """A client whose requests go to handler, recording them"""
+    requests = []
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+
+    class Client(GoogleSheetsClient):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+
+    return Client(base_url="https://sheets.test/v4/spreadsheets", drive_url="https://drive.test/files"), requests
+
+def test_sheet_range_quotes_the_name():
+    assert sheet_range("Sheet1") == "'Sheet1'"
+    assert sheet_range("Data 2025", "A1:C10") == "'Data 2025'!A1:C10"
+    assert sheet_range("Pak Budi's") == "'Pak Budi''s'"
+
+def test_get_values_escapes_the_range():
+    client, requests = client_for(
+        lambda request: httpx.Response(200, json={"values": [["tanggal"], ["17/10/2026"]]})
+    )
+
+    values = asyncio.run(client.get_values("abc", sheet_range("Rekap/Okt #1", "A1:B"), "token"))
+
+    assert values == [["tanggal"], ["17/10/2026"]]
+    request = requests[0]
+    assert request.headers["Authorization"] == "Bearer token"
+    path = request.url.raw_path.decode()
+    assert path.startswith("/v4/spreadsheets/abc/values/")
+    escaped = path.rsplit("/", 1)[1]
+    assert "/" not in escaped and "#" not in escaped
+    assert unquote(escaped) == "'Rekap/Okt #1'!A1:B"
+
+def test_get_values_of_an_empty_range():
+    client, _ = client_for(lambda request: httpx.Response(200, json={"range": "'Sheet1'!A1:Z1000"}))
+    assert asyncio.run(client.get_values("abc", "'Sheet1'", "token")) == []
+
+def test_batch_get_maps_value_ranges_to_requested_ranges():
+    ranges = [sheet_range("Sheet1"), sheet_range("Sheet 2", "1:1"), sheet_range("Kosong")]
+
+    def handler(request):
+        # Google echoes normalized ranges, so results are matched by position
+        return httpx.Response(200, json={"valueRanges": [
+            {"range": "Sheet1!A1:B2", "values": [["a", "b"], ["1", "2"]]},
+            {"range": "'Sheet 2'!A1:Z1", "values": [["header"]]},
+            {"range": "Kosong!A1:Z1000"},
+        ]})
+
+    client, requests = client_for(handler)
+    fetched = asyncio.run(client.batch_get("abc", ranges, "token"))
+
+    assert fetched == {
+        ranges[0]: [["a", "b"], ["1", "2"]],
+        ranges[1]: [["header"]],
+        ranges[2]: [],
+    }
+    request = requests[0]
+    assert request.url.path == "/v4/spreadsheets/abc/values:batchGet"
+    assert request.url.params.get_list("ranges") == ranges
+
+def test_batch_get_without_ranges_makes_no_request():
+    client, requests = client_for(lambda request: httpx.Response(500))
+    assert asyncio.run(client.batch_get("abc", [], "token")) == {}
+    assert requests == []
+
+def test_modified_time_asks_drive_for_one_field():
+    client, requests = client_for(
+        lambda request: httpx.Response(200, json={"modifiedTime": "2026-10-17T07:03:22.000Z"})
+    )
+    assert asyncio.run(client.get_modified_time("abc", "token")) == "2026-10-17T07:03:22.000Z"
+    assert str(requests[0].url) == "https://drive.test/files/abc?fields=modifiedTime"
+
+@pytest.mark.parametrize("status, message, attempts", [
+    (401, "Request had invalid authentication credentials.", 1),
+    (403, "The caller does not have permission", 1),
+    (404, "Requested entity was not found.", 1),
+    (429, "Quota exceeded for quota metric 'Read requests'", 3),
+])
+def test_error_responses_become_sheets_api_errors(status, message, attempts):
+    client, requests = client_for(
+        lambda request: httpx.Response(status, json={"error": {"code": status, "message": message}})
+    )
+
+    with pytest.raises(SheetsAPIError) as raised:
+        asyncio.run(client.get_values("abc", "'Sheet1'", "token"))
+
+    assert (raised.value.status_code, raised.value.message) == (status, message)
+    # Only 429 (and 5xx) are retried
+    assert len(requests) == attempts
+
+def test_error_without_json_body_keeps_the_text():
+    client, _ = client_for(lambda request: httpx.Response(404, text="Not Found"))
+    with pytest.raises(SheetsAPIError) as raised:
+        asyncio.run(client.get_values("abc", "'Sheet1'", "token"))
+    assert (raised.value.status_code, raised.value.message) == (404, "Not Found")
+
+def test_transport_errors_become_502():
+    def handler(request):
+        raise httpx.ConnectError("connection refused", request=request)
+
+    client, requests = client_for(handler)
+    with pytest.raises(SheetsAPIError) as raised:
+        asyncio.run(client.get_values("abc", "'Sheet1'", "token"))
+    assert raised.value.status_code == 502
+    assert len(requests) == 3
@@ -0,0 +1,94 @@
+"""
+Bulk link import outcomes, chunking and the request size limit
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from config.settings import settings
+from routers import links
+from utils.auth import require_user_id
+from utils.database import AsyncDatabase
+
+def sheet_url(spreadsheet_id):
+    return f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/edit#gid=0"
+
+@pytest.fixture
+def post(tmp_path, monkeypatch):
+    """POST to the links router as user 1, on a fresh database"""
+    monkeypatch.chdir(tmp_path)
+    database = AsyncDatabase()
+    asyncio.run(database.init_db())
+    asyncio.run(database.execute("INSERT INTO users (email, name) VALUES ('a@x', 'A')"))
+
+    app = FastAPI()
+    app.include_router(links.router, prefix="/api/links")
+    app.dependency_overrides[require_user_id] = lambda: 1
+
+    def send(path, **kwargs):
+        async def request():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://app"
+            ) as client:
+                return await client.post(path, **kwargs)
+        return asyncio.run(request())
+
+    send.database = database
+    return send
+
+def test_each_item_gets_an_outcome(post):
+    assert post("/api/links/add", params={"spreadsheet_link": "existing1", "sheet_name": "S"}).status_code == 200
+
+    response = post("/api/links/bulk", json=[
+        {"spreadsheet_link": sheet_url("new1"), "sheet_name": "S", "name": "Rekap"},
+        {"spreadsheet_link": "not a sheet link!", "sheet_name": "S"},
+        {"spreadsheet_link": "new1", "sheet_name": "S"},
+        {"spreadsheet_link": sheet_url("existing1"), "sheet_name": "S"},
+        {"spreadsheet_link": "new1", "sheet_name": "Other"},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["created"], body["duplicate"], body["invalid"]) == (2, 2, 1)
+    created, invalid, in_batch, existing, other_sheet = body["results"]
+
+    assert created["status"] == "created"
+    assert created["link"]["spreadsheet_id"] == "new1"
+    assert created["link"]["spreadsheet_name"] == "Rekap"
+    assert invalid == {"index": 1, "status": "invalid", "error": "Invalid Google Sheets URL"}
+    # Repeated within the request: points at the item that was kept
+    assert in_batch == {"index": 2, "status": "duplicate", "duplicate_of": 0}
+    # Already saved before the request
+    assert existing == {"index": 3, "status": "duplicate"}
+    assert other_sheet["status"] == "created"
+    assert other_sheet["link"]["sheet_name"] == "Other"
+
+def test_imports_past_one_insert_chunk(post):
+    size = 2 * links.BULK_INSERT_CHUNK + 7
+    items = [{"spreadsheet_link": f"sheet{i}", "sheet_name": "S"} for i in range(size)]
+    # A few existing links spread over the chunks
+    for i in (0, links.BULK_INSERT_CHUNK, size - 1):
+        post("/api/links/add", params={"spreadsheet_link": f"sheet{i}", "sheet_name": "S"})
+
+    body = post("/api/links/bulk", json=items).json()
+
+    assert (body["created"], body["duplicate"]) == (size - 3, 3)
+    assert [result["index"] for result in body["results"]] == list(range(size))
+    for result in body["results"]:
+        if result["status"] == "created":
+            assert result["link"]["spreadsheet_id"] == f"sheet{result['index']}"
+    rows = asyncio.run(post.database.fetch_one("SELECT COUNT(*) AS n FROM spreadsheet_links"))
+    assert rows["n"] == size
+
+def test_too_many_items_is_413(post, monkeypatch):
+    monkeypatch.setattr(settings, "LINKS_BULK_MAX_ITEMS", 3)
+    items = [{"spreadsheet_link": f"sheet{i}"} for i in range(4)]
+
+    response = post("/api/links/bulk", json=items)
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "At most 3 links per request"
+    assert post("/api/links/bulk", json=items[:3]).json()["created"] == 3
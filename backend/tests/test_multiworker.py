@@ -0,0 +1,71 @@
+"""
+Sessions and OAuth states are shared by workers in separate processes
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Worker 1: sign a user in and start an OAuth flow
+SIGN_IN = """
+import asyncio, json
+from utils.auth import database, session_manager
+
+async def main():
+    await database.init_db()
+    await database.execute(
+        "INSERT INTO users (email, name) VALUES ('worker@student.itera.ac.id', 'Worker')"
+    )
+    user = await database.fetch_one("SELECT id FROM users")
+    session_id = session_manager.create_session(user["id"], "worker@student.itera.ac.id", "token")
+    state = session_manager.create_state()
+    await session_manager.flush()
+    print(json.dumps({"session_id": session_id, "state": state}))
+
+asyncio.run(main())
+"""
+
+# Worker 2: resolve the session over HTTP and consume the state
+RESUME = """
+import asyncio, json, sys
+import httpx
+import app
+from utils.auth import session_manager
+
+async def main(session_id, state):
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://worker", cookies={"session_id": session_id}
+    ) as client:
+        response = await client.get("/api/auth/me")
+    print(json.dumps({
+        "me": [response.status_code, response.json()],
+        "consumed": [
+            await session_manager.consume_state(state),
+            await session_manager.consume_state(state),
+        ],
+    }))
+
+asyncio.run(main(sys.argv[1], sys.argv[2]))
+"""
+
+def run_worker(code, cwd, *args):
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_session_and_state_cross_processes(tmp_path):
+    signed_in = run_worker(SIGN_IN, tmp_path)
+    resumed = run_worker(RESUME, tmp_path, signed_in["session_id"], signed_in["state"])
+
+    status, user = resumed["me"]
+    assert status == 200
+    assert user["email"] == "worker@student.itera.ac.id"
+    assert resumed["consumed"] == [True, False]
@@ -0,0 +1,88 @@
+"""
+Keyset cursors: round trips, malformed cursors and their HTTP status
+"""
+
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from routers import links
+from utils.auth import require_user_id
+from utils.database import AsyncDatabase
+from utils.pagination import decode_cursor, encode_cursor
+
+KEY_TYPES = (str, int)
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["2026-10-17 07:03:22", 42])
+    assert decode_cursor(cursor, KEY_TYPES) == ["2026-10-17 07:03:22", 42]
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor({"updated_at": "2026-10-17", "id": 1})[:-3],
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    raw_cursor({"updated_at": "2026-10-17", "id": 1}),
+    raw_cursor(["2026-10-17 07:03:22"]),
+    raw_cursor(["2026-10-17 07:03:22", 1, 2]),
+    raw_cursor([{"a": 1}, [2]]),
+    raw_cursor([1, "2026-10-17 07:03:22"]),
+    raw_cursor(["2026-10-17 07:03:22", "1"]),
+    raw_cursor(["2026-10-17 07:03:22", 1.5]),
+    raw_cursor(["2026-10-17 07:03:22", True]),
+    raw_cursor([None, 1]),
+])
+def test_malformed_cursors_are_invalid(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor, KEY_TYPES)
+
+def test_links_use_the_checked_key_types():
+    assert links.KEY_TYPES == KEY_TYPES
+    assert len(links.LINK_KEYS) == len(links.HISTORY_KEYS) == len(KEY_TYPES)
+
+@pytest.fixture
+def get(tmp_path, monkeypatch):
+    """GET from the links router as user 1, who has five links"""
+    monkeypatch.chdir(tmp_path)
+    database = AsyncDatabase()
+    asyncio.run(database.init_db())
+    asyncio.run(database.execute("INSERT INTO users (email, name) VALUES ('a@x', 'A')"))
+    for i in range(5):
+        asyncio.run(database.execute(
+            "INSERT INTO spreadsheet_links (user_id, spreadsheet_id, sheet_name, link) VALUES (1, ?, 'S', ?)",
+            (f"sheet{i}", f"sheet{i}")
+        ))
+
+    app = FastAPI()
+    app.include_router(links.router, prefix="/api/links")
+    app.dependency_overrides[require_user_id] = lambda: 1
+
+    def send(path, **params):
+        async def request():
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://app"
+            ) as client:
+                return await client.get(path, params=params)
+        return asyncio.run(request())
+
+    return send
+
+def test_pages_follow_the_cursor(get):
+    first = get("/api/links/list", limit=3).json()
+    second = get("/api/links/list", limit=3, cursor=first["next_cursor"]).json()
+    ids = [link["id"] for link in first["links"] + second["links"]]
+    assert sorted(ids, reverse=True) == ids == [5, 4, 3, 2, 1]
+    assert second["next_cursor"] is None
+
+@pytest.mark.parametrize("path", ["/api/links/list", "/api/links/history/1"])
+@pytest.mark.parametrize("cursor", [raw_cursor([{"a": 1}, [2]]), raw_cursor(["x", True]), "%%%"])
+def test_wrongly_typed_cursor_is_400(get, path, cursor):
+    response = get(path, cursor=cursor)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,17 @@
+"""
+Every query in utils.queries uses an index
+"""
+
+from utils import queries
+from utils.query_plans import QUERIES, check_query_plans
+
+def test_no_full_scans_or_temp_btrees():
+    assert check_query_plans() == []
+
+def test_every_query_constant_is_checked():
+    checked = {query for _, query, _ in QUERIES}
+    constants = {
+        name for name, value in vars(queries).items()
+        if name.isupper() and isinstance(value, str)
+    }
+    assert {name for name in constants if getattr(queries, name) not in checked} == set()
@@ -0,0 +1,110 @@
+"""
+Quota scheduling of Google calls against injected 429s
+"""
+
+import asyncio
+
+import httpx
+
+from utils import google_sheets
+from utils.google_sheets import GoogleSheetsClient
+from utils.rate_limit import GoogleScheduler
+
+def scheduler(**overrides):
+    options = dict(
+        rate=100, burst=100, user_rate=100, user_burst=100,
+        max_retries=3, backoff_base=0.001, backoff_max=0.01, max_wait=5
+    )
+    options.update(overrides)
+    return GoogleScheduler(**options)
+
+def responses(*statuses, headers=None):
+    """A request callable answering with each status in turn, counting calls"""
+    calls = []
+
+    async def request():
+        calls.append(len(calls))
+        return httpx.Response(statuses[min(len(calls) - 1, len(statuses) - 1)], headers=headers)
+
+    return request, calls
+
+def test_429_is_retried_and_halves_the_rate():
+    quota = scheduler()
+    request, calls = responses(429, 429, 200)
+
+    response = asyncio.run(quota.send("test", "1", request))
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    stats = quota.stats()
+    assert stats["retries"] == 2
+    assert stats["throttled"] == 2
+    # Halved once (at most once a second), then crept back by one step
+    assert stats["rate"] == 50 + 100 / 50
+
+def test_429_gives_up_after_max_retries():
+    quota = scheduler(max_retries=2)
+    request, calls = responses(429)
+
+    response = asyncio.run(quota.send("test", "1", request))
+
+    assert response.status_code == 429
+    assert len(calls) == 3
+
+def test_retry_after_is_honoured():
+    quota = scheduler(backoff_max=1)
+    request, calls = responses(429, 200, headers={"Retry-After": "0.2"})
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await quota.send("test", "1", request)
+        return loop.time() - started
+
+    assert asyncio.run(timed()) >= 0.2
+    assert len(calls) == 2
+
+def test_non_idempotent_calls_retry_only_429():
+    quota = scheduler()
+    request, calls = responses(503, 200)
+    assert asyncio.run(quota.send("test", None, request, idempotent=False)).status_code == 503
+    assert len(calls) == 1
+
+    request, calls = responses(429, 200)
+    assert asyncio.run(quota.send("test", None, request, idempotent=False)).status_code == 200
+    assert len(calls) == 2
+
+def test_user_bucket_limits_one_user_only():
+    quota = scheduler(user_rate=1, user_burst=2, max_wait=0.2)
+    request, _ = responses(200)
+
+    async def burst():
+        for _ in range(2):
+            await quota.send("test", "1", request)
+        other = await quota.send("test", "2", request)
+        try:
+            await quota.send("test", "1", request)
+        except Exception as e:
+            return other.status_code, type(e).__name__
+
+    assert asyncio.run(burst()) == (200, "QuotaWaitTimeout")
+
+def test_sheets_calls_use_the_user_id_bucket(monkeypatch):
+    quota = scheduler()
+    monkeypatch.setattr(google_sheets, "google_scheduler", quota)
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers["Authorization"])
+        if len(seen) == 1:
+            return httpx.Response(429, json={"error": {"message": "Quota exceeded"}})
+        return httpx.Response(200, json={"values": [["a"]]})
+
+    class Client(GoogleSheetsClient):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    values = asyncio.run(Client().get_values("sheet", "'Sheet1'", "secret-token", user="7"))
+
+    assert values == [["a"]]
+    assert seen == ["Bearer secret-token"] * 2
+    assert list(quota._users) == ["7"]
@@ -0,0 +1,46 @@
+"""
+How long a logged-out session outlives its deletion on other workers
+"""
+
+import asyncio
+import types
+
+from config.settings import settings
+from utils import ttl_store
+from utils.session import SessionManager
+from utils.ttl_store import TTLStore
+
+def worker():
+    """A SessionManager with a read cache of its own, like one in another process"""
+    manager = SessionManager()
+    manager._sessions = TTLStore(max_size=100, default_ttl=settings.SESSION_CACHE_TTL_SECONDS)
+    manager._pending = []
+    return manager
+
+def test_logout_reaches_other_workers_within_the_cache_ttl(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(ttl_store, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+
+    async def scenario():
+        await SessionManager._database.init_db()
+        await SessionManager._database.execute("INSERT INTO users (email, name) VALUES ('a@x', 'A')")
+        a, b = worker(), worker()
+        session_id = a.create_session(1, "a@x", "token")
+        await a.flush()
+        # Worker b serves a request, caching the session
+        assert await b.get_session(session_id) is not None
+
+        await a.delete_session(session_id)
+        seen = {"a": await a.get_session(session_id), "b_cached": await b.get_session(session_id)}
+
+        clock.now += settings.SESSION_CACHE_TTL_SECONDS
+        seen["b_expired"] = await b.get_session(session_id)
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert seen["a"] is None
+    # The documented bound: b still honours its cached copy...
+    assert seen["b_cached"] is not None
+    # ...until it expires, when b rereads the table and finds it gone
+    assert seen["b_expired"] is None
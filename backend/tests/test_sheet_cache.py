@@ -0,0 +1,149 @@
+"""
+Sheet cache freshness and revalidation through the SQLite tier
+"""
+
+import asyncio
+import os
+
+from utils.database import AsyncDatabase
+from utils.google_sheets import SheetsAPIError
+from utils.sheet_cache import SheetCache
+
+VALUES = [["tanggal", "nilai"]] + [[f"2025-11-{i % 28 + 1:02d}", str(i)] for i in range(3000)]
+
+class FakeSheets:
+    """Serves one sheet and one modifiedTime, counting calls"""
+
+    def __init__(self):
+        self.calls = {"values": 0, "modified": 0}
+
+    async def get_values(self, spreadsheet_id, range_, access_token, user=None):
+        self.calls["values"] += 1
+        return VALUES
+
+    async def get_modified_time(self, spreadsheet_id, access_token, user=None):
+        self.calls["modified"] += 1
+        return "2025-11-01T00:00:00Z"
+
+async def cached_row(database, link_id):
+    return await database.fetch_one(
+        "SELECT data, last_fetched FROM sheet_data_cache WHERE link_id = ?",
+        (link_id,)
+    )
+
+async def scenario(db_path):
+    database = AsyncDatabase(db_path)
+    await database.init_db()
+    await database.execute("INSERT INTO users (email, name) VALUES ('a@x', 'A')")
+    await database.execute(
+        """
+        INSERT INTO spreadsheet_links (user_id, link, spreadsheet_id, sheet_name)
+        VALUES (1, 's', 's', 'Sheet1')
+        """
+    )
+    client = FakeSheets()
+    cache = SheetCache(database, client, default_ttl=300)
+
+    entry = await cache.get_entry(1, "s", "Sheet1", "token")
+    assert entry.values == VALUES
+    stored = await cached_row(database, 1)
+
+    # Fresh in the SQLite tier: decoded, no Google calls
+    cache.memory.pop(1)
+    entry = await cache.get_entry(1, "s", "Sheet1", "token")
+    assert entry.values == VALUES
+    assert client.calls == {"values": 1, "modified": 1}
+    assert cache.stats()["db_hits"] == 1
+
+    # Stale but unchanged: one metadata call, only last_fetched moves
+    await database.execute(
+        "UPDATE sheet_data_cache SET last_fetched = datetime('now', '-1 hour') WHERE link_id = 1"
+    )
+    cache.memory.pop(1)
+    entry = await cache.get_entry(1, "s", "Sheet1", "token")
+    assert entry.values == VALUES
+    assert client.calls == {"values": 1, "modified": 2}
+    assert cache.stats()["revalidated"] == 1
+    revalidated = await cached_row(database, 1)
+    assert revalidated["data"] == stored["data"]
+
+    # The bumped last_fetched makes the stored row fresh again
+    cache.memory.pop(1)
+    await cache.get_entry(1, "s", "Sheet1", "token")
+    assert client.calls == {"values": 1, "modified": 2}
+    assert cache.stats()["db_hits"] == 2
+
+def test_revalidation_touches_only_last_fetched(tmp_path):
+    asyncio.run(scenario(os.path.join(tmp_path, "cache.db")))
+
+async def link_ttl_scenario(db_path):
+    database = AsyncDatabase(db_path)
+    await database.init_db()
+    client = FakeSheets()
+    cache = SheetCache(database, client, default_ttl=300)
+    await cache.get_entry(1, "s", "Sheet1", "token")
+
+    # A link's own lifetime overrides the default in both directions
+    await cache.get_entry(1, "s", "Sheet1", "token", ttl=0)
+    assert cache.stats()["revalidated"] == 1
+    await cache.get_entry(1, "s", "Sheet1", "token", ttl=3600)
+    assert cache.stats()["memory_hits"] == 1
+    assert client.calls == {"values": 1, "modified": 2}
+
+def test_link_ttl_overrides_default(tmp_path):
+    asyncio.run(link_ttl_scenario(os.path.join(tmp_path, "cache.db")))
+
+async def refresh_scenario(db_path):
+    database = AsyncDatabase(db_path)
+    await database.init_db()
+    client = FakeSheets()
+    cache = SheetCache(database, client, default_ttl=300)
+    await cache.get_entry(1, "s", "Sheet1", "token")
+
+    # A manual refresh refetches the whole sheet, never just some blocks
+    await cache.get_entry(1, "s", "Sheet1", "token", refresh=True)
+    assert client.calls["values"] == 2
+
+def test_refresh_fetches_whole_sheet(tmp_path):
+    asyncio.run(refresh_scenario(os.path.join(tmp_path, "cache.db")))
+
+class SharedSheets(FakeSheets):
+    """Slow values reads; a token without access is refused by both APIs"""
+
+    async def get_values(self, spreadsheet_id, range_, access_token, user=None):
+        self.calls["values"] += 1
+        await asyncio.sleep(0.05)
+        if access_token == "denied":
+            raise SheetsAPIError(403, "The caller does not have permission")
+        return VALUES
+
+    async def get_modified_time(self, spreadsheet_id, access_token, user=None):
+        self.calls["modified"] += 1
+        if access_token == "denied":
+            raise SheetsAPIError(403, "The caller does not have permission")
+        return "2025-11-01T00:00:00Z"
+
+async def shared_scenario(db_path):
+    database = AsyncDatabase(db_path)
+    await database.init_db()
+    client = SharedSheets()
+    cache = SheetCache(database, client)
+
+    # Five users' links to one sheet: five access checks, one read
+    entries = await asyncio.gather(*[
+        cache.get_entry(link_id, "s", "Sheet1", f"token-{link_id}") for link_id in range(1, 6)
+    ])
+    assert all(entry.values == VALUES for entry in entries)
+    assert client.calls == {"values": 1, "modified": 5}
+
+    # A user whose own check fails never gets the shared read
+    results = await asyncio.gather(
+        cache.fetch_values("s", "Sheet1", "token-1"),
+        cache.fetch_values("s", "Sheet1", "denied"),
+        return_exceptions=True
+    )
+    assert results[0] == VALUES
+    assert isinstance(results[1], SheetsAPIError) and results[1].status_code == 403
+
+def test_reads_are_shared_across_users_after_access_check(tmp_path):
+    asyncio.run(shared_scenario(os.path.join(tmp_path, "cache.db")))
@@ -0,0 +1,45 @@
+"""
+Date column detection and filtering on the detected format
+"""
+
+from datetime import date
+
+from utils.date_filter import filter_rows
+from utils.sheet_schema import detect_schema
+
+def forms_sheet():
+    """Responses the way Google Forms writes them, Timestamp first"""
+    return [["Timestamp", "Nama", "Nilai"]] + [
+        [f"{day}/10/2026 {hour}:03:22", f"siswa {day}", str(day)]
+        for day in range(1, 29)
+        for hour in (9, 14)
+    ]
+
+def test_detects_forms_timestamp_column():
+    schema = detect_schema(forms_sheet())
+    assert schema == {"date_column": 0, "date_format": "%d/%m/%Y %H:%M:%S", "confidence": 1.0}
+
+def test_detects_iso_datetime_column():
+    rows = [["id", "waktu"]] + [[str(i), f"2026-10-{i:02d} 23:59:59"] for i in range(1, 29)]
+    schema = detect_schema(rows)
+    assert schema["date_column"] == 1
+    assert schema["date_format"] == "%Y-%m-%d %H:%M:%S"
+
+def test_date_only_column_keeps_date_format():
+    rows = [["tanggal"]] + [[f"{i}/10/2026"] for i in range(1, 29)]
+    assert detect_schema(rows)["date_format"] == "%d/%m/%Y"
+
+def test_filters_timestamps_by_their_date():
+    rows = forms_sheet()[1:]
+    on_day = filter_rows(rows, 0, on=date(2026, 10, 17), date_format="%d/%m/%Y %H:%M:%S")
+    assert [row[0] for row in on_day] == ["17/10/2026 9:03:22", "17/10/2026 14:03:22"]
+
+    in_range = filter_rows(
+        rows, 0, start=date(2026, 10, 5), end=date(2026, 10, 6), date_format="%d/%m/%Y %H:%M:%S"
+    )
+    assert len(in_range) == 4
+
+def test_timestamps_are_day_first_without_a_format():
+    # Day-first like the date-only shape, not dateutil's month-first guess
+    rows = [["05/10/2026 14:03:22"], ["2026-10-05 08:00:00"], ["10/05/2026 14:03:22"]]
+    assert filter_rows(rows, 0, on=date(2026, 10, 5)) == rows[:2]
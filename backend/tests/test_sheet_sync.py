@@ -0,0 +1,92 @@
+"""
+Incremental sheet sync against an in-memory spreadsheet
+"""
+
+import asyncio
+import re
+
+from utils.sheet_sync import incremental_sync, sync_state
+
+BLOCK_ROWS = 100
+
+class FakeSheets:
+    """Serves A1 ranges of one sheet and records the calls made"""
+
+    def __init__(self, values):
+        self.values = values
+        self.calls = []
+
+    async def get_values(self, spreadsheet_id, range_, access_token):
+        self.calls.append("values")
+        return self.values
+
+    async def batch_get(self, spreadsheet_id, ranges, access_token):
+        self.calls.append("batchGet")
+        fetched = {}
+        for requested in ranges:
+            a1 = requested.split("!", 1)[1]
+            if a1 == "1:1":
+                fetched[requested] = self.values[:1]
+                continue
+            first, last = re.fullmatch(r"A(\d+):[A-Z]+(\d*)", a1).groups()
+            fetched[requested] = self.values[int(first) - 1:int(last) if last else None]
+        return fetched
+
+def sheet(rows):
+    return [["tanggal", "nilai"]] + [[f"r{i}", str(i)] for i in range(rows)]
+
+def sync(cached, current):
+    client = FakeSheets(current)
+    values, _, summary = asyncio.run(incremental_sync(
+        client, "sheet-id", "Sheet1", "token", cached,
+        sync_state(cached, BLOCK_ROWS, 1), block_rows=BLOCK_ROWS, full_every=50
+    ))
+    return values, summary, client.calls
+
+def test_appended_rows_fetch_only_the_tail():
+    cached = sheet(2000)
+    current = cached + [["new", "1"]] * 30
+    values, summary, calls = sync(cached, current)
+    assert values == current
+    assert summary["mode"] == "append"
+    assert calls == ["batchGet"]
+
+def test_trailing_delete_within_last_block():
+    cached = sheet(2000)
+    values, summary, _ = sync(cached, cached[:-50])
+    assert values == cached[:-50]
+    assert summary["mode"] == "tail"
+
+def test_trailing_delete_larger_than_last_block_falls_back_to_full():
+    cached = sheet(2000)
+    current = cached[:-150]
+    values, summary, calls = sync(cached, current)
+    assert len(values) - 1 == 1850
+    assert values == current
+    assert summary["mode"] == "full"
+    assert calls == ["batchGet", "values"]
+
+def test_mid_sheet_delete_falls_back_to_full():
+    cached = sheet(2000)
+    current = cached[:501] + cached[521:]
+    values, summary, _ = sync(cached, current)
+    assert values == current
+    assert summary["mode"] == "full"
+
+def test_middle_block_edit_shows_up_on_next_sync():
+    cached = sheet(2000)
+    current = [list(row) for row in cached]
+    current[10][1] = "edited"
+    values, summary, calls = sync(cached, current)
+    assert values == current
+    assert summary["mode"] == "full"
+    assert calls == ["batchGet", "values"]
+
+def test_edit_in_last_block_syncs_the_tail():
+    cached = sheet(2000)
+    current = [list(row) for row in cached]
+    current[1990][1] = "edited"
+    values, summary, calls = sync(cached, current)
+    assert values == current
+    assert summary["mode"] == "tail"
+    assert calls == ["batchGet"]
@@ -0,0 +1,84 @@
+"""
+Single-flight coalescing: one call per key, shared results and errors
+"""
+
+import asyncio
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flights = SingleFlight("test")
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "rows"
+
+        results = await asyncio.gather(*[flights.do("key", work) for _ in range(10)])
+        return calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert [value for value, _ in results] == ["rows"] * 10
+    assert sum(shared for _, shared in results) == 9
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    async def scenario():
+        flights = SingleFlight("test")
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.05)
+            return "rows"
+
+        leader = asyncio.ensure_future(flights.do("key", work))
+        await started.wait()
+        follower = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower, flights.stats()["cancelled"]
+
+    (value, shared), cancelled = asyncio.run(scenario())
+    assert value == "rows" and shared
+    assert cancelled == 0
+
+def test_error_reaches_every_waiter():
+    async def scenario():
+        flights = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        return await asyncio.gather(
+            *[flights.do("key", work) for _ in range(3)], return_exceptions=True
+        )
+
+    errors = asyncio.run(scenario())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+
+def test_last_waiter_leaving_cancels_the_call():
+    async def scenario():
+        flights = SingleFlight("test")
+        finished = False
+
+        async def work():
+            nonlocal finished
+            await asyncio.sleep(0.05)
+            finished = True
+
+        caller = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0.06)
+        return finished, flights.stats()["cancelled"]
+
+    assert asyncio.run(scenario()) == (False, 1)
@@ -0,0 +1,135 @@
+"""
+TTLStore expiry, replacement, eviction and removal on a fake clock
+"""
+
+import types
+
+import pytest
+
+from utils import ttl_store
+from utils.ttl_store import TTLStore
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ttl_store, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+def test_entries_expire_in_expiry_order(clock):
+    store = TTLStore(max_size=10, default_ttl=60)
+    store.set("c", 3, ttl=30)
+    store.set("a", 1, ttl=10)
+    store.set("b", 2, ttl=20)
+
+    clock.now += 10
+    assert store.get("a") is None
+    assert store.sweep() == 0  # get already removed it
+    assert dict(store.items()) == {"b": 2, "c": 3}
+
+    clock.now += 10
+    assert store.sweep() == 1
+    assert "b" not in store and store.get("c") == 3
+
+    clock.now += 10
+    assert store.sweep() == 1
+    assert len(store) == 0
+    assert store.stats()["expired"] == 3
+
+def test_default_ttl(clock):
+    store = TTLStore(max_size=10, default_ttl=60)
+    store.set("a", 1)
+    clock.now += 59.9
+    assert store.get("a") == 1
+    clock.now += 0.1
+    assert store.get("a") is None
+
+def test_resetting_a_key_outlives_its_stale_heap_entry(clock):
+    store = TTLStore(max_size=10, default_ttl=60)
+    store.set("a", 1, ttl=10)
+    store.set("a", 2, ttl=100)
+    assert store.stats()["heap_size"] == 2
+
+    # The first heap entry comes due but no longer describes "a"
+    clock.now += 50
+    assert store.sweep() == 0
+    assert store.get("a") == 2
+
+    clock.now += 50
+    assert store.sweep() == 1
+    assert store.get("a") is None
+
+def test_shortening_a_ttl_takes_effect(clock):
+    store = TTLStore(max_size=10, default_ttl=60)
+    store.set("a", 1, ttl=100)
+    store.set("a", 2, ttl=10)
+    clock.now += 10
+    assert store.sweep() == 1
+    assert len(store) == 0
+
+def test_full_store_sweeps_before_evicting(clock):
+    store = TTLStore(max_size=3, default_ttl=60)
+    store.set("old", 0, ttl=5)
+    store.set("a", 1, ttl=50)
+    store.set("b", 2, ttl=40)
+
+    clock.now += 5
+    store.set("c", 3)
+    assert dict(store.items()) == {"a": 1, "b": 2, "c": 3}
+    assert store.stats()["evicted"] == 0
+
+def test_full_store_evicts_the_entry_closest_to_expiry(clock):
+    store = TTLStore(max_size=3, default_ttl=60)
+    store.set("a", 1, ttl=50)
+    store.set("b", 2, ttl=40)
+    store.set("c", 3, ttl=45)
+    # "b" was soonest, but its re-set pushed it back: eviction skips the stale entry
+    store.set("b", 22, ttl=90)
+
+    store.set("d", 4)
+    assert dict(store.items()) == {"a": 1, "b": 22, "d": 4}
+    store.set("e", 5)
+    assert dict(store.items()) == {"b": 22, "d": 4, "e": 5}
+    assert store.stats()["evicted"] == 2
+
+def test_replacing_a_key_in_a_full_store_evicts_nothing(clock):
+    store = TTLStore(max_size=2, default_ttl=60)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.set("a", 11)
+    assert dict(store.items()) == {"a": 11, "b": 2}
+
+def test_pop_invalidates_an_entry(clock):
+    store = TTLStore(max_size=2, default_ttl=60)
+    store.set("a", 1, ttl=10)
+    assert store.pop("a") == 1
+    assert store.get("a") is None
+    assert store.pop("a") is None
+
+    # The popped entry's heap record must not expire a later "a"
+    store.set("a", 2, ttl=100)
+    clock.now += 10
+    assert store.sweep() == 0
+    assert store.get("a") == 2
+
+def test_pop_of_an_expired_entry_returns_none(clock):
+    store = TTLStore(max_size=2, default_ttl=60)
+    store.set("a", 1, ttl=10)
+    clock.now += 10
+    assert store.pop("a") is None
+    assert len(store) == 0
+
+def test_heap_is_compacted_when_keys_are_reset(clock):
+    store = TTLStore(max_size=10, default_ttl=60)
+    for i in range(1000):
+        store.set(i % 5, i)
+    stats = store.stats()
+    assert stats["entries"] == 5
+    assert stats["heap_size"] <= 2 * 5 + 64
+    assert dict(store.items()) == {0: 995, 1: 996, 2: 997, 3: 998, 4: 999}
@@ -0,0 +1,98 @@
+"""
+Authentication dependencies shared by the routers
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from fastapi import Depends, HTTPException, Request, status
+
+from config.settings import settings
+from utils import queries
+from utils.database import AsyncDatabase
+from utils.session import SessionManager
+
+session_manager = SessionManager()
+database = AsyncDatabase()
+
+class ProfileCache:
+    """Small LRU of user profiles with a short TTL (other workers may change the row)"""
+
+    def __init__(self, max_size: int, ttl: float):
+        """Initialize cache"""
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Get a cached profile"""
+        item = self._entries.get(user_id)
+        if item is None or item[1] <= time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return item[0]
+
+    def put(self, user_id: int, profile: Dict[str, Any]):
+        """Cache a profile, evicting the least recently used"""
+        self._entries[user_id] = (profile, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """Drop a profile after its users row changed"""
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters"""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+profile_cache = ProfileCache(
+    max_size=settings.PROFILE_CACHE_MAX_ENTRIES,
+    ttl=settings.PROFILE_CACHE_TTL_SECONDS
+)
+
+async def require_session(request: Request) -> Dict[str, Any]:
+    """Resolve the request's session (FastAPI caches this per request)"""
+    session_id = request.cookies.get("session_id")
+    if not session_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+
+    session = await session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session expired"
+        )
+
+    return session
+
+async def require_user_id(session: Dict[str, Any] = Depends(require_session)) -> int:
+    """Resolve the current user ID"""
+    return session["user_id"]
+
+async def get_profile(user_id: int) -> Optional[Dict[str, Any]]:
+    """Get a user profile through the profile cache"""
+    profile = profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    profile = await database.fetch_one(
+        queries.USER_PROFILE,
+        (user_id,)
+    )
+    if profile is not None:
+        profile_cache.put(user_id, profile)
+    return profile
+
+async def require_user(user_id: int = Depends(require_user_id)) -> Optional[Dict[str, Any]]:
+    """Resolve the current user's profile"""
+    return await get_profile(user_id)
@@ -0,0 +1,50 @@
+"""
+Conditional GET helpers (ETag / Last-Modified / 304)
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional, Dict, Any
+
+from fastapi import Response
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over everything the response body depends on"""
+    raw = "\x1f".join(str(part) for part in parts).encode()
+    return '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, per RFC 9110)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        (tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates
+    )
+
+def http_date(value: Optional[str]) -> Optional[str]:
+    """
+    Format a UTC timestamp as an HTTP date; accepts SQLite's
+    'YYYY-MM-DD HH:MM:SS' and RFC 3339 (Drive modifiedTime)
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return format_datetime(parsed.astimezone(timezone.utc), usegmt=True)
+
+def validators(etag: str, last_modified: Optional[str] = None) -> Dict[str, str]:
+    """Response headers carrying the validators"""
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+def not_modified(etag: str, last_modified: Optional[str] = None) -> Response:
+    """Empty 304 response"""
+    return Response(status_code=304, headers=validators(etag, last_modified))
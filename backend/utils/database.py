@@ -2,12 +2,187 @@
 Database initialization and management
 """
 
+import asyncio
 import sqlite3
 import os
-from typing import Optional, List, Dict, Any
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Optional, List, Dict, Any, Iterator, Callable, Tuple
 import json
 from datetime import datetime
 
+from utils.metrics import metrics, statement_label
+
+# Pragmas applied to every pooled connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA busy_timeout=5000",
+)
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections"""
+    
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        timeout: float = 10.0,
+        cached_statements: int = 256
+    ):
+        """Initialize pool (connections are opened lazily)"""
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "queries": 0,
+        }
+        self._started_at = time.monotonic()
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, opening one if the pool is not full"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.max_size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                started = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError("Timed out waiting for a database connection")
+                with self._lock:
+                    self._stats["waits"] += 1
+                    self._stats["wait_time"] += time.perf_counter() - started
+        with self._lock:
+            self._stats["checkouts"] += 1
+        return conn
+    
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put(conn)
+    
+    def discard(self, conn: sqlite3.Connection):
+        """Drop a broken connection instead of returning it"""
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager yielding a pooled connection"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+    
+    def record_query(self):
+        """Count an executed statement"""
+        with self._lock:
+            self._stats["queries"] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get pool statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._created
+        elapsed = time.monotonic() - self._started_at
+        stats["max_size"] = self.max_size
+        stats["idle"] = self._idle.qsize()
+        stats["in_use"] = stats["size"] - stats["idle"]
+        stats["queries_per_sec"] = stats["queries"] / elapsed if elapsed > 0 else 0.0
+        return stats
+    
+    def close_all(self):
+        """Close all idle connections"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+# One pool per database file, shared by every Database instance
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Get (or create) the shared pool for a database file"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(
+                db_path,
+                max_size=int(os.getenv("DB_POOL_SIZE", 8)),
+            )
+            _pools[key] = pool
+        return pool
+
+def query_timer(query: str):
+    """Time one statement into the per-statement metrics"""
+    return metrics.timer(
+        "db_query_duration_seconds",
+        (statement_label(query),),
+        errors="db_query_errors_total"
+    )
+
 class Database:
     """SQLite database management"""
     
@@ -16,6 +191,11 @@ class Database:
         self.db_path = db_path
         self.conn = None
     
+    @property
+    def pool(self) -> ConnectionPool:
+        """Shared connection pool for this database file"""
+        return get_pool(self.db_path)
+    
     def connect(self):
         """Create database connection"""
         self.conn = sqlite3.connect(self.db_path)
@@ -27,105 +207,134 @@ class Database:
         if self.conn:
             self.conn.close()
     
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        return self.pool.stats()
+    
     def init_db(self):
-        """Initialize database tables"""
-        conn = self.connect()
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
-                name TEXT NOT NULL,
-                picture TEXT,
-                google_id TEXT UNIQUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Spreadsheet links table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS spreadsheet_links (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                spreadsheet_id TEXT NOT NULL,
-                spreadsheet_name TEXT,
-                sheet_name TEXT,
-                link TEXT NOT NULL,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                UNIQUE(user_id, spreadsheet_id, sheet_name)
-            )
-        ''')
-        
-        # Sheet data cache table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sheet_data_cache (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                link_id INTEGER NOT NULL,
-                data TEXT NOT NULL,
-                last_fetched TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (link_id) REFERENCES spreadsheet_links(id)
-            )
-        ''')
-        
-        # Link history table for tracking changes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS link_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                link_id INTEGER NOT NULL,
-                action TEXT,
-                old_value TEXT,
-                new_value TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (link_id) REFERENCES spreadsheet_links(id)
-            )
-        ''')
-        
-        # Sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sessions (
-                id TEXT PRIMARY KEY,
-                user_id INTEGER NOT NULL,
-                access_token TEXT,
-                refresh_token TEXT,
-                expires_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Initialize database tables (apply pending schema migrations)"""
+        from utils.migrations import migrate
+        with self.pool.connection() as conn:
+            return migrate(conn)
     
     def execute(self, query: str, params: tuple = ()) -> Any:
         """Execute query"""
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        result = cursor.fetchall()
-        conn.close()
+        pool = self.pool
+        with pool.connection() as conn, query_timer(query):
+            cursor = conn.execute(query, params)
+            result = cursor.fetchall()
+            conn.commit()
+        pool.record_query()
         return result
     
+    def execute_batch(self, statements: List[Tuple[str, tuple]]) -> List[List[Dict]]:
+        """Execute several statements in one transaction; returns each one's rows"""
+        pool = self.pool
+        results = []
+        with pool.connection() as conn:
+            with conn:
+                for query, params in statements:
+                    with query_timer(query):
+                        rows = conn.execute(query, params).fetchall()
+                    results.append([dict(row) for row in rows])
+                    pool.record_query()
+        return results
+    
     def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict]:
         """Fetch single row"""
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        result = cursor.fetchone()
-        conn.close()
+        pool = self.pool
+        with pool.connection() as conn, query_timer(query):
+            result = conn.execute(query, params).fetchone()
+        pool.record_query()
         return dict(result) if result else None
     
     def fetch_all(self, query: str, params: tuple = ()) -> List[Dict]:
         """Fetch all rows"""
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        pool = self.pool
+        with pool.connection() as conn, query_timer(query):
+            results = conn.execute(query, params).fetchall()
+        pool.record_query()
         return [dict(row) for row in results]
+    
+    def fetch_rows(self, query: str, params: tuple = ()) -> Tuple[List[str], List[tuple]]:
+        """Fetch column names and plain row tuples, without building per-row dicts"""
+        pool = self.pool
+        with pool.connection() as conn, query_timer(query):
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(query, params).fetchall()
+            columns = [column[0] for column in cursor.description]
+        pool.record_query()
+        return columns, rows
+
+
+# Dedicated executor for database work, separate from the default loop executor
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the shared database executor"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("DB_POOL_SIZE", 8)),
+                thread_name_prefix="db",
+            )
+        return _executor
+
+class AsyncDatabase:
+    """Non-blocking Database wrapper for async routes"""
+    
+    def __init__(
+        self,
+        db_path: str = "spreadsheet_reader.db",
+        max_pending: int = int(os.getenv("DB_MAX_PENDING", 64))
+    ):
+        """Initialize async database"""
+        self.db = Database(db_path)
+        self.max_pending = max_pending
+        self._pending: Optional[asyncio.Semaphore] = None
+    
+    @property
+    def db_path(self) -> str:
+        """Path of the underlying database file"""
+        return self.db.db_path
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking database call on the database executor"""
+        if self._pending is None:
+            self._pending = asyncio.Semaphore(self.max_pending)
+        async with self._pending:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                get_executor(), partial(func, *args, **kwargs)
+            )
+    
+    async def init_db(self):
+        """Initialize database tables"""
+        return await self.run(self.db.init_db)
+    
+    async def execute(self, query: str, params: tuple = ()) -> Any:
+        """Execute query"""
+        return await self.run(self.db.execute, query, params)
+    
+    async def execute_batch(self, statements: List[Tuple[str, tuple]]) -> List[List[Dict]]:
+        """Execute several statements in one transaction; returns each one's rows"""
+        return await self.run(self.db.execute_batch, statements)
+    
+    async def fetch_one(self, query: str, params: tuple = ()) -> Optional[Dict]:
+        """Fetch single row"""
+        return await self.run(self.db.fetch_one, query, params)
+    
+    async def fetch_all(self, query: str, params: tuple = ()) -> List[Dict]:
+        """Fetch all rows"""
+        return await self.run(self.db.fetch_all, query, params)
+    
+    async def fetch_rows(self, query: str, params: tuple = ()) -> Tuple[List[str], List[tuple]]:
+        """Fetch column names and plain row tuples"""
+        return await self.run(self.db.fetch_rows, query, params)
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        return self.db.pool_stats()
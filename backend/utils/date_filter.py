@@ -0,0 +1,92 @@
+"""
+Vectorized date filtering for spreadsheet rows
+"""
+
+from datetime import date
+from typing import List, Optional, Sequence, Any, TYPE_CHECKING
+
+from utils.date_normalizer import DateNormalizer
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy is imported on first use: it is most of the app's import time and
+# nothing needs it until a sheet is filtered
+
+def parse_date_column(
+    values: Sequence[Any],
+    date_format: Optional[str] = None
+) -> "np.ndarray":
+    """
+    Convert a column of cell values to a datetime64[D] array
+    Each distinct value is parsed once (trying date_format first, when
+    known); unparseable cells become NaT.
+    """
+    import numpy as np
+
+    if len(values) == 0:
+        return np.empty(0, dtype="datetime64[D]")
+
+    # Dictionary-encode the column: distinct values plus one code per row
+    codes_by_value = {}
+    codes = np.fromiter(
+        (
+            codes_by_value.setdefault(value if isinstance(value, str) else "", len(codes_by_value))
+            for value in values
+        ),
+        dtype=np.intp,
+        count=len(values)
+    )
+    nat = np.datetime64("NaT", "D")
+    parsed = np.array(
+        [
+            np.datetime64(result, "D") if result else nat
+            for result in DateNormalizer.parse_many(codes_by_value, date_format)
+        ],
+        dtype="datetime64[D]"
+    )
+    return parsed[codes]
+
+def date_mask(
+    dates: "np.ndarray",
+    on: Optional[date] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> "np.ndarray":
+    """
+    Build a boolean mask selecting dates equal to `on`, or within the
+    inclusive range [start, end]. NaT never matches.
+    """
+    import numpy as np
+
+    if on is not None:
+        return dates == np.datetime64(on, "D")
+
+    mask = ~np.isnat(dates)
+    if start is not None:
+        mask &= dates >= np.datetime64(start, "D")
+    if end is not None:
+        mask &= dates <= np.datetime64(end, "D")
+    return mask
+
+def column_values(rows: Sequence[Sequence[Any]], column: int) -> List[Any]:
+    """Extract one column from ragged rows (missing trailing cells are None)"""
+    return [row[column] if len(row) > column else None for row in rows]
+
+def filter_rows(
+    rows: Sequence[Sequence[Any]],
+    date_column: int,
+    on: Optional[date] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    date_format: Optional[str] = None
+) -> List[Sequence[Any]]:
+    """Select the rows whose date column matches `on` or [start, end]"""
+    if not rows:
+        return []
+
+    import numpy as np
+
+    dates = parse_date_column(column_values(rows, date_column), date_format)
+    indices = np.flatnonzero(date_mask(dates, on=on, start=start, end=end))
+    return [rows[i] for i in indices]
@@ -0,0 +1,221 @@
+"""
+Date parsing for spreadsheet cells
+"""
+
+import re
+from datetime import datetime, date
+from functools import lru_cache
+from typing import List, Dict, Iterable, Optional, Callable
+
+class DateNormalizer:
+    """Normalize various date formats"""
+    
+    # Supported Indonesian month names
+    INDONESIAN_MONTHS = {
+        'januari': 1, 'februari': 2, 'maret': 3, 'april': 4,
+        'mei': 5, 'juni': 6, 'juli': 7, 'agustus': 8,
+        'september': 9, 'oktober': 10, 'november': 11, 'desember': 12,
+        'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'mei': 5, 'jun': 6,
+        'jul': 7, 'ags': 8, 'sep': 9, 'okt': 10, 'nov': 11, 'des': 12,
+    }
+    
+    INDONESIAN_DAYS = {
+        'senin': 0, 'selasa': 1, 'rabu': 2, 'kamis': 3,
+        'jumat': 4, 'sabtu': 5, 'minggu': 6,
+        'sen': 0, 'sel': 1, 'rab': 2, 'kam': 3,
+        'jum': 4, 'sab': 5, 'min': 6,
+    }
+    
+    # Numeric formats, same field patterns as strptime's %d, %m and %Y
+    _DAY = r'(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+    _MONTH = r'(1[0-2]|0[1-9]|[1-9])'
+    DMY_PATTERN = re.compile(_DAY + '/' + _MONTH + r'/(\d\d\d\d)')
+    ISO_PATTERN = re.compile(r'(\d\d\d\d)-' + _MONTH + '-' + _DAY)
+    # Timestamps (Google Forms writes "17/10/2026 14:03:22"), kept to the date
+    _TIME = r' ([01]?\d|2[0-3]):([0-5]\d):([0-5]\d)'
+    DMY_TIME_PATTERN = re.compile(DMY_PATTERN.pattern + _TIME)
+    ISO_TIME_PATTERN = re.compile(ISO_PATTERN.pattern + _TIME)
+    
+    # Every month name at every position (lookahead keeps overlapping hits)
+    MONTH_PATTERN = re.compile(
+        '(?=(' + '|'.join(sorted(INDONESIAN_MONTHS, key=len, reverse=True)) + '))'
+    )
+    DAY_NAME_PATTERN = re.compile(
+        '|'.join(sorted(INDONESIAN_DAYS, key=len, reverse=True))
+    )
+    
+    CACHE_SIZE = 4096
+    
+    # Formats a sheet's date column can be detected as, with their
+    # single-format parsers (which take stripped, lowercased strings)
+    FORMATS = {
+        '%d/%m/%Y': '_parse_dmy',
+        '%Y-%m-%d': '_parse_iso',
+        '%d/%m/%Y %H:%M:%S': '_parse_dmy_time',
+        '%Y-%m-%d %H:%M:%S': '_parse_iso_time',
+        'DD Bulan YYYY': '_parse_day_month_year',
+        'Hari, DD Bulan YYYY': '_parse_named_day',
+    }
+    
+    @staticmethod
+    def parse_date(date_str: str) -> datetime:
+        """
+        Parse various date formats robustly
+        Supports: 17/11/2025, 2025-11-17, 17 November 2025, Senin, 17 Nov 2025, etc.
+        """
+        if not date_str or not isinstance(date_str, str):
+            return None
+        
+        return DateNormalizer._parse_cached(date_str)
+    
+    @staticmethod
+    def parse_many(
+        date_strs: Iterable[str],
+        date_format: Optional[str] = None
+    ) -> List[Optional[date]]:
+        """
+        Parse a batch of date strings, parsing each distinct value once
+        With a known date_format (one of FORMATS) each value is tried with
+        that format's parser first; only outliers go through the full parse.
+        """
+        fast = DateNormalizer.format_parser(date_format)
+        parsed: Dict[str, Optional[date]] = {}
+        results = []
+        for date_str in date_strs:
+            if not date_str or not isinstance(date_str, str):
+                results.append(None)
+                continue
+            if date_str not in parsed:
+                result = fast(date_str.strip().lower()) if fast else None
+                if result is None:
+                    result = DateNormalizer._parse_cached(date_str)
+                parsed[date_str] = result
+            results.append(parsed[date_str])
+        return results
+    
+    @staticmethod
+    def format_parser(date_format: Optional[str]) -> Optional[Callable[[str], Optional[date]]]:
+        """Get the single-format parser for a FORMATS name (None if unknown)"""
+        name = DateNormalizer.FORMATS.get(date_format) if date_format else None
+        return getattr(DateNormalizer, name) if name else None
+    
+    @staticmethod
+    def _parse_dmy(date_str: str) -> Optional[date]:
+        """Parse a normalized "17/11/2025" """
+        match = DateNormalizer.DMY_PATTERN.fullmatch(date_str)
+        if match:
+            try:
+                return date(int(match[3]), int(match[2]), int(match[1]))
+            except ValueError:
+                pass
+        return None
+    
+    @staticmethod
+    def _parse_iso(date_str: str) -> Optional[date]:
+        """Parse a normalized "2025-11-17" """
+        match = DateNormalizer.ISO_PATTERN.fullmatch(date_str)
+        if match:
+            try:
+                return date(int(match[1]), int(match[2]), int(match[3]))
+            except ValueError:
+                pass
+        return None
+    
+    @staticmethod
+    def _parse_dmy_time(date_str: str) -> Optional[date]:
+        """Parse a normalized "17/11/2025 14:03:22" to its date"""
+        match = DateNormalizer.DMY_TIME_PATTERN.fullmatch(date_str)
+        if match:
+            try:
+                return date(int(match[3]), int(match[2]), int(match[1]))
+            except ValueError:
+                pass
+        return None
+    
+    @staticmethod
+    def _parse_iso_time(date_str: str) -> Optional[date]:
+        """Parse a normalized "2025-11-17 14:03:22" to its date"""
+        match = DateNormalizer.ISO_TIME_PATTERN.fullmatch(date_str)
+        if match:
+            try:
+                return date(int(match[1]), int(match[2]), int(match[3]))
+            except ValueError:
+                pass
+        return None
+    
+    @staticmethod
+    def _parse_day_month_year(date_str: str) -> Optional[date]:
+        """Parse a normalized "17 november 2025" or "17 nov 2025" """
+        parts = date_str.split()
+        if len(parts) != 3:
+            return None
+        month = DateNormalizer.INDONESIAN_MONTHS.get(parts[1])
+        if month is None or not parts[0].isdigit() or not parts[2].isdigit():
+            return None
+        try:
+            return date(int(parts[2]), month, int(parts[0]))
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _parse_named_day(date_str: str) -> Optional[date]:
+        """Parse a normalized "senin, 17 november 2025" """
+        day_name, comma, rest = date_str.partition(',')
+        if not comma or day_name.strip() not in DateNormalizer.INDONESIAN_DAYS:
+            return None
+        return DateNormalizer._parse_day_month_year(rest.strip())
+    
+    @staticmethod
+    @lru_cache(maxsize=CACHE_SIZE)
+    def _parse_cached(date_str: str) -> Optional[date]:
+        """Memoized single-pass parse of a raw cell value"""
+        return DateNormalizer._parse(date_str.strip().lower())
+    
+    @staticmethod
+    def _parse(date_str: str) -> Optional[date]:
+        """Parse a normalized (stripped, lowercased) date string"""
+        if not date_str:
+            return None
+        
+        # Format: "17/11/2025" or "2025-11-17", optionally with a time
+        result = (
+            DateNormalizer._parse_dmy(date_str) or DateNormalizer._parse_iso(date_str)
+            or DateNormalizer._parse_dmy_time(date_str) or DateNormalizer._parse_iso_time(date_str)
+        )
+        if result:
+            return result
+        
+        # Handle Indonesian date formats
+        # Format: "17 November 2025" or "17 Nov 2025"
+        months = {
+            DateNormalizer.INDONESIAN_MONTHS[m]
+            for m in DateNormalizer.MONTH_PATTERN.findall(date_str)
+        }
+        if months:
+            parts = date_str.split()
+            if len(parts) >= 3:
+                try:
+                    day = int(parts[0])
+                    year = int(parts[-1])
+                except ValueError:
+                    day = year = None
+                if day is not None:
+                    for month_num in sorted(months):
+                        try:
+                            return date(year, month_num, day)
+                        except ValueError:
+                            pass
+        
+        # If string starts with day name, try to extract date part
+        if DateNormalizer.DAY_NAME_PATTERN.match(date_str):
+            parts = date_str.split(',')
+            if len(parts) > 1:
+                return DateNormalizer._parse(parts[1].strip())
+        
+        # Last resort: use dateutil parser (imported on first use, it is
+        # slow to import and most cells never get this far)
+        from dateutil import parser as date_parser
+        try:
+            return date_parser.parse(date_str).date()
+        except:
+            return None
@@ -2,17 +2,23 @@
 Google OAuth utilities
 """
 
-import requests
+import base64
+import httpx
 import json
+import logging
 from typing import Optional, Dict, Tuple
 from config.settings import settings
+from utils.http_client import get_http_client
+from utils.rate_limit import google_scheduler, QuotaWaitTimeout
+
+logger = logging.getLogger(__name__)
 
 class GoogleOAuthHandler:
     """Handle Google OAuth authentication"""
     
     GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
-    GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
-    GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v1/userinfo"
+    GOOGLE_TOKEN_URL = settings.GOOGLE_TOKEN_URL
+    GOOGLE_USERINFO_URL = settings.GOOGLE_USERINFO_URL
     
     @staticmethod
     def get_authorization_url(state: str) -> str:
@@ -21,7 +27,7 @@ class GoogleOAuthHandler:
             "client_id": settings.GOOGLE_CLIENT_ID,
             "redirect_uri": settings.GOOGLE_REDIRECT_URI,
             "response_type": "code",
-            "scope": "openid email profile https://www.googleapis.com/auth/spreadsheets.readonly",
+            "scope": "openid email profile https://www.googleapis.com/auth/spreadsheets.readonly https://www.googleapis.com/auth/drive.metadata.readonly",
             "state": state,
             "access_type": "offline",
         }
@@ -30,7 +36,7 @@ class GoogleOAuthHandler:
         return f"{GoogleOAuthHandler.GOOGLE_AUTH_URL}?{query_string}"
     
     @staticmethod
-    def exchange_code_for_token(code: str) -> Optional[Dict]:
+    async def exchange_code_for_token(code: str) -> Optional[Dict]:
         """Exchange authorization code for access token"""
         try:
             data = {
@@ -41,23 +47,49 @@ class GoogleOAuthHandler:
                 "redirect_uri": settings.GOOGLE_REDIRECT_URI,
             }
             
-            response = requests.post(GoogleOAuthHandler.GOOGLE_TOKEN_URL, data=data)
+            # An authorization code is single-use, so only 429s are retried
+            response = await google_scheduler.send(
+                "oauth.token",
+                None,
+                lambda: get_http_client().post(GoogleOAuthHandler.GOOGLE_TOKEN_URL, data=data),
+                idempotent=False
+            )
             response.raise_for_status()
             return response.json()
-        except requests.RequestException as e:
-            print(f"Error exchanging code for token: {e}")
+        except (httpx.HTTPError, QuotaWaitTimeout) as e:
+            logger.warning(f"Error exchanging code for token: {e}")
+            return None
+    
+    @staticmethod
+    def id_token_email(token_data: Dict) -> Optional[str]:
+        """
+        Read the email claim of a token response's id_token
+        The token is not verified, so the email is only fit to key quota
+        buckets (get_user_info is what identifies the user).
+        """
+        try:
+            payload = token_data["id_token"].split(".")[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+            return claims.get("email") or None
+        except (KeyError, IndexError, AttributeError, ValueError, TypeError):
             return None
     
     @staticmethod
-    def get_user_info(access_token: str) -> Optional[Dict]:
-        """Get user information from access token"""
+    async def get_user_info(access_token: str, user: Optional[str] = None) -> Optional[Dict]:
+        """Get user information from access token, on user's quota bucket"""
         try:
             headers = {"Authorization": f"Bearer {access_token}"}
-            response = requests.get(GoogleOAuthHandler.GOOGLE_USERINFO_URL, headers=headers)
+            response = await google_scheduler.send(
+                "oauth.userinfo",
+                user,
+                lambda: get_http_client().get(
+                    GoogleOAuthHandler.GOOGLE_USERINFO_URL, headers=headers
+                )
+            )
             response.raise_for_status()
             return response.json()
-        except requests.RequestException as e:
-            print(f"Error getting user info: {e}")
+        except (httpx.HTTPError, QuotaWaitTimeout) as e:
+            logger.warning(f"Error getting user info: {e}")
             return None
     
     @staticmethod
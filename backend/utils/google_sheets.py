@@ -0,0 +1,140 @@
+"""
+Google Sheets API client
+"""
+
+from typing import Optional, Dict, List, Any
+from urllib.parse import quote
+import httpx
+
+from config.settings import settings
+from utils.http_client import get_http_client, close_http_client
+from utils.rate_limit import google_scheduler, QuotaWaitTimeout
+
+class SheetsAPIError(Exception):
+    """Error response from the Google Sheets API"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+def sheet_range(sheet_name: str, cells: Optional[str] = None) -> str:
+    """Build an A1 range for a sheet, quoting the sheet name"""
+    quoted = "'" + sheet_name.replace("'", "''") + "'"
+    return f"{quoted}!{cells}" if cells else quoted
+
+class GoogleSheetsClient:
+    """Async Sheets API client over a shared keep-alive connection pool"""
+
+    def __init__(self, base_url: Optional[str] = None, drive_url: Optional[str] = None):
+        """Initialize client"""
+        self.base_url = (base_url or settings.GOOGLE_SHEETS_API_URL).rstrip("/")
+        self.drive_url = (drive_url or settings.GOOGLE_DRIVE_API_URL).rstrip("/")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared HTTP client"""
+        return get_http_client()
+
+    async def aclose(self):
+        """Close the HTTP connection pool"""
+        await close_http_client()
+
+    async def _get(
+        self,
+        api: str,
+        path: str,
+        access_token: str,
+        params: Any = None,
+        base_url: Optional[str] = None,
+        user: Optional[str] = None
+    ) -> Dict:
+        """
+        Send an authenticated GET request and decode the JSON body
+        Calls are paced by the quota scheduler, which retries 429/5xx;
+        user (the app's user id) picks the per-user quota bucket.
+        """
+        try:
+            response = await google_scheduler.send(
+                api,
+                user,
+                lambda: self.client.get(
+                    f"{base_url or self.base_url}/{path}",
+                    params=params,
+                    headers={"Authorization": f"Bearer {access_token}"},
+                )
+            )
+        except QuotaWaitTimeout as e:
+            raise SheetsAPIError(429, str(e))
+        except httpx.HTTPError as e:
+            raise SheetsAPIError(502, f"Google Sheets request failed: {e}")
+
+        if response.status_code != 200:
+            try:
+                message = response.json()["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = response.text
+            raise SheetsAPIError(response.status_code, message)
+
+        return response.json()
+
+    async def get_values(
+        self,
+        spreadsheet_id: str,
+        range_: str,
+        access_token: str,
+        user: Optional[str] = None
+    ) -> List[List[Any]]:
+        """Get the values of a single range"""
+        data = await self._get(
+            "sheets.values.get",
+            f"{spreadsheet_id}/values/{quote(range_, safe='')}",
+            access_token,
+            user=user
+        )
+        return data.get("values", [])
+
+    async def batch_get(
+        self,
+        spreadsheet_id: str,
+        ranges: List[str],
+        access_token: str,
+        user: Optional[str] = None
+    ) -> Dict[str, List[List[Any]]]:
+        """Get several ranges of one spreadsheet in a single round trip"""
+        if not ranges:
+            return {}
+
+        data = await self._get(
+            "sheets.values.batchGet",
+            f"{spreadsheet_id}/values:batchGet",
+            access_token,
+            params=[("ranges", r) for r in ranges],
+            user=user,
+        )
+        value_ranges = data.get("valueRanges", [])
+
+        # valueRanges come back in request order
+        return {
+            requested: value_range.get("values", [])
+            for requested, value_range in zip(ranges, value_ranges)
+        }
+
+    async def get_modified_time(
+        self,
+        spreadsheet_id: str,
+        access_token: str,
+        user: Optional[str] = None
+    ) -> Optional[str]:
+        """Get the spreadsheet file's modifiedTime (a cheap metadata call)"""
+        data = await self._get(
+            "drive.files.get",
+            spreadsheet_id,
+            access_token,
+            params={"fields": "modifiedTime"},
+            base_url=self.drive_url,
+            user=user,
+        )
+        return data.get("modifiedTime")
+
+sheets_client = GoogleSheetsClient()
@@ -0,0 +1,47 @@
+"""
+Shared outbound HTTP connection pool
+"""
+
+import asyncio
+import time
+from typing import Optional
+import httpx
+
+from config.settings import settings
+from utils.metrics import metrics
+
+_client: Optional[httpx.AsyncClient] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared keep-alive client for calls to Google
+    Pooled connections are bound to one event loop, so a new client is
+    opened if the running loop changes.
+    """
+    global _client, _loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _loop is not loop:
+        _loop = loop
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+async def close_http_client():
+    """Close the shared connection pool"""
+    global _client, _loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _loop = None
+
+def record_google_call(api: str, started: float, error: Optional[str] = None):
+    """Record an outbound Google call's latency (and error status, if any)"""
+    metrics.observe("google_request_duration_seconds", (api,), time.perf_counter() - started)
+    if error is not None:
+        metrics.inc("google_request_errors_total", (api, error))
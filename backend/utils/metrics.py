@@ -0,0 +1,254 @@
+"""
+In-process metrics with Prometheus text exposition
+
+Every thread records into its own shard (a plain dict), so the hot path
+takes no locks; a scrape sums the shards. Values are per worker process,
+which is how Prometheus expects multi-process servers to be scraped.
+"""
+
+import bisect
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Optional, Dict, List, Any, Callable, Iterable, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help, label names, buckets)
+METRICS: Dict[str, Tuple[str, str, Tuple[str, ...], Optional[Tuple[float, ...]]]] = {
+    "http_request_duration_seconds": (
+        "histogram", "HTTP request latency by route", ("method", "route"), LATENCY_BUCKETS
+    ),
+    "http_requests_total": (
+        "counter", "HTTP requests by route and status", ("method", "route", "status"), None
+    ),
+    "http_requests_in_flight": (
+        "gauge", "HTTP requests currently being served", (), None
+    ),
+    "db_query_duration_seconds": (
+        "histogram", "Database statement latency by statement", ("statement",), LATENCY_BUCKETS
+    ),
+    "db_query_errors_total": (
+        "counter", "Database statements that raised", ("statement",), None
+    ),
+    "google_request_duration_seconds": (
+        "histogram", "Outbound Google API latency", ("api",), LATENCY_BUCKETS
+    ),
+    "google_request_errors_total": (
+        "counter", "Outbound Google API errors", ("api", "status"), None
+    ),
+    "google_queue_wait_seconds": (
+        "histogram", "Time outbound Google calls waited for quota", ("priority",), LATENCY_BUCKETS
+    ),
+    "google_retries_total": (
+        "counter", "Outbound Google calls retried after a 429, 5xx or transport error", ("api",), None
+    ),
+    "singleflight_calls_total": (
+        "counter", "Coalesced calls by role (leader ran it, shared awaited it)", ("group", "role"), None
+    ),
+    "singleflight_waiters": (
+        "gauge", "Callers currently awaiting an in-flight call", ("group",), None
+    ),
+    "singleflight_cancelled_total": (
+        "counter", "In-flight calls cancelled after every caller went away", ("group",), None
+    ),
+}
+
+class MetricsRegistry:
+    """Lock-free recording into per-thread shards"""
+
+    def __init__(self):
+        """Initialize registry"""
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, Tuple[str, ...]], Any]] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # list.append is atomic; shards are never removed
+            self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Tuple[str, ...] = (), amount: float = 1):
+        """Add to a counter or gauge"""
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Tuple[str, ...], value: float):
+        """Record one histogram observation"""
+        shard = self._shard()
+        key = (name, labels)
+        series = shard.get(key)
+        if series is None:
+            buckets = METRICS[name][3]
+            # bucket counts, then +Inf, sum
+            series = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        series[bisect.bisect_left(METRICS[name][3], value)] += 1
+        series[-1] += value
+
+    def timer(
+        self,
+        name: str,
+        labels: Tuple[str, ...] = (),
+        errors: Optional[str] = None
+    ) -> "Timer":
+        """Context manager observing its block's duration (and counting errors if it raises)"""
+        return Timer(self, name, labels, errors)
+
+    def register_collector(self, collector: Callable):
+        """
+        Add a callback run at scrape time; it yields
+        (name, type, help, labels, value) samples
+        """
+        self._collectors.append(collector)
+
+    def _merged(self) -> Dict[Tuple[str, Tuple[str, ...]], Any]:
+        merged: Dict[Tuple[str, Tuple[str, ...]], Any] = {}
+        for shard in list(self._shards):
+            for key, value in list(shard.items()):
+                if isinstance(value, list):
+                    total = merged.setdefault(key, [0] * len(value))
+                    for i, item in enumerate(value):
+                        total[i] += item
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self, extra: Iterable[Tuple[str, str, str, Dict[str, str], float]] = ()) -> str:
+        """Render every metric (plus extra collector-style samples) in the Prometheus text format"""
+        merged = self._merged()
+        lines: List[str] = []
+
+        for name, (kind, help_text, label_names, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            series = sorted(
+                (labels, value) for (metric, labels), value in merged.items() if metric == name
+            )
+            if not series and not label_names:
+                series = [((), 0)]
+            for labels, value in series:
+                pairs = list(zip(label_names, labels))
+                if kind != "histogram":
+                    lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float("inf"),), value[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_labels(pairs + [('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(pairs)} {cumulative}")
+
+        seen = set()
+        samples = [sample for collector in self._collectors for sample in collector()]
+        for name, kind, help_text, labels, value in samples + list(extra):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{_labels(list(labels.items()))} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+class Timer:
+    """Observe a block's duration, and count an error if it raises"""
+
+    __slots__ = ("registry", "name", "labels", "errors", "started")
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        labels: Tuple[str, ...],
+        errors: Optional[str] = None
+    ):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.errors = errors
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.name, self.labels, time.perf_counter() - self.started)
+        if exc_type is not None and self.errors:
+            self.registry.inc(self.errors, self.labels)
+        return False
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+(\w+)", re.IGNORECASE)
+
+@lru_cache(maxsize=1024)
+def statement_label(query: str) -> str:
+    """Reduce a SQL statement to a low-cardinality label such as 'SELECT users'"""
+    words = query.split(None, 1)
+    if not words:
+        return "EMPTY"
+    match = _STATEMENT_TABLE.search(query)
+    return f"{words[0].upper()} {match.group(1)}" if match else words[0].upper()
+
+def route_label(scope) -> str:
+    """
+    The matched route's path template; unmatched paths share one label
+    to bound cardinality
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Newer FastAPI versions keep included routers nested, so the route's
+    # own path lacks the include prefix; the effective context has it
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    return getattr(context, "path", None) or route.path
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests"""
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.inc("http_requests_in_flight")
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.inc("http_requests_in_flight", amount=-1)
+            path = route_label(scope)
+            method = scope["method"]
+            registry.observe(
+                "http_request_duration_seconds", (method, path), time.perf_counter() - started
+            )
+            registry.inc("http_requests_total", (method, path, str(status_code)))
+
+metrics = MetricsRegistry()
@@ -0,0 +1,170 @@
+"""
+Versioned schema migrations
+"""
+
+import sqlite3
+from typing import List, Tuple
+
+# (version, description, statements); append new migrations, never edit old ones
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "initial schema", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            picture TEXT,
+            google_id TEXT UNIQUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS spreadsheet_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            spreadsheet_id TEXT NOT NULL,
+            spreadsheet_name TEXT,
+            sheet_name TEXT,
+            link TEXT NOT NULL,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            UNIQUE(user_id, spreadsheet_id, sheet_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sheet_data_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            last_fetched TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (link_id) REFERENCES spreadsheet_links(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS link_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            link_id INTEGER NOT NULL,
+            action TEXT,
+            old_value TEXT,
+            new_value TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (link_id) REFERENCES spreadsheet_links(id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            access_token TEXT,
+            refresh_token TEXT,
+            expires_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        ''',
+    ]),
+    (2, "indexes for link listing, history and cache lookups", [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_spreadsheet_links_user_active_updated
+        ON spreadsheet_links (user_id, is_active, updated_at)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_link_history_link_timestamp
+        ON link_history (link_id, timestamp)
+        ''',
+        # Keep only the newest cache row per link before enforcing uniqueness
+        '''
+        DELETE FROM sheet_data_cache
+        WHERE id NOT IN (SELECT MAX(id) FROM sheet_data_cache GROUP BY link_id)
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_sheet_data_cache_link
+        ON sheet_data_cache (link_id)
+        ''',
+    ]),
+    (3, "shared sessions and OAuth states", [
+        "ALTER TABLE sessions ADD COLUMN email TEXT",
+        '''
+        CREATE INDEX IF NOT EXISTS idx_sessions_expires
+        ON sessions (expires_at)
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS oauth_states (
+            state TEXT PRIMARY KEY,
+            expires_at TIMESTAMP NOT NULL
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_oauth_states_expires
+        ON oauth_states (expires_at)
+        ''',
+    ]),
+    (4, "indexes for the prefetch scheduler", [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_spreadsheet_links_active_updated
+        ON spreadsheet_links (is_active, updated_at)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_sessions_user_expires
+        ON sessions (user_id, expires_at)
+        ''',
+    ]),
+    (5, "detected date column and format per link", [
+        "ALTER TABLE spreadsheet_links ADD COLUMN date_column INTEGER",
+        "ALTER TABLE spreadsheet_links ADD COLUMN date_format TEXT",
+    ]),
+    (6, "per-link cache lifetime", [
+        "ALTER TABLE spreadsheet_links ADD COLUMN cache_ttl_seconds INTEGER",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn: sqlite3.Connection) -> int:
+    """Get the applied schema version (0 for a new database)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Apply pending migrations, each in its own transaction; returns the new version
+    The version is mirrored into PRAGMA user_version, a header read, so
+    an up-to-date database is recognised without running any DDL.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= LATEST_VERSION:
+        return version
+
+    version = current_version(conn)
+    conn.commit()
+
+    for number, description, statements in MIGRATIONS:
+        if number <= version:
+            continue
+        with conn:
+            # Lock out other workers, then re-check what they may have applied
+            conn.execute("BEGIN IMMEDIATE")
+            if current_version(conn) >= number:
+                version = number
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (number, description)
+            )
+        version = number
+
+    # Databases migrated before user_version was kept get it set here
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+    return version
@@ -0,0 +1,87 @@
+"""
+Keyset pagination and column projection helpers
+"""
+
+import base64
+import json
+from typing import Optional, List, Dict, Any, Sequence, Tuple
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row on a page"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """Decode a cursor back into its sort key, one value of each type"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        # Exact types: JSON true would otherwise pass for an int id
+        or any(type(value) is not expected for value, expected in zip(values, types))
+    ):
+        raise ValueError("Invalid cursor")
+    return values
+
+def select_columns(
+    fields: Optional[str],
+    allowed: Sequence[str],
+    keys: Sequence[str]
+) -> Tuple[List[str], List[str]]:
+    """
+    Resolve a comma-separated fields= projection
+    Returns the columns to select (always including the sort keys, which
+    the next cursor needs) and the columns to return, which are a prefix
+    of the selected ones.
+    """
+    if not fields:
+        return list(allowed), list(allowed)
+
+    wanted = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in wanted if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    wanted = list(dict.fromkeys(wanted))
+    return wanted + [key for key in keys if key not in wanted], wanted
+
+def paginate(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    keys: Sequence[str],
+    output: Sequence[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Trim a limit + 1 fetch to one page, returning it with the next cursor"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][key] for key in keys])
+
+    if rows and len(output) != len(rows[0]):
+        rows = [{column: row[column] for column in output} for row in rows]
+    return rows, next_cursor
+
+def paginate_columnar(
+    columns: Sequence[str],
+    rows: List[tuple],
+    limit: int,
+    keys: Sequence[str],
+    output: Sequence[str]
+) -> Tuple[List[tuple], Optional[str]]:
+    """
+    paginate() for row tuples; output must be a prefix of columns, as
+    select_columns() returns them
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][columns.index(key)] for key in keys])
+
+    if len(output) != len(columns):
+        width = len(output)
+        rows = [row[:width] for row in rows]
+    return rows, next_cursor
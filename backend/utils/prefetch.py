@@ -0,0 +1,150 @@
+"""
+Background prefetch of active links into the sheet cache
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, date, time as dtime
+from typing import Optional, Dict, List, Any
+
+from config.settings import settings
+from utils import queries
+from utils.database import AsyncDatabase
+from utils.date_filter import filter_rows
+from utils.google_sheets import sheet_range
+from utils.rate_limit import background_priority
+from utils.sheet_schema import resolve_schema, save_link_schema
+from utils.sheet_cache import SheetCache, sheet_cache
+
+logger = logging.getLogger(__name__)
+
+def _parse_clock(value: str) -> dtime:
+    hours, minutes = value.split(":")
+    return dtime(int(hours), int(minutes))
+
+class Prefetcher:
+    """
+    Warm the sheet cache for active links ahead of the morning peak
+    During the configured window every active link whose owner has a
+    live session is read through the cache once per interval: cold links
+    are fetched, stale ones revalidated, fresh ones cost nothing. Each
+    run is bounded by a concurrency limit, a link cap and a time budget.
+    """
+
+    def __init__(
+        self,
+        database: Optional[AsyncDatabase] = None,
+        cache: Optional[SheetCache] = None
+    ):
+        """Initialize prefetcher"""
+        self.database = database or AsyncDatabase()
+        self.cache = cache or sheet_cache
+        self.window_start = _parse_clock(settings.PREFETCH_WINDOW_START)
+        self.window_end = _parse_clock(settings.PREFETCH_WINDOW_END)
+        self.concurrency = settings.PREFETCH_CONCURRENCY
+        self.jitter = settings.PREFETCH_JITTER_SECONDS
+        self.budget = settings.PREFETCH_BUDGET_SECONDS
+        self.max_links = settings.PREFETCH_MAX_LINKS
+        self.runs: deque = deque(maxlen=20)
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        """Check whether the local time is inside the prefetch window"""
+        clock = (now or datetime.now()).time()
+        return self.window_start <= clock < self.window_end
+
+    async def active_links(self) -> List[Dict[str, Any]]:
+        """Get active links with an access token from their owner's newest live session"""
+        return await self.database.fetch_all(
+            queries.PREFETCH_LINKS,
+            (datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"), self.max_links)
+        )
+
+    async def _warm(self, link: Dict[str, Any], today: date) -> float:
+        """Read one link through the cache and pre-parse today's filter"""
+        started = time.perf_counter()
+        # Queue behind interactive requests for Google API quota
+        with background_priority():
+            values = await self.cache.get_values(
+                link["id"],
+                link["spreadsheet_id"],
+                sheet_range(link["sheet_name"]),
+                link["access_token"],
+                ttl=link["cache_ttl_seconds"],
+                user=str(link["user_id"])
+            )
+        # Detects the link's date column once, before anyone asks for it
+        column, date_format, changed = resolve_schema(
+            values, link["date_column"], link["date_format"]
+        )
+        if changed:
+            await save_link_schema(self.database, link["id"], column, date_format)
+        # Fills the date parser's memo for the dashboard's default filter
+        await asyncio.to_thread(
+            filter_rows, values[1:], column, today, date_format=date_format
+        )
+        return time.perf_counter() - started
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Prefetch every active link once, within the run's budget"""
+        started = time.perf_counter()
+        deadline = started + self.budget
+        today = datetime.now().date()
+        links = await self.active_links()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timings: List[float] = []
+        counts = {"warmed": 0, "errors": 0, "skipped": 0}
+
+        async def warm(link):
+            # Spread requests out so runs on several workers do not line up
+            await asyncio.sleep(random.uniform(0, self.jitter))
+            async with semaphore:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    counts["skipped"] += 1
+                    return
+                try:
+                    timings.append(await asyncio.wait_for(self._warm(link, today), remaining))
+                    counts["warmed"] += 1
+                except asyncio.TimeoutError:
+                    counts["skipped"] += 1
+                except Exception as e:
+                    counts["errors"] += 1
+                    logger.warning(f"Prefetch of link {link['id']} failed: {e}")
+
+        await asyncio.gather(*(warm(link) for link in links))
+
+        timings.sort()
+        run = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "links": len(links),
+            **counts,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "p50_ms": round(timings[len(timings) // 2] * 1000, 1) if timings else None,
+            "max_ms": round(timings[-1] * 1000, 1) if timings else None,
+        }
+        self.runs.append(run)
+        logger.info(f"Prefetch run: {run}")
+        return run
+
+    async def run_background(self):
+        """Prefetch once per interval while inside the window, until cancelled"""
+        while True:
+            if self.in_window():
+                try:
+                    await self.run_once()
+                except Exception as e:
+                    logger.error(f"Error prefetching links: {e}")
+            await asyncio.sleep(settings.PREFETCH_INTERVAL_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the window and recent run timings"""
+        return {
+            "window": [settings.PREFETCH_WINDOW_START, settings.PREFETCH_WINDOW_END],
+            "interval_seconds": settings.PREFETCH_INTERVAL_SECONDS,
+            "runs": list(self.runs),
+        }
+
+prefetcher = Prefetcher()
@@ -0,0 +1,154 @@
+"""
+SQL issued by the routers and services
+
+Every statement lives here so utils.query_plans checks exactly what the
+application runs. Queries whose text depends on the request are built by
+the functions at the bottom.
+"""
+
+from typing import Sequence
+
+# users; signing in refreshes the profile from Google's userinfo
+UPSERT_USER = """
+    INSERT INTO users (email, name, picture, google_id)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (email) DO UPDATE
+    SET name = excluded.name, picture = excluded.picture,
+        google_id = excluded.google_id, updated_at = CURRENT_TIMESTAMP
+    RETURNING id
+"""
+
+USER_PROFILE = "SELECT id, email, name, picture FROM users WHERE id = ?"
+
+# spreadsheet_links
+LINK_ID_BY_SHEET = """
+    SELECT id FROM spreadsheet_links
+    WHERE user_id = ? AND spreadsheet_id = ? AND sheet_name = ?
+"""
+
+INSERT_LINK = """
+    INSERT INTO spreadsheet_links
+    (user_id, spreadsheet_id, spreadsheet_name, sheet_name, link)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+NEWEST_LINK = """
+    SELECT * FROM spreadsheet_links
+    WHERE user_id = ? AND spreadsheet_id = ? AND sheet_name = ?
+    ORDER BY created_at DESC LIMIT 1
+"""
+
+# Index-only aggregate that changes whenever any page of the list could
+LINKS_VERSION = """
+    SELECT MAX(updated_at) AS updated_at, COUNT(*) AS total,
+           MAX(id) AS max_id, SUM(is_active) AS active
+    FROM spreadsheet_links WHERE user_id = ?
+"""
+
+OWNED_LINK = "SELECT * FROM spreadsheet_links WHERE id = ? AND user_id = ?"
+
+OWNED_LINK_ID = "SELECT id FROM spreadsheet_links WHERE id = ? AND user_id = ?"
+
+SOFT_DELETE_LINK = """
+    UPDATE spreadsheet_links SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?
+"""
+
+ACTIVE_LINK = """
+    SELECT id, date_column, date_format, cache_ttl_seconds FROM spreadsheet_links
+    WHERE user_id = ? AND spreadsheet_id = ? AND sheet_name = ? AND is_active = 1
+"""
+
+SAVE_LINK_SCHEMA = "UPDATE spreadsheet_links SET date_column = ?, date_format = ? WHERE id = ?"
+
+SET_LINK_TTL = "UPDATE spreadsheet_links SET cache_ttl_seconds = ? WHERE id = ?"
+
+# Active links with an access token from their owner's newest live session
+PREFETCH_LINKS = """
+    SELECT l.id, l.user_id, l.spreadsheet_id, l.sheet_name, l.date_column,
+           l.date_format, l.cache_ttl_seconds, s.access_token
+    FROM spreadsheet_links l
+    JOIN sessions s ON s.id = (
+        SELECT id FROM sessions
+        WHERE user_id = l.user_id AND expires_at > ?
+        ORDER BY expires_at DESC LIMIT 1
+    )
+    WHERE l.is_active = 1
+    ORDER BY l.updated_at DESC
+    LIMIT ?
+"""
+
+# link_history
+INSERT_LINK_HISTORY = """
+    INSERT INTO link_history (link_id, action, old_value, new_value)
+    VALUES (?, ?, ?, ?)
+"""
+
+# sheet_data_cache; freshness as a Unix time (last_fetched is written in UTC)
+CACHED_SHEET = """
+    SELECT data, CAST(strftime('%s', last_fetched) AS REAL) AS fetched_at
+    FROM sheet_data_cache WHERE link_id = ?
+"""
+
+STORE_CACHED_SHEET = """
+    INSERT INTO sheet_data_cache (link_id, data) VALUES (?, ?)
+    ON CONFLICT (link_id) DO UPDATE
+    SET data = excluded.data, last_fetched = CURRENT_TIMESTAMP
+"""
+
+TOUCH_CACHED_SHEET = "UPDATE sheet_data_cache SET last_fetched = CURRENT_TIMESTAMP WHERE link_id = ?"
+
+DELETE_CACHED_SHEET = "DELETE FROM sheet_data_cache WHERE link_id = ?"
+
+# sessions and oauth_states
+INSERT_SESSION = """
+    INSERT OR REPLACE INTO sessions
+    (id, user_id, email, access_token, refresh_token, expires_at, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+LIVE_SESSION = """
+    SELECT user_id, email, access_token, refresh_token, expires_at, created_at
+    FROM sessions WHERE id = ? AND expires_at > ?
+"""
+
+DELETE_SESSION = "DELETE FROM sessions WHERE id = ?"
+
+COUNT_LIVE_SESSIONS = "SELECT COUNT(*) AS live FROM sessions WHERE expires_at > ?"
+
+SWEEP_SESSIONS = "DELETE FROM sessions WHERE expires_at <= ?"
+
+INSERT_STATE = "INSERT OR REPLACE INTO oauth_states (state, expires_at) VALUES (?, ?)"
+
+CONSUME_STATE = "DELETE FROM oauth_states WHERE state = ? AND expires_at > ? RETURNING state"
+
+SWEEP_STATES = "DELETE FROM oauth_states WHERE expires_at <= ?"
+
+def bulk_insert_links(rows: int) -> str:
+    """Multi-row link insert that skips existing links and returns the new ones"""
+    return f"""
+        INSERT INTO spreadsheet_links
+        (user_id, spreadsheet_id, spreadsheet_name, sheet_name, link)
+        VALUES {", ".join(["(?, ?, ?, ?, ?)"] * rows)}
+        ON CONFLICT(user_id, spreadsheet_id, sheet_name) DO NOTHING
+        RETURNING *
+    """
+
+def links_page(columns: Sequence[str], after: bool) -> str:
+    """One page of a user's active links, newest first, optionally after a cursor"""
+    return f"""
+        SELECT {", ".join(columns)} FROM spreadsheet_links
+        WHERE user_id = ? AND is_active = 1
+        {"AND (updated_at, id) < (?, ?)" if after else ""}
+        ORDER BY updated_at DESC, id DESC
+        LIMIT ?
+    """
+
+def history_page(columns: Sequence[str], after: bool) -> str:
+    """One page of a link's history, newest first, optionally after a cursor"""
+    return f"""
+        SELECT {", ".join(columns)} FROM link_history
+        WHERE link_id = ?
+        {"AND (timestamp, id) < (?, ?)" if after else ""}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT ?
+    """
@@ -0,0 +1,93 @@
+"""
+Query plan regression checks
+
+Runs EXPLAIN QUERY PLAN for every query in utils.queries against a
+migrated database and reports any that fall back to a full table scan
+or a temporary B-tree. Run with: python -m utils.query_plans
+"""
+
+import sqlite3
+import sys
+import tempfile
+import os
+from typing import List, Tuple
+
+from utils import queries
+from utils.migrations import migrate
+
+NOW = "2025-01-01 00:00:00"
+
+# (name, query, sample params) for every query the application issues
+QUERIES: List[Tuple[str, str, tuple]] = [
+    ("auth.upsert_user", queries.UPSERT_USER, ("a@b", "", "", "")),
+    ("auth.me", queries.USER_PROFILE, (1,)),
+    ("links.find_duplicate", queries.LINK_ID_BY_SHEET, (1, "id", "Sheet1")),
+    ("links.insert", queries.INSERT_LINK, (1, "id", "name", "Sheet1", "link")),
+    (
+        "links.bulk_insert",
+        queries.bulk_insert_links(2),
+        (1, "id", "name", "Sheet1", "link", 1, "id2", "name", "Sheet1", "link")
+    ),
+    ("links.newest", queries.NEWEST_LINK, (1, "id", "Sheet1")),
+    ("links.version", queries.LINKS_VERSION, (1,)),
+    ("links.list", queries.links_page(("id", "updated_at"), False), (1, 51)),
+    ("links.list_after", queries.links_page(("*",), True), (1, NOW, 10, 51)),
+    ("links.owned_id", queries.OWNED_LINK_ID, (1, 1)),
+    ("links.owned", queries.OWNED_LINK, (1, 1)),
+    ("links.soft_delete", queries.SOFT_DELETE_LINK, (1,)),
+    ("links.insert_history", queries.INSERT_LINK_HISTORY, (1, "deleted", "old", None)),
+    ("links.history", queries.history_page(("*",), False), (1, 51)),
+    ("links.history_after", queries.history_page(("id", "timestamp"), True), (1, NOW, 10, 51)),
+    ("links.save_schema", queries.SAVE_LINK_SCHEMA, (0, "%d/%m/%Y", 1)),
+    ("links.set_ttl", queries.SET_LINK_TTL, (600, 1)),
+    ("sheets.active_link", queries.ACTIVE_LINK, (1, "id", "Sheet1")),
+    ("prefetch.active_links", queries.PREFETCH_LINKS, (NOW, 500)),
+    ("cache.load", queries.CACHED_SHEET, (1,)),
+    ("cache.store", queries.STORE_CACHED_SHEET, (1, b"")),
+    ("cache.synced_history", queries.INSERT_LINK_HISTORY, (1, "synced", None, "{}")),
+    ("cache.touch", queries.TOUCH_CACHED_SHEET, (1,)),
+    ("cache.invalidate", queries.DELETE_CACHED_SHEET, (1,)),
+    (
+        "sessions.insert",
+        queries.INSERT_SESSION,
+        ("sid", 1, "a@b", "token", None, NOW, NOW)
+    ),
+    ("sessions.get", queries.LIVE_SESSION, ("sid", NOW)),
+    ("sessions.count_live", queries.COUNT_LIVE_SESSIONS, (NOW,)),
+    ("sessions.delete", queries.DELETE_SESSION, ("sid",)),
+    ("sessions.sweep", queries.SWEEP_SESSIONS, (NOW,)),
+    ("states.insert", queries.INSERT_STATE, ("state", NOW)),
+    ("states.consume", queries.CONSUME_STATE, ("state", NOW)),
+    ("states.sweep", queries.SWEEP_STATES, (NOW,)),
+]
+
+def plan_problems(conn: sqlite3.Connection, query: str, params: tuple) -> List[str]:
+    """Get the plan steps that scan a whole table or build a temp B-tree"""
+    rows = conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+    return [
+        row[3] for row in rows
+        # Scanning a VALUES list (multi-row INSERT) reads no table
+        if (row[3].startswith("SCAN") and "CONSTANT ROW" not in row[3])
+        or "TEMP B-TREE" in row[3]
+    ]
+
+def check_query_plans(db_path: str = None) -> List[str]:
+    """Check every query; returns a list of failures"""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(db_path or os.path.join(tmp, "plans.db"))
+        try:
+            migrate(conn)
+            failures = []
+            for name, query, params in QUERIES:
+                for problem in plan_problems(conn, query, params):
+                    failures.append(f"{name}: {problem}")
+            return failures
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    failures = check_query_plans()
+    for failure in failures:
+        print(failure)
+    print(f"{len(QUERIES)} queries checked, {len(failures)} plan regressions")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,298 @@
+"""
+Quota-aware scheduling of outbound Google API calls
+
+Every call takes a token from a global bucket (the project's quota) and
+from its user's bucket (the per-user quota). Calls that cannot go yet
+queue, interactive ahead of background, and are released as the buckets
+refill. 429 and 5xx responses are retried with exponential backoff and
+full jitter; a 429 also halves the global rate, which then creeps back
+up with each success, so the scheduler settles just under the quota
+Google is actually enforcing.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Any, Awaitable, Callable
+
+import httpx
+
+from config.settings import settings
+from utils.http_client import record_google_call
+from utils.metrics import metrics
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITIES = ("interactive", "background")
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_priority: ContextVar[int] = ContextVar("google_call_priority", default=INTERACTIVE)
+
+@contextmanager
+def background_priority():
+    """Send the block's Google calls (including tasks it starts) at background priority"""
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+class QuotaWaitTimeout(Exception):
+    """A call waited longer than allowed for quota"""
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        """Add the tokens accrued since the last refill"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is now)"""
+        self.refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+class _Waiter:
+    """A queued call"""
+
+    __slots__ = ("priority", "seq", "bucket", "future", "queued_at")
+
+    def __init__(self, priority: int, seq: int, bucket: Optional[TokenBucket], future, now: float):
+        self.priority = priority
+        self.seq = seq
+        self.bucket = bucket
+        self.future = future
+        self.queued_at = now
+
+class GoogleScheduler:
+    """Global and per-user token buckets with a priority queue and adaptive retry"""
+
+    def __init__(
+        self,
+        rate: float = settings.GOOGLE_RATE_PER_SECOND,
+        burst: float = settings.GOOGLE_RATE_BURST,
+        user_rate: float = settings.GOOGLE_USER_RATE_PER_SECOND,
+        user_burst: float = settings.GOOGLE_USER_RATE_BURST,
+        max_retries: int = settings.GOOGLE_MAX_RETRIES,
+        backoff_base: float = settings.GOOGLE_BACKOFF_BASE_SECONDS,
+        backoff_max: float = settings.GOOGLE_BACKOFF_MAX_SECONDS,
+        max_wait: float = settings.GOOGLE_MAX_QUEUE_WAIT_SECONDS,
+        max_users: int = 10000
+    ):
+        """Initialize scheduler"""
+        self.max_rate = rate
+        self.global_bucket = TokenBucket(rate, burst, time.monotonic())
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self.max_users = max_users
+        self._users: Dict[str, TokenBucket] = {}
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._throttled_at = 0.0
+        self._stats = {"granted": 0, "queued": 0, "retries": 0, "throttled": 0, "timeouts": 0}
+        # per priority: calls, total wait, longest wait
+        self._waits = [[0, 0.0, 0.0] for _ in PRIORITIES]
+
+    def _user_bucket(self, user: Optional[str], now: float) -> Optional[TokenBucket]:
+        if not user:
+            return None
+        bucket = self._users.get(user)
+        if bucket is None:
+            if len(self._users) >= self.max_users:
+                self._prune(now)
+            bucket = self._users[user] = TokenBucket(self.user_rate, self.user_burst, now)
+        return bucket
+
+    def _prune(self, now: float):
+        """Forget users whose buckets have refilled (they would be recreated full)"""
+        queued = {id(waiter.bucket) for waiter in self._waiting}
+        for user, bucket in list(self._users.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.capacity and id(bucket) not in queued:
+                del self._users[user]
+
+    def _grant(self, bucket: Optional[TokenBucket], priority: int, waited: float):
+        self.global_bucket.tokens -= 1
+        if bucket is not None:
+            bucket.tokens -= 1
+        self._stats["granted"] += 1
+        totals = self._waits[priority]
+        totals[0] += 1
+        totals[1] += waited
+        totals[2] = max(totals[2], waited)
+        metrics.observe("google_queue_wait_seconds", (PRIORITIES[priority],), waited)
+
+    def _dispatch(self):
+        """Release queued calls in priority order while both their buckets have tokens"""
+        self._timer = None
+        now = time.monotonic()
+        self._waiting.sort(key=lambda waiter: (waiter.priority, waiter.seq))
+        remaining: List[_Waiter] = []
+        delay: Optional[float] = None
+
+        for waiter in self._waiting:
+            if waiter.future.done():
+                # Timed out or cancelled while queued
+                continue
+            wait = max(
+                self.global_bucket.wait(now),
+                waiter.bucket.wait(now) if waiter.bucket is not None else 0.0
+            )
+            if wait == 0:
+                self._grant(waiter.bucket, waiter.priority, now - waiter.queued_at)
+                waiter.future.set_result(None)
+                continue
+            remaining.append(waiter)
+            delay = wait if delay is None else min(delay, wait)
+
+        self._waiting = remaining
+        if remaining:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    async def acquire(self, user: Optional[str] = None, priority: Optional[int] = None):
+        """Wait for a token from the global bucket and the user's bucket"""
+        if priority is None:
+            priority = _priority.get()
+        now = time.monotonic()
+        bucket = self._user_bucket(user, now)
+
+        if not self._waiting and self.global_bucket.wait(now) == 0 and (
+            bucket is None or bucket.wait(now) == 0
+        ):
+            self._grant(bucket, priority, 0.0)
+            return
+
+        waiter = _Waiter(
+            priority, next(self._seq), bucket, asyncio.get_running_loop().create_future(), now
+        )
+        self._waiting.append(waiter)
+        self._stats["queued"] += 1
+        if self._timer is not None:
+            self._timer.cancel()
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(waiter.future, self.max_wait)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise QuotaWaitTimeout(f"Waited over {self.max_wait:g}s for Google API quota")
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, at least any Retry-After the server sent"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return min(delay, self.backoff_max)
+
+    def _throttle(self, now: float):
+        """Halve the global rate after a 429, at most once a second"""
+        self._stats["throttled"] += 1
+        if now - self._throttled_at < 1:
+            return
+        self._throttled_at = now
+        bucket = self.global_bucket
+        bucket.refill(now)
+        bucket.rate = max(self.max_rate / 16, bucket.rate / 2)
+
+    def _recover(self, now: float):
+        """Creep the global rate back towards the configured one"""
+        bucket = self.global_bucket
+        if bucket.rate < self.max_rate:
+            bucket.refill(now)
+            bucket.rate = min(self.max_rate, bucket.rate + self.max_rate / 50)
+
+    async def send(
+        self,
+        api: str,
+        user: Optional[str],
+        request: Callable[[], Awaitable[httpx.Response]],
+        idempotent: bool = True
+    ) -> httpx.Response:
+        """
+        Send a request within quota, retrying 429/5xx and transport errors
+        Non-idempotent requests are only retried on 429, which Google
+        returns before doing any work. The last response is returned
+        (or the last transport error raised) once retries run out.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(user)
+            started = time.perf_counter()
+            try:
+                response = await request()
+            except httpx.TransportError as e:
+                record_google_call(api, started, type(e).__name__)
+                if not idempotent or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+            else:
+                status = response.status_code
+                record_google_call(api, started, None if response.is_success else str(status))
+                if status == 429:
+                    self._throttle(time.monotonic())
+                elif response.is_success:
+                    self._recover(time.monotonic())
+                if (
+                    status not in RETRY_STATUSES
+                    or attempt >= self.max_retries
+                    or (not idempotent and status != 429)
+                ):
+                    return response
+                delay = self.backoff(attempt, response.headers.get("Retry-After"))
+
+            attempt += 1
+            self._stats["retries"] += 1
+            metrics.inc("google_retries_total", (api,))
+            await asyncio.sleep(delay)
+
+    def queue_depth(self) -> Dict[str, int]:
+        """Queued calls by priority"""
+        depth = dict.fromkeys(PRIORITIES, 0)
+        for waiter in self._waiting:
+            if not waiter.future.done():
+                depth[PRIORITIES[waiter.priority]] += 1
+        return depth
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, wait times, retry counters and the current rate"""
+        self.global_bucket.refill(time.monotonic())
+        waits = {
+            name: {
+                "calls": calls,
+                "avg_wait_ms": round(total / calls * 1000, 2) if calls else 0.0,
+                "max_wait_ms": round(longest * 1000, 2),
+            }
+            for name, (calls, total, longest) in zip(PRIORITIES, self._waits)
+        }
+        return {
+            **self._stats,
+            "queue": self.queue_depth(),
+            "waits": waits,
+            "rate": round(self.global_bucket.rate, 3),
+            "max_rate": self.max_rate,
+            "tokens": round(self.global_bucket.tokens, 2),
+            "users": len(self._users),
+        }
+
+google_scheduler = GoogleScheduler()
@@ -2,17 +2,46 @@
 Session management for user authentication
 """
 
+import asyncio
+import logging
 import secrets
 import json
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+from config.settings import settings
+from utils import queries
+from utils.database import AsyncDatabase
+from utils.ttl_store import TTLStore
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _timestamp(value: datetime) -> str:
+    return value.strftime(TIMESTAMP_FORMAT)
 
 class SessionManager:
-    """Manage user sessions"""
-    
-    # In-memory session store (replace with Redis for production)
-    _sessions: Dict[str, Dict] = {}
-    
+    """
+    Manage user sessions
+    Sessions and pending OAuth states are persisted in SQLite so every
+    worker sees them. Each worker keeps a short-lived read cache in front
+    of the table, and writes are queued and flushed in batches. Cached
+    sessions are not rechecked, so a session deleted on one worker stays
+    valid on others that cached it for up to SESSION_CACHE_TTL_SECONDS.
+    """
+
+    # Per-worker read cache shared by all instances, bounded and swept
+    _sessions: TTLStore = TTLStore(
+        max_size=settings.SESSION_MAX_ENTRIES,
+        default_ttl=settings.SESSION_CACHE_TTL_SECONDS
+    )
+
+    # Write-behind queue: statements waiting for the next batch
+    _pending: List[Tuple[str, tuple]] = []
+    _flush_lock: Optional[asyncio.Lock] = None
+    _database: AsyncDatabase = AsyncDatabase()
+
     def create_session(
         self,
         user_id: int,
@@ -21,41 +50,146 @@ class SessionManager:
         refresh_token: Optional[str] = None,
         expires_in: int = 3600
     ) -> str:
-        """Create new session"""
+        """Create new session (call flush() before handing the id to another worker)"""
         session_id = secrets.token_urlsafe(32)
-        
-        self._sessions[session_id] = {
+        now = datetime.utcnow()
+        session = {
             "user_id": user_id,
             "email": user_email,
             "access_token": access_token,
             "refresh_token": refresh_token,
-            "created_at": datetime.utcnow(),
-            "expires_at": datetime.utcnow() + timedelta(seconds=expires_in),
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=expires_in),
         }
-        
+
+        self._cache(session_id, session)
+        self._pending.append((
+            queries.INSERT_SESSION,
+            (
+                session_id, user_id, user_email, access_token, refresh_token,
+                _timestamp(session["expires_at"]), _timestamp(now)
+            )
+        ))
+
         return session_id
-    
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session data"""
-        if session_id not in self._sessions:
-            return None
-        
-        session = self._sessions[session_id]
-        
-        # Check if session expired
-        if datetime.utcnow() > session["expires_at"]:
-            del self._sessions[session_id]
+
+    def _cache(self, session_id: str, session: Dict[str, Any]):
+        """Cache a session locally for at most its remaining lifetime"""
+        remaining = (session["expires_at"] - datetime.utcnow()).total_seconds()
+        if remaining > 0:
+            self._sessions.set(
+                session_id,
+                session,
+                ttl=min(remaining, settings.SESSION_CACHE_TTL_SECONDS)
+            )
+
+    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get session data from the local cache, falling back to the table"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            return session
+
+        row = await self._database.fetch_one(
+            queries.LIVE_SESSION,
+            (session_id, _timestamp(datetime.utcnow()))
+        )
+        if not row:
             return None
-        
+
+        session = {
+            "user_id": row["user_id"],
+            "email": row["email"],
+            "access_token": row["access_token"],
+            "refresh_token": row["refresh_token"],
+            "created_at": datetime.strptime(row["created_at"], TIMESTAMP_FORMAT),
+            "expires_at": datetime.strptime(row["expires_at"], TIMESTAMP_FORMAT),
+        }
+        self._cache(session_id, session)
         return session
-    
-    def delete_session(self, session_id: str) -> bool:
-        """Delete session"""
-        if session_id in self._sessions:
-            del self._sessions[session_id]
-            return True
-        return False
-    
-    def validate_session(self, session_id: str) -> bool:
+
+    async def delete_session(self, session_id: str) -> bool:
+        """
+        Delete session from the local cache and the table
+        Other workers drop it when their cached copy expires, at most
+        SESSION_CACHE_TTL_SECONDS later.
+        """
+        cached = self._sessions.pop(session_id) is not None
+        self._pending.append((queries.DELETE_SESSION, (session_id,)))
+        await self.flush()
+        return cached
+
+    async def validate_session(self, session_id: str) -> bool:
         """Validate session"""
-        return self.get_session(session_id) is not None
+        return await self.get_session(session_id) is not None
+
+    def create_state(self) -> str:
+        """Create a single-use OAuth state (call flush() before redirecting)"""
+        state = secrets.token_urlsafe(32)
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.OAUTH_STATE_TTL_SECONDS)
+        self._pending.append((
+            queries.INSERT_STATE,
+            (state, _timestamp(expires_at))
+        ))
+        return state
+
+    async def consume_state(self, state: str) -> bool:
+        """Check and remove an OAuth state; it may have been issued by any worker"""
+        await self.flush()
+        rows = await self._database.execute(
+            queries.CONSUME_STATE,
+            (state, _timestamp(datetime.utcnow()))
+        )
+        return bool(rows)
+
+    async def flush(self):
+        """Write queued changes in one transaction (concurrent callers share a batch)"""
+        if SessionManager._flush_lock is None:
+            SessionManager._flush_lock = asyncio.Lock()
+        async with SessionManager._flush_lock:
+            if not self._pending:
+                return
+            batch = self._pending[:]
+            del self._pending[:len(batch)]
+            try:
+                await self._database.execute_batch(batch)
+            except Exception:
+                # Put the batch back so the next flush retries it
+                self._pending[:0] = batch
+                raise
+
+    async def sweep(self) -> int:
+        """Remove expired sessions and states from the cache and the table"""
+        removed = self._sessions.sweep()
+        now = _timestamp(datetime.utcnow())
+        await self._database.execute_batch([
+            (queries.SWEEP_SESSIONS, (now,)),
+            (queries.SWEEP_STATES, (now,)),
+        ])
+        return removed
+
+    async def run_background(self):
+        """Flush queued writes and sweep expired entries until cancelled"""
+        last_sweep = datetime.utcnow()
+        while True:
+            await asyncio.sleep(settings.SESSION_FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush()
+                if (datetime.utcnow() - last_sweep).total_seconds() >= settings.SWEEP_INTERVAL_SECONDS:
+                    last_sweep = datetime.utcnow()
+                    await self.sweep()
+            except Exception as e:
+                logger.error(f"Error maintaining sessions: {e}")
+
+    async def count_live(self) -> int:
+        """Count unexpired sessions across all workers"""
+        row = await self._database.fetch_one(
+            queries.COUNT_LIVE_SESSIONS,
+            (_timestamp(datetime.utcnow()),)
+        )
+        return row["live"]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cached session count, memory use and queued writes"""
+        stats = self._sessions.stats()
+        stats["pending_writes"] = len(self._pending)
+        return stats
@@ -0,0 +1,397 @@
+"""
+Two-tier read-through cache for sheet values
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, List, Any, Sequence, Tuple, Iterator
+
+from config.settings import settings
+from utils import queries, sheet_codec
+from utils.database import AsyncDatabase
+from utils.google_sheets import GoogleSheetsClient, SheetsAPIError, sheets_client
+from utils.singleflight import SingleFlight
+from utils.sheet_sync import full_sync, incremental_sync
+
+class CacheEntry:
+    """Cached values of one link"""
+
+    __slots__ = ("values", "version", "fetched_at", "size", "sync", "_tag")
+
+    def __init__(
+        self,
+        values: List[List[Any]],
+        version: Optional[str],
+        fetched_at: float,
+        size: int,
+        sync: Optional[Dict[str, Any]] = None
+    ):
+        self.values = values
+        self.version = version
+        self.fetched_at = fetched_at
+        self.size = size
+        self.sync = sync
+        self._tag = None
+
+    @property
+    def tag(self) -> str:
+        """Content hash of the values (from the sync block hashes when present)"""
+        if self._tag is None:
+            if self.sync and "hashes" in self.sync:
+                parts = [self.values[:1], self.sync["block_rows"], self.sync["hashes"]]
+            else:
+                parts = self.values
+            self._tag = content_tag(parts)
+        return self._tag
+
+def content_tag(value: Any) -> str:
+    """Short hash of a JSON-serializable value"""
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+    return hashlib.blake2b(raw, digest_size=12).hexdigest()
+
+def payload_size(values: List[List[Any]]) -> int:
+    """Approximate decoded size of sheet values in bytes"""
+    return sum(
+        sum(len(cell) if isinstance(cell, str) else 8 for cell in row) + 8 * len(row)
+        for row in values
+    )
+
+def iter_chunks(rows: Sequence[Any], size: int, offset: int = 0) -> Iterator[List[Any]]:
+    """Yield consecutive slices of at most size rows, starting at offset"""
+    for start in range(offset, len(rows), size):
+        yield rows[start:start + size]
+
+class LRUCache:
+    """In-process LRU keyed by link id, bounded by decoded payload bytes"""
+
+    def __init__(self, max_bytes: int):
+        """Initialize cache"""
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: int) -> Optional[CacheEntry]:
+        """Get entry and mark it most recently used"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: int, entry: CacheEntry):
+        """Insert entry, evicting least recently used entries to fit"""
+        self.pop(key)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def pop(self, key: int) -> Optional[CacheEntry]:
+        """Remove entry"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+        return entry
+
+def _decode_entry(data: Any, fetched_at: float) -> CacheEntry:
+    """Decode a stored blob into an entry"""
+    if sheet_codec.is_encoded(data):
+        meta = sheet_codec.read_header(data)[0]["meta"]
+        values = sheet_codec.decode(data)
+    else:
+        # Rows written before the columnar encoding
+        meta = json.loads(data)
+        values = meta["values"]
+    return CacheEntry(
+        values, meta.get("version"), fetched_at, payload_size(values), meta.get("sync")
+    )
+
+def _encode_entry(entry: CacheEntry) -> bytes:
+    """Encode an entry's values and metadata, sizing it if needed"""
+    if not entry.size:
+        entry.size = payload_size(entry.values)
+    return sheet_codec.encode(entry.values, meta={"version": entry.version, "sync": entry.sync})
+
+class SharedReads:
+    """
+    One caller's view of the client for a sync
+    Calls are charged to the caller's quota bucket. Whole-range reads at
+    a known file version are shared: concurrent callers that each proved
+    access to the file (their own metadata call returned this version)
+    await a single values.get, whoever's token sends it.
+    """
+
+    def __init__(
+        self,
+        client: GoogleSheetsClient,
+        flights: SingleFlight,
+        version: Optional[str],
+        user: Optional[str] = None
+    ):
+        self.client = client
+        self.flights = flights
+        self.version = version
+        self.user = user
+
+    async def get_values(self, spreadsheet_id: str, range_: str, access_token: str):
+        """Get a range's values, shared with concurrent reads at this version"""
+        read = lambda: self.client.get_values(spreadsheet_id, range_, access_token, user=self.user)
+        if self.version is None:
+            return await read()
+        values, _ = await self.flights.do((spreadsheet_id, range_, self.version), read)
+        return values
+
+    async def batch_get(self, spreadsheet_id: str, ranges: List[str], access_token: str):
+        """Get several ranges (not shared: they depend on the caller's cached copy)"""
+        return await self.client.batch_get(spreadsheet_id, ranges, access_token, user=self.user)
+
+class SheetCache:
+    """
+    Read-through cache in front of the Sheets API
+    Lookups go memory -> sheet_data_cache table -> Google. Stale entries
+    are revalidated against the file's modifiedTime before refetching.
+    Freshness lives in the table's last_fetched column, not in the blob,
+    so revalidating only touches that column. Encoding and decoding run
+    in a worker thread, off the event loop. Whole-sheet fetches are
+    shared across users once each has read the file's version with its
+    own token (see SharedReads).
+    """
+
+    def __init__(
+        self,
+        database: Optional[AsyncDatabase] = None,
+        client: Optional[GoogleSheetsClient] = None,
+        max_bytes: int = settings.SHEET_CACHE_MAX_BYTES,
+        default_ttl: int = settings.SHEET_CACHE_TTL_SECONDS
+    ):
+        """Initialize cache"""
+        self.database = database or AsyncDatabase()
+        self.client = client or sheets_client
+        self.memory = LRUCache(max_bytes)
+        self.default_ttl = default_ttl
+        self.reads = SingleFlight("sheets.values")
+        self._stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+        }
+
+    def _is_fresh(self, fetched_at: float, ttl: Optional[int]) -> bool:
+        """Check a fetch time against a link's lifetime (the default when it has none)"""
+        return time.time() - fetched_at < (self.default_ttl if ttl is None else ttl)
+
+    async def _load(self, link_id: int) -> Optional[CacheEntry]:
+        """Load an entry from the SQLite tier"""
+        row = await self.database.fetch_one(queries.CACHED_SHEET, (link_id,))
+        if not row:
+            return None
+        return await asyncio.to_thread(_decode_entry, row["data"], row["fetched_at"] or 0)
+
+    async def _store(
+        self,
+        link_id: int,
+        entry: CacheEntry,
+        summary: Optional[Dict[str, Any]] = None
+    ):
+        """Write an entry through to both tiers, recording a sync summary in link history"""
+        data = await asyncio.to_thread(_encode_entry, entry)
+        statements = [(
+            queries.STORE_CACHED_SHEET,
+            (link_id, data)
+        )]
+        if summary is not None:
+            statements.append((
+                queries.INSERT_LINK_HISTORY,
+                (link_id, "synced", None, json.dumps(summary))
+            ))
+        await self.database.execute_batch(statements)
+        self.memory.put(link_id, entry)
+
+    async def _modified_time(
+        self,
+        spreadsheet_id: str,
+        access_token: str,
+        user: Optional[str] = None
+    ) -> Optional[str]:
+        """Get the file version, or None if metadata is unavailable"""
+        try:
+            return await self.client.get_modified_time(spreadsheet_id, access_token, user=user)
+        except SheetsAPIError:
+            return None
+
+    def _reader(self, version: Optional[str], user: Optional[str]) -> SharedReads:
+        """Client for a sync: reads are shared only when the caller proved access"""
+        return SharedReads(self.client, self.reads, version, user)
+
+    async def fetch_values(
+        self,
+        spreadsheet_id: str,
+        range_: str,
+        access_token: str,
+        user: Optional[str] = None
+    ) -> List[List[Any]]:
+        """Get a range without caching it, sharing the read with concurrent callers"""
+        version = await self._modified_time(spreadsheet_id, access_token, user)
+        return await self._reader(version, user).get_values(spreadsheet_id, range_, access_token)
+
+    async def get_values(
+        self,
+        link_id: int,
+        spreadsheet_id: str,
+        range_: str,
+        access_token: str,
+        refresh: bool = False,
+        ttl: Optional[int] = None,
+        user: Optional[str] = None
+    ) -> List[List[Any]]:
+        """Get the values of a link's range, reading through the cache"""
+        entry = await self.get_entry(
+            link_id, spreadsheet_id, range_, access_token, refresh, ttl, user
+        )
+        return entry.values
+
+    async def get_entry(
+        self,
+        link_id: int,
+        spreadsheet_id: str,
+        range_: str,
+        access_token: str,
+        refresh: bool = False,
+        ttl: Optional[int] = None,
+        user: Optional[str] = None
+    ) -> CacheEntry:
+        """
+        Get a link's cache entry, reading through the cache
+        ttl is the link's cache_ttl_seconds (None for the default) and
+        user the id whose Google quota the calls use. A changed file syncs
+        the cached copy incrementally; refresh always fetches the sheet
+        whole.
+        """
+        entry = self.memory.get(link_id)
+        tier = "memory_hits"
+        if entry is None:
+            entry = await self._load(link_id)
+            tier = "db_hits"
+            if entry is not None:
+                self.memory.put(link_id, entry)
+
+        if entry is not None and not refresh and self._is_fresh(entry.fetched_at, ttl):
+            self._stats[tier] += 1
+            return entry
+
+        # The caller's own metadata call is its access check for shared reads
+        version = await self._modified_time(spreadsheet_id, access_token, user)
+        if entry is not None and not refresh:
+            if version is not None and version == entry.version:
+                # Stale but unchanged: only cost a metadata call
+                entry.fetched_at = time.time()
+                await self.database.execute(queries.TOUCH_CACHED_SHEET, (link_id,))
+                self._stats["revalidated"] += 1
+                return entry
+            values, state, summary = await incremental_sync(
+                self._reader(version, user), spreadsheet_id, range_, access_token,
+                entry.values, entry.sync
+            )
+        else:
+            values, state, summary = await full_sync(
+                self._reader(version, user), spreadsheet_id, range_, access_token
+            )
+
+        self._stats["misses"] += 1
+        entry = CacheEntry(values, version, time.time(), 0, state)
+        await self._store(link_id, entry, summary)
+        return entry
+
+    async def stream(
+        self,
+        link_id: int,
+        spreadsheet_id: str,
+        range_: str,
+        access_token: str,
+        refresh: bool = False,
+        ttl: Optional[int] = None,
+        chunk_rows: int = sheet_codec.ROW_GROUP_SIZE,
+        user: Optional[str] = None
+    ) -> Tuple[List[Any], Iterator[List[List[Any]]]]:
+        """
+        Get a link's header row and an iterator over its data rows in chunks
+        A fresh entry that is only in the SQLite tier is decoded one row
+        group at a time and never loaded whole; otherwise this reads
+        through get_values.
+        """
+        if not refresh and self.memory.get(link_id) is None:
+            row = await self.database.fetch_one(queries.CACHED_SHEET, (link_id,))
+            if row and sheet_codec.is_encoded(row["data"]):
+                header = sheet_codec.read_header(row["data"])[0]
+                if self._is_fresh(row["fetched_at"] or 0, ttl):
+                    self._stats["db_hits"] += 1
+                    return header["headers"] or [], sheet_codec.iter_row_groups(row["data"])
+
+        values = await self.get_values(
+            link_id, spreadsheet_id, range_, access_token, refresh, ttl, user
+        )
+        return (values[0] if values else []), iter_chunks(values, chunk_rows, offset=1)
+
+    async def read(
+        self,
+        link_id: int,
+        columns: Optional[Sequence[int]] = None,
+        rows: Optional[Tuple[int, int]] = None
+    ) -> Optional[List[List[Any]]]:
+        """
+        Read cached values without going to Google
+        Only the row groups and columns requested are decoded from the
+        SQLite tier. Returns None when the link is not cached.
+        """
+        entry = self.memory.get(link_id)
+        if entry is None:
+            row = await self.database.fetch_one(queries.CACHED_SHEET, (link_id,))
+            if not row:
+                return None
+            if sheet_codec.is_encoded(row["data"]):
+                return await asyncio.to_thread(
+                    sheet_codec.decode, row["data"], columns=columns, rows=rows
+                )
+            entry = await asyncio.to_thread(_decode_entry, row["data"], row["fetched_at"] or 0)
+
+        headers, body = entry.values[:1], entry.values[1:]
+        if rows:
+            body = body[rows[0]:rows[1]]
+        values = headers + body
+        if columns is not None:
+            values = [
+                [row[c] if len(row) > c else "" for c in columns]
+                for row in values
+            ]
+        return values
+
+    async def invalidate(self, link_id: int):
+        """Drop a link from both tiers"""
+        self.memory.pop(link_id)
+        await self.database.execute(
+            queries.DELETE_CACHED_SHEET,
+            (link_id,)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters"""
+        stats = dict(self._stats)
+        stats["hits"] = stats["memory_hits"] + stats["db_hits"] + stats["revalidated"]
+        stats["evictions"] = self.memory.evictions
+        stats["entries"] = len(self.memory)
+        stats["bytes"] = self.memory.bytes
+        stats["max_bytes"] = self.memory.max_bytes
+        return stats
+
+sheet_cache = SheetCache()
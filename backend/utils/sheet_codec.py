@@ -0,0 +1,180 @@
+"""
+Compressed columnar encoding for cached sheet values
+
+Layout: MAGIC, a 4-byte header length, a JSON header, then one
+compressed chunk per (row group, column) plus one chunk of row lengths
+per row group. The header row is stored once in the JSON header, and
+readers can decode only the chunks they need.
+"""
+
+import json
+import struct
+import zlib
+from typing import Optional, Dict, List, Any, Sequence, Tuple, Iterator
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+MAGIC = b"SHC1"
+ROW_GROUP_SIZE = 1024
+_LENGTH = struct.Struct(">I")
+
+def is_encoded(data: Any) -> bool:
+    """Check whether a stored value uses this encoding"""
+    return isinstance(data, (bytes, memoryview)) and bytes(data[:4]) == MAGIC
+
+def _compress(raw: bytes, codec: str, level: int) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(raw)
+    return zlib.compress(raw, level)
+
+def _decompress(raw: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is required to decode this sheet payload")
+        return zstandard.ZstdDecompressor().decompress(raw)
+    return zlib.decompress(raw)
+
+def encode(
+    values: Sequence[Sequence[Any]],
+    meta: Optional[Dict[str, Any]] = None,
+    row_group_size: int = ROW_GROUP_SIZE,
+    codec: Optional[str] = None,
+    level: int = 6
+) -> bytes:
+    """
+    Encode sheet values (header row first)
+    codec is "zstd" or "zlib"; it defaults to zstd when installed.
+    """
+    codec = codec or ("zstd" if zstandard is not None else "zlib")
+    headers = list(values[0]) if values else None
+    body = values[1:]
+    ncols = max([len(headers or [])] + [len(row) for row in body])
+
+    chunks: List[bytes] = []
+    groups = []
+    offset = 0
+    for start in range(0, len(body), row_group_size):
+        rows = body[start:start + row_group_size]
+        lengths = [len(row) for row in rows]
+        columns = [
+            [row[col] if len(row) > col else None for row in rows]
+            for col in range(ncols)
+        ]
+
+        group_chunks = []
+        for part in [lengths] + columns:
+            chunk = _compress(
+                json.dumps(part, separators=(",", ":")).encode(), codec, level
+            )
+            chunks.append(chunk)
+            group_chunks.append([offset, len(chunk)])
+            offset += len(chunk)
+        groups.append({"rows": len(rows), "chunks": group_chunks})
+
+    header = json.dumps({
+        "headers": headers,
+        "ncols": ncols,
+        "nrows": len(body),
+        "codec": codec,
+        "groups": groups,
+        "meta": meta or {},
+    }, separators=(",", ":")).encode()
+
+    return MAGIC + _LENGTH.pack(len(header)) + header + b"".join(chunks)
+
+def read_header(blob: bytes) -> Tuple[Dict[str, Any], int]:
+    """Read the JSON header and return it with the offset of the first chunk"""
+    if not is_encoded(blob):
+        raise ValueError("Not an encoded sheet payload")
+    (length,) = _LENGTH.unpack_from(blob, len(MAGIC))
+    start = len(MAGIC) + _LENGTH.size
+    return json.loads(bytes(blob[start:start + length])), start + length
+
+def decode(
+    blob: bytes,
+    columns: Optional[Sequence[int]] = None,
+    rows: Optional[Tuple[int, int]] = None,
+    include_headers: bool = True
+) -> List[List[Any]]:
+    """
+    Decode sheet values
+    columns selects column indexes (rows are then padded to that width)
+    and rows is a [start, stop) range over the data rows; only the
+    chunks they touch are decompressed.
+    """
+    blob = memoryview(blob)
+    header, base = read_header(blob)
+    codec = header["codec"]
+    start, stop = rows if rows else (0, header["nrows"])
+
+    def chunk(span):
+        raw = blob[base + span[0]:base + span[0] + span[1]]
+        return json.loads(_decompress(bytes(raw), codec))
+
+    out: List[List[Any]] = []
+    headers = header["headers"]
+    if include_headers and headers is not None:
+        if columns is None:
+            out.append(list(headers))
+        else:
+            out.append([headers[c] if c < len(headers) else "" for c in columns])
+
+    group_start = 0
+    for group in header["groups"]:
+        group_stop = group_start + group["rows"]
+        if group_stop <= start or group_start >= stop:
+            group_start = group_stop
+            continue
+
+        lo = max(start, group_start) - group_start
+        hi = min(stop, group_stop) - group_start
+        spans = group["chunks"]
+
+        if columns is None:
+            lengths = chunk(spans[0])[lo:hi]
+            data = [chunk(span)[lo:hi] for span in spans[1:]]
+            if data:
+                out.extend(
+                    list(row[:length])
+                    for row, length in zip(zip(*data), lengths)
+                )
+            else:
+                out.extend([] for _ in lengths)
+        else:
+            data = [
+                chunk(spans[col + 1])[lo:hi] if col < header["ncols"] else None
+                for col in columns
+            ]
+            for i in range(hi - lo):
+                out.append([
+                    "" if column is None or column[i] is None else column[i]
+                    for column in data
+                ])
+        group_start = group_stop
+
+    return out
+
+def iter_row_groups(blob: bytes) -> Iterator[List[List[Any]]]:
+    """
+    Decode data rows one row group at a time (header row excluded)
+    Only one group is held decoded at once.
+    """
+    blob = memoryview(blob)
+    header, base = read_header(blob)
+    codec = header["codec"]
+
+    def chunk(span):
+        raw = blob[base + span[0]:base + span[0] + span[1]]
+        return json.loads(_decompress(bytes(raw), codec))
+
+    for group in header["groups"]:
+        spans = group["chunks"]
+        lengths = chunk(spans[0])
+        data = [chunk(span) for span in spans[1:]]
+        if data:
+            yield [list(row[:length]) for row, length in zip(zip(*data), lengths)]
+        else:
+            yield [[] for _ in lengths]
@@ -0,0 +1,122 @@
+"""
+Sampling-based detection of a sheet's date column and date format
+"""
+
+from typing import Optional, Dict, List, Any, Sequence, Tuple
+
+from utils import queries
+from utils.database import AsyncDatabase
+from utils.date_filter import column_values
+from utils.date_normalizer import DateNormalizer
+
+SAMPLE_ROWS = 48
+# Share of a column's non-empty sampled cells one format must parse
+MIN_MATCH = 0.6
+DATE_HEADER_HINTS = ("tanggal", "tgl", "date", "hari", "waktu")
+
+def sample_rows(body: Sequence[Sequence[Any]], size: int = SAMPLE_ROWS) -> List[Sequence[Any]]:
+    """Up to `size` data rows spread evenly over the sheet, first and last included"""
+    if len(body) <= size:
+        return list(body)
+    step = (len(body) - 1) / (size - 1)
+    return [body[round(i * step)] for i in range(size)]
+
+def _cells(values: Sequence[Any]) -> List[str]:
+    """Non-empty string cells, normalized for the single-format parsers"""
+    return [
+        value.strip().lower() for value in values
+        if isinstance(value, str) and value.strip()
+    ]
+
+def match_share(cells: Sequence[str], date_format: Optional[str]) -> Tuple[float, int]:
+    """Share and count of normalized cells that date_format parses"""
+    parse = DateNormalizer.format_parser(date_format)
+    if parse is None or not cells:
+        return 0.0, 0
+    hits = sum(1 for cell in cells if parse(cell) is not None)
+    return hits / len(cells), hits
+
+def detect_format(values: Sequence[Any]) -> Tuple[Optional[str], float, int]:
+    """
+    Find the format parsing the most of a column's non-empty cells
+    Returns the format (None if nothing parses), its share of the
+    non-empty cells and how many it parsed.
+    """
+    cells = _cells(values)
+    best = (None, 0.0, 0)
+    for date_format in DateNormalizer.FORMATS:
+        share, hits = match_share(cells, date_format)
+        if hits > best[2]:
+            best = (date_format, share, hits)
+    return best
+
+def detect_schema(
+    rows: Sequence[Sequence[Any]],
+    sample_size: int = SAMPLE_ROWS
+) -> Optional[Dict[str, Any]]:
+    """
+    Pick the date column and its dominant format from a sample of rows
+    The column whose best format parses the most sampled cells wins, a
+    date-like header name breaking ties. Returns None when no column
+    reaches MIN_MATCH.
+    """
+    if len(rows) < 2:
+        return None
+
+    headers, sample = rows[0], sample_rows(rows[1:], sample_size)
+    width = max(len(row) for row in sample)
+    best_key, best = None, None
+    for column in range(width):
+        date_format, share, hits = detect_format(column_values(sample, column))
+        if date_format is None or share < MIN_MATCH:
+            continue
+        header = str(headers[column]).lower() if column < len(headers) else ""
+        key = (hits, any(hint in header for hint in DATE_HEADER_HINTS), -column)
+        if best_key is None or key > best_key:
+            best_key = key
+            best = {"date_column": column, "date_format": date_format, "confidence": round(share, 3)}
+    return best
+
+def resolve_schema(
+    rows: Sequence[Sequence[Any]],
+    stored_column: Optional[int] = None,
+    stored_format: Optional[str] = None,
+    date_column: Optional[int] = None
+) -> Tuple[int, Optional[str], bool]:
+    """
+    Decide which column and format to filter a sheet by
+    An explicit date_column wins (its format is detected unless it is
+    the stored column). Otherwise a stored schema is reused while its
+    format still parses the column's sampled cells; when it no longer
+    does, or nothing is stored, the schema is detected again. Falls back
+    to column 0 with no format. Returns (column, format, changed), where
+    changed means the result should replace the stored schema.
+    """
+    if date_column is not None:
+        if date_column == stored_column and stored_format:
+            return date_column, stored_format, False
+        date_format, share, _ = detect_format(column_values(sample_rows(rows[1:]), date_column))
+        return date_column, (date_format if share >= MIN_MATCH else None), False
+
+    if stored_column is not None:
+        cells = _cells(column_values(sample_rows(rows[1:]), stored_column))
+        if match_share(cells, stored_format)[0] >= MIN_MATCH:
+            return stored_column, stored_format, False
+
+    schema = detect_schema(rows)
+    if schema is None:
+        return (stored_column if stored_column is not None else 0), None, False
+    column, date_format = schema["date_column"], schema["date_format"]
+    return column, date_format, (column, date_format) != (stored_column, stored_format)
+
+async def save_link_schema(
+    database: AsyncDatabase,
+    link_id: int,
+    date_column: int,
+    date_format: Optional[str]
+):
+    """Store a link's detected date column and format"""
+    await database.execute(
+        queries.SAVE_LINK_SCHEMA,
+        (date_column, date_format, link_id)
+    )
@@ -0,0 +1,145 @@
+"""
+Incremental sync of cached sheet values
+
+Data rows are split into fixed-size blocks, each with a content hash.
+The Sheets API offers no server-side hashes, so a sync fetches the last
+block onwards (which covers appended rows), the header row, and one
+earlier block chosen round-robin to verify, all in one batchGet. A
+changed header or verify block means rows moved or were edited in the
+middle, and so does a tail that is empty or no longer starts with the
+cached block's first row (rows before it were deleted), so the sheet is
+fetched whole; otherwise the tail replaces the cached copy from the last
+block on. A sync is only run because the file changed, so when none of
+the fetched blocks changed the edit is somewhere else and the sheet is
+fetched whole too. Every `full_every` syncs a full fetch catches
+anything the rotation has not reached yet.
+"""
+
+import hashlib
+import json
+from typing import Optional, Dict, List, Any, Tuple
+
+from config.settings import settings
+from utils.google_sheets import GoogleSheetsClient
+
+def column_letter(number: int) -> str:
+    """Convert a 1-based column number to A1 letters"""
+    letters = ""
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def block_hash(rows: List[List[Any]]) -> str:
+    """Hash one block of rows"""
+    raw = json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode()
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+def block_hashes(body: List[List[Any]], block_rows: int) -> List[str]:
+    """Hash data rows block by block"""
+    return [
+        block_hash(body[start:start + block_rows])
+        for start in range(0, len(body), block_rows)
+    ]
+
+def sync_state(values: List[List[Any]], block_rows: int, syncs: int = 0) -> Dict[str, Any]:
+    """Build the sync state stored alongside a full copy of the values"""
+    body = values[1:]
+    return {
+        "block_rows": block_rows,
+        "hashes": block_hashes(body, block_rows),
+        "ncols": max([len(row) for row in values] or [0]),
+        "syncs": syncs,
+    }
+
+async def full_sync(
+    client: GoogleSheetsClient,
+    spreadsheet_id: str,
+    range_: str,
+    access_token: str,
+    block_rows: int = settings.SYNC_BLOCK_ROWS
+) -> Tuple[List[List[Any]], Dict[str, Any], Dict[str, Any]]:
+    """Fetch the whole range; returns values, sync state and a summary"""
+    values = await client.get_values(spreadsheet_id, range_, access_token)
+    rows = max(len(values) - 1, 0)
+    summary = {"mode": "full", "rows": rows, "fetched_rows": len(values)}
+    return values, sync_state(values, block_rows), summary
+
+async def incremental_sync(
+    client: GoogleSheetsClient,
+    spreadsheet_id: str,
+    range_: str,
+    access_token: str,
+    values: List[List[Any]],
+    state: Optional[Dict[str, Any]],
+    block_rows: int = settings.SYNC_BLOCK_ROWS,
+    full_every: int = settings.SYNC_FULL_EVERY,
+    changed: bool = True
+) -> Tuple[List[List[Any]], Dict[str, Any], Dict[str, Any]]:
+    """
+    Bring cached values up to date, fetching as little as possible
+    changed means the file is known (or may be) modified since the
+    cached copy, so fetched blocks that all match cannot explain it.
+    Returns the new values, the new sync state and a summary of the sync.
+    """
+    # Sub-ranges and empty caches cannot be extended block-wise
+    if "!" in range_ or not values:
+        return await full_sync(client, spreadsheet_id, range_, access_token, block_rows)
+
+    if not state or state.get("block_rows") != block_rows:
+        state = sync_state(values, block_rows, (state or {}).get("syncs", 0))
+    if state["syncs"] + 1 >= full_every:
+        return await full_sync(client, spreadsheet_id, range_, access_token, block_rows)
+
+    headers, body = values[0], values[1:]
+    hashes = state["hashes"]
+    last = max(len(hashes) - 1, 0)
+    last_start = last * block_rows
+    last_column = column_letter(max(state["ncols"], 1))
+
+    # Sheet row numbers are 1-based and row 1 is the header
+    header_range = f"{range_}!1:1"
+    tail_range = f"{range_}!A{last_start + 2}:{last_column}"
+    ranges = [header_range, tail_range]
+
+    verify = None
+    if len(hashes) > 1:
+        verify = state["syncs"] % last
+        verify_start = verify * block_rows
+        verify_range = (
+            f"{range_}!A{verify_start + 2}:{last_column}{verify_start + block_rows + 1}"
+        )
+        ranges.append(verify_range)
+
+    fetched = await client.batch_get(spreadsheet_id, ranges, access_token)
+    header_rows = fetched.get(header_range, [])
+    if (header_rows[0] if header_rows else []) != headers:
+        return await full_sync(client, spreadsheet_id, range_, access_token, block_rows)
+    if verify is not None and block_hash(fetched.get(verify_range, [])) != hashes[verify]:
+        return await full_sync(client, spreadsheet_id, range_, access_token, block_rows)
+
+    tail = fetched.get(tail_range, [])
+    if last_start and (not tail or tail[0] != body[last_start]):
+        # The last block no longer starts where it did: rows before it
+        # were deleted (or the delete reached into earlier blocks)
+        return await full_sync(client, spreadsheet_id, range_, access_token, block_rows)
+    old_tail = body[last_start:]
+    unchanged = bool(hashes) and block_hash(tail[:len(old_tail)]) == hashes[last]
+    if changed and unchanged and len(tail) == len(old_tail):
+        # Nothing fetched moved, so the edit is in a block not fetched
+        return await full_sync(client, spreadsheet_id, range_, access_token, block_rows)
+
+    new_values = [headers] + body[:last_start] + tail
+    new_state = {
+        "block_rows": block_rows,
+        "hashes": hashes[:last] + block_hashes(tail, block_rows),
+        "ncols": max([state["ncols"]] + [len(row) for row in tail]),
+        "syncs": state["syncs"] + 1,
+    }
+    summary = {
+        "mode": "append" if unchanged else "tail",
+        "rows": len(new_values) - 1,
+        "appended": max(len(tail) - len(old_tail), 0),
+        "fetched_rows": len(header_rows) + len(tail) + (block_rows if verify is not None else 0),
+    }
+    return new_values, new_state, summary
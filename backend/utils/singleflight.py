@@ -0,0 +1,109 @@
+"""
+Request coalescing (single-flight) for concurrent identical work
+"""
+
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, List, Any, Awaitable, Callable, Hashable, Tuple
+
+from utils.metrics import metrics
+
+# Per-process key for stats labels, so they cannot be matched to guessed keys
+_LABEL_KEY = os.urandom(16)
+
+class _Call:
+    """One in-flight call and the callers awaiting it"""
+
+    __slots__ = ("task", "waiters", "stats")
+
+    def __init__(self, task: asyncio.Task, stats: Dict[str, int]):
+        self.task = task
+        self.waiters = 0
+        self.stats = stats
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers with the
+    same key await the in-flight call and share its result or error
+    The work runs in its own task, so a caller that goes away (a client
+    disconnect cancels its handler) does not cancel it for the others;
+    it is cancelled only once every caller has gone.
+    """
+
+    def __init__(self, name: str, max_keys: int = 256):
+        """Initialize single-flight group"""
+        self.name = name
+        self.max_keys = max_keys
+        self._calls: Dict[Hashable, _Call] = {}
+        # Per-key counters for the most recently used keys
+        self._keys: "OrderedDict[Hashable, Dict[str, int]]" = OrderedDict()
+        self._stats = {"leaders": 0, "shared": 0, "cancelled": 0}
+
+    def _key_stats(self, key: Hashable) -> Dict[str, int]:
+        stats = self._keys.get(key)
+        if stats is None:
+            stats = self._keys[key] = {"calls": 0, "shared": 0, "max_waiters": 0}
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+        return stats
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await fn() once for all concurrent callers with this key
+        Returns the result and whether it was shared with another caller's call.
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = _Call(task, self._key_stats(key))
+            task.add_done_callback(lambda _: self._forget(key, call))
+            self._stats["leaders"] += 1
+        else:
+            self._stats["shared"] += 1
+            call.stats["shared"] += 1
+        call.stats["calls"] += 1
+
+        call.waiters += 1
+        call.stats["max_waiters"] = max(call.stats["max_waiters"], call.waiters)
+        metrics.inc("singleflight_calls_total", (self.name, "shared" if shared else "leader"))
+        metrics.inc("singleflight_waiters", (self.name,))
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            metrics.inc("singleflight_waiters", (self.name,), -1)
+            if call.waiters == 0 and not call.task.done():
+                # Last caller cancelled: nobody wants the result any more
+                call.task.cancel()
+                self._forget(key, call)
+                self._stats["cancelled"] += 1
+                metrics.inc("singleflight_cancelled_total", (self.name,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing counters and per-key waiter counts under hashed key labels"""
+        in_flight: List[Dict[str, Any]] = [
+            {"key": _key_label(key), "waiters": call.waiters}
+            for key, call in self._calls.items()
+        ]
+        keys = [
+            {"key": _key_label(key), **stats}
+            for key, stats in reversed(self._keys.items())
+        ]
+        return {**self._stats, "in_flight": in_flight, "keys": keys}
+
+def _key_label(key: Hashable) -> str:
+    """Opaque, stable label for a key; keys carry user and spreadsheet ids"""
+    if isinstance(key, tuple):
+        raw = "\x1f".join("" if part is None else str(part) for part in key)
+    else:
+        raw = str(key)
+    return hashlib.blake2b(raw.encode(), digest_size=8, key=_LABEL_KEY).hexdigest()
@@ -0,0 +1,147 @@
+"""
+Startup profiling: per-module import time and time to first request
+
+Run from the backend directory:
+
+    python app.py --profile-startup
+    python -m utils.startup_profile --top 30 --max-ms 1500 --json startup.json
+
+The app is started in a fresh interpreter with -X importtime, its
+startup handlers are run and one request is sent to /api/health through
+the ASGI interface. Exits non-zero when time to first request exceeds
+--max-ms, so a slow new import can fail a CI step.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Optional, Dict, List, Any
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_PREFIXES = ("app", "config", "routers", "utils")
+
+# Runs in the child; prints one JSON line of phase timings
+CHILD = """
+import time
+started = time.perf_counter()
+import asyncio, json
+import app
+imported = time.perf_counter()
+
+async def first_request():
+    import httpx
+    await app.startup_event()
+    ready = time.perf_counter()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+        response = await client.get("/api/health")
+    served = time.perf_counter()
+    await app.shutdown_event()
+    return ready, served, response.status_code
+
+ready, served, status = asyncio.run(first_request())
+print(json.dumps({
+    "import_app": imported - started,
+    "startup": ready - imported,
+    "first_request": served - ready,
+    "status": status,
+}))
+"""
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse -X importtime lines into {module, self_us, cumulative_us, depth}"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        name = fields[2].rstrip()
+        modules.append({
+            "module": name.strip(),
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return modules
+
+def profile_startup() -> Dict[str, Any]:
+    """Start the app in a fresh interpreter and collect its timings"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"App failed to start:\n{result.stderr[-2000:]}")
+
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    measured = phases["import_app"] + phases["startup"] + phases["first_request"]
+    return {
+        "phases": {
+            # Interpreter start-up, site imports and process teardown
+            "interpreter": max(wall - measured, 0.0),
+            "import_app": phases["import_app"],
+            "startup": phases["startup"],
+            "first_request": phases["first_request"],
+        },
+        "status": phases["status"],
+        "time_to_first_request": wall,
+        "modules": parse_importtime(result.stderr),
+    }
+
+def report(profile: Dict[str, Any], top: int):
+    """Print phase timings, the project's modules and the slowest imports"""
+    print("Startup phases")
+    for phase, seconds in profile["phases"].items():
+        print(f"  {phase:<16} {seconds * 1000:>9.1f} ms")
+    print(f"  {'total':<16} {profile['time_to_first_request'] * 1000:>9.1f} ms"
+          f"  (/api/health -> {profile['status']})")
+
+    modules = profile["modules"]
+    print("\nProject modules (cumulative / self)")
+    for module in modules:
+        if module["module"].split(".")[0] in PROJECT_PREFIXES:
+            print(f"  {module['module']:<40} {module['cumulative_us'] / 1000:>9.1f} ms"
+                  f" {module['self_us'] / 1000:>9.1f} ms")
+
+    print(f"\nSlowest imports by cumulative time (top {top}, top-level packages)")
+    roots = sorted(
+        (module for module in modules if "." not in module["module"]),
+        key=lambda module: module["cumulative_us"],
+        reverse=True
+    )
+    for module in roots[:top]:
+        print(f"  {module['module']:<40} {module['cumulative_us'] / 1000:>9.1f} ms")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=20, help="slowest top-level imports to list")
+    parser.add_argument("--max-ms", type=float, help="fail if time to first request exceeds this")
+    parser.add_argument("--json", metavar="FILE", help="also write the full profile as JSON")
+    args = parser.parse_args(argv)
+
+    profile = profile_startup()
+    report(profile, args.top)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(profile, f, indent=2)
+
+    total_ms = profile["time_to_first_request"] * 1000
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"\nTime to first request {total_ms:.1f} ms exceeds {args.max_ms:g} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
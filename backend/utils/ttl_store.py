@@ -0,0 +1,128 @@
+"""
+Bounded in-memory key/value store with per-entry expiry
+"""
+
+import heapq
+import sys
+import threading
+import time
+from typing import Optional, Dict, List, Any, Tuple, Iterable
+
+class TTLStore:
+    """
+    Dict-like store whose entries expire
+    Expiry times are kept in a min-heap, so sweeping removes stale entries
+    in amortised O(log n) each. When full, the entry closest to expiry is
+    evicted to make room.
+    """
+
+    def __init__(self, max_size: int, default_ttl: float):
+        """Initialize store"""
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._data: Dict[Any, Tuple[Any, float]] = {}
+        self._heap: List[Tuple[float, Any]] = []
+        self._lock = threading.Lock()
+        self._stats = {"expired": 0, "evicted": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key) is not None
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Insert or replace an entry"""
+        now = time.monotonic()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.max_size:
+                self._sweep(now)
+                while len(self._data) >= self.max_size:
+                    self._evict_soonest()
+            self._data[key] = (value, expires_at)
+            heapq.heappush(self._heap, (expires_at, key))
+            self._maybe_compact()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Get a live entry's value"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[1] <= time.monotonic():
+            with self._lock:
+                if self._data.get(key) is item:
+                    del self._data[key]
+                    self._stats["expired"] += 1
+            return None
+        return item[0]
+
+    def pop(self, key: Any) -> Optional[Any]:
+        """Remove an entry and return its value if it was live"""
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is None or item[1] <= time.monotonic():
+            return None
+        return item[0]
+
+    def items(self) -> Iterable[Tuple[Any, Any]]:
+        """Snapshot of live entries"""
+        now = time.monotonic()
+        return [
+            (key, value)
+            for key, (value, expires_at) in list(self._data.items())
+            if expires_at > now
+        ]
+
+    def sweep(self) -> int:
+        """Remove expired entries; returns how many were removed"""
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            item = self._data.get(key)
+            # Heap entries for replaced or removed keys are stale; skip them
+            if item is not None and item[1] == expires_at:
+                del self._data[key]
+                removed += 1
+        self._stats["expired"] += removed
+        return removed
+
+    def _evict_soonest(self):
+        while self._heap:
+            expires_at, key = heapq.heappop(self._heap)
+            item = self._data.get(key)
+            if item is not None and item[1] == expires_at:
+                del self._data[key]
+                self._stats["evicted"] += 1
+                return
+
+    def _maybe_compact(self):
+        # Rebuild the heap once stale entries outnumber live ones
+        if len(self._heap) > 2 * len(self._data) + 64:
+            self._heap = [(expires_at, key) for key, (_, expires_at) in self._data.items()]
+            heapq.heapify(self._heap)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the store's containers and entries"""
+        with self._lock:
+            size = sys.getsizeof(self._data) + sys.getsizeof(self._heap)
+            size += sum(sys.getsizeof(entry) for entry in self._heap)
+            for key, item in self._data.items():
+                size += sys.getsizeof(key) + sys.getsizeof(item) + sys.getsizeof(item[0])
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        """Get entry counts and memory use"""
+        return {
+            "entries": len(self._data),
+            "max_size": self.max_size,
+            "heap_size": len(self._heap),
+            "expired": self._stats["expired"],
+            "evicted": self._stats["evicted"],
+            "memory_bytes": self.memory_bytes(),
+        }